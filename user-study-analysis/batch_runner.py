@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""batch_runner.py
+
+Run a per-session analysis over many session logs on a process pool.
+
+``run_sessions`` fans the log files out to ``workers`` processes (all cores
+by default, ``workers=1`` runs inline) and returns a ``BatchResult``:
+
+- ``outputs``: ``(session, value)`` pairs in session order, independent of
+  which worker finished first,
+- ``failures``: one ``SessionFailure`` per log whose analysis raised,
+  carrying the error and traceback instead of a line on stderr.
+
+If the per-session function returns a list of row dicts, ``frame()`` merges
+them into one DataFrame with a leading ``session`` column.
+
+The function must be picklable, i.e. defined at module level (optionally
+wrapped in ``functools.partial``).
+
+Usage:
+```
+from batch_runner import run_sessions
+
+batch = run_sessions(sorted(Path("session_logs/processed_logs").glob("run_*_processed.txt")),
+                     session_rows, workers=8)
+df = batch.frame()
+for failure in batch.failures:
+    print(failure.session, failure.error)
+```
+"""
+
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+SessionKey = Union[int, str]
+
+# ----------------------------------------------------------------------------
+# Result types
+
+
+class SessionFailure(NamedTuple):
+    session: SessionKey
+    path: str
+    error: str
+    traceback: str
+
+
+class BatchResult(NamedTuple):
+    outputs: List[Tuple[SessionKey, Any]]
+    failures: List[SessionFailure]
+
+    def frame(self) -> pd.DataFrame:
+        """Merge list-of-row-dict outputs into one DataFrame, in session order."""
+        rows = [
+            {'session': session, **row}
+            for session, session_rows in self.outputs
+            for row in session_rows or []
+        ]
+        return pd.DataFrame(rows)
+
+    def report(self) -> str:
+        """One line per failed session (empty string if none failed)."""
+        return "\n".join(f"{f.path}: {f.error}" for f in self.failures)
+
+# ----------------------------------------------------------------------------
+# Helpers
+
+
+def session_id(log_file: Path) -> SessionKey:
+    """Run number of ``run_<n>[...].txt`` (the file stem if it has none)."""
+    parts = Path(log_file).stem.split("_")
+    if len(parts) > 1 and parts[1].isdigit():
+        return int(parts[1])
+    return Path(log_file).stem
+
+
+def _sort_key(log_file: Path):
+    session = session_id(log_file)
+    # Numbered runs first in numeric order, anything else by name
+    return (0, session, "") if isinstance(session, int) else (1, 0, session)
+
+
+def _run_one(task: Tuple[Callable, Path]):
+    func, log_file = task
+    session = session_id(log_file)
+    try:
+        return session, func(log_file), None
+    except Exception as e:
+        failure = SessionFailure(session, str(log_file), f"{type(e).__name__}: {e}", traceback.format_exc())
+        return session, None, failure
+
+# ----------------------------------------------------------------------------
+# Runner
+
+
+def run_sessions(log_files: Iterable[Path], func: Callable[[Path], Any],
+                 workers: Optional[int] = None, chunksize: Optional[int] = None) -> BatchResult:
+    """Apply *func* to every log file on a process pool.
+
+    *chunksize* defaults to about four chunks per worker, which keeps the
+    per-task overhead negligible for thousands of small logs.
+    """
+    log_files = sorted((Path(f) for f in log_files), key=_sort_key)
+    tasks = [(func, f) for f in log_files]
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+
+    if workers == 1:
+        results = [_run_one(task) for task in tasks]
+    else:
+        chunksize = chunksize or max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() yields in submission order, so the output stays deterministic
+            results = list(pool.map(_run_one, tasks, chunksize=chunksize))
+
+    outputs = [(session, value) for session, value, failure in results if failure is None]
+    failures = [failure for _, _, failure in results if failure is not None]
+    return BatchResult(outputs, failures)
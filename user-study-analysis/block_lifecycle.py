@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""block_lifecycle.py
+
+Per-instance lifecycle of the spawned blocks, reconstructed from the log.
+
+The game never logs an instance id: a block is ``GridPlank`` when spawned,
+``GridPlank(Clone)`` in the physics and release lines and ``GridPlank_0``
+in the server's ownership lines, whichever plank it is. ``BlockLifecycle``
+therefore links the events of one type to instances by order and place:
+
+    Spawned GridX at (p) / (q)        new instance of type X, at p
+    BlockPhysicsController            the n-th Awake of type X on a client is
+      [GridX(Clone)]: Awake           instance n (counts the replicas)
+    [FishOwnershipManager]            a hold by the requesting address; it
+      Requesting ownership for        takes the newest never-placed, free
+      GridX_0 for Id [k] Address [A]  instance of X (preferring A's own
+                                      spawns), or is resolved at the snap
+    BlockPhysicsController            snap a -> b: the holder's instance, else
+      [GridX(Clone)]: Smooth snap     the free instance of X last seen
+                                      nearest to a; it is now at b
+    [FishOwnershipManager] Trying to  ends A's hold of an X (a new request
+      release ownership of GridX...   by A for an X ends the previous one)
+    All instances of GridX have       every instance of X is removed (the
+      been removed.                   bulk wipe)
+
+Stretches that a concatenated log repeats are skipped
+(``session_log_parser.ReplayFilter``), so duplicated logs do not spawn
+every block twice. The final state of an instance is ``removed``, ``held`` (a hold still open
+at the end of the log), ``placed`` (snapped at least once) or ``spawned``.
+Instances spawned before the last wipe all end up ``removed``.
+
+``position_store.ingest`` feeds every record into a ``BlockLifecycle`` in
+the same pass that reads the positions and stores the table as
+``blocks.npy`` (``BLOCK_DTYPE``) and every snap as ``snaps.npy``
+(``SNAP_DTYPE``) in the position cache, so per-block analytics never
+rescan a log.
+
+Usage:
+```
+python block_lifecycle.py [--run 0] [--output block_summary.csv]
+```
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from session_log_parser import POSITION_SOURCE, Record, ReplayFilter
+
+STATES = ('spawned', 'placed', 'held', 'removed')
+SPAWNED, PLACED, HELD, REMOVED = range(len(STATES))
+
+SPAWN_RE = re.compile(r'^Spawned (Grid\w+) at \(([-\d.]+), ([-\d.]+), ([-\d.]+)\)')
+AWAKE_RE = re.compile(r'^BlockPhysicsController \[(Grid\w+)\(Clone\)\]: Awake')
+SNAP_RE = re.compile(r'^BlockPhysicsController \[(Grid\w+)\(Clone\)\]: Smooth snap: '
+                     r'\(([-\d.]+), ([-\d.]+), ([-\d.]+)\) -> \(([-\d.]+), ([-\d.]+), ([-\d.]+)\)')
+REQUEST_RE = re.compile(r'Requesting ownership for (Grid\w+?)_\d+ for Id \[\d+\] Address \[([^\]]+)\]')
+RELEASE_RE = re.compile(r'Trying to release ownership of (Grid\w+)\(Clone\)')
+REMOVE_RE = re.compile(r'^All instances of (Grid\w+) have been removed')
+
+BLOCK_DTYPE = np.dtype([
+    ('type', 'i1'),            # index into the list of block types
+    ('spawner', 'i1'),         # index into the list of addresses
+    ('spawn_epoch', '<i8'),
+    ('spawn_x', '<f4'), ('spawn_y', '<f4'), ('spawn_z', '<f4'),
+    ('replicas', 'i1'),        # clients that logged the Awake
+    ('holds', '<i2'),
+    ('hold_time', '<f4'),      # seconds held in total (closed holds)
+    ('snaps', '<i2'),
+    ('last_snap_epoch', '<i8'),  # -1 if never snapped
+    ('x', '<f4'), ('y', '<f4'), ('z', '<f4'),  # last known position
+    ('removed_epoch', '<i8'),  # -1 if not removed
+    ('state', 'i1'),           # index into STATES
+])
+
+SNAP_DTYPE = np.dtype([
+    ('instance', '<i4'),       # row in the block table, -1 if unresolved
+    ('address', 'i1'),         # index into the list of addresses (snapping client)
+    ('epoch', '<i8'),
+    ('x', '<f4'), ('y', '<f4'), ('z', '<f4'),  # snapped position
+])
+
+
+class BlockLifecycle:
+    """Single-pass block lifecycle engine; feed it every record of a log."""
+
+    def __init__(self):
+        self.types: List[str] = []
+        self.addresses: List[str] = []
+        self.rows: List[Dict] = []
+        self.snaps: List[Tuple] = []                     # SNAP_DTYPE rows, log order
+        self.by_type: Dict[str, List[int]] = {}         # type → instance rows, spawn order
+        self.awakes: Dict[Tuple[str, str], int] = {}    # (address, type) → Awakes seen
+        self.holds: Dict[Tuple[str, str], Dict] = {}    # (address, type) → open hold
+        self.replays = ReplayFilter()
+
+    def _code(self, names: List[str], name: str) -> int:
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def _free(self, block_type: str) -> List[int]:
+        """Instances of *block_type* that are neither removed nor held."""
+        held = {hold['instance'] for hold in self.holds.values()}
+        return [i for i in self.by_type.get(block_type, ())
+                if self.rows[i]['removed_epoch'] < 0 and i not in held]
+
+    def _close(self, key: Tuple[str, str], epoch: int) -> None:
+        hold = self.holds.pop(key, None)
+        if hold is not None and hold['instance'] is not None:
+            self.rows[hold['instance']]['hold_time'] += epoch - hold['start']
+
+    def add(self, record: Record, epoch: int) -> None:
+        if record.source == POSITION_SOURCE or self.replays.is_replay(epoch):
+            return
+        payload = record.payload
+
+        m = SPAWN_RE.match(payload)
+        if m:
+            block_type = m.group(1)
+            pos = tuple(float(v) for v in m.group(2, 3, 4))
+            self.by_type.setdefault(block_type, []).append(len(self.rows))
+            self.rows.append({
+                'type': self._code(self.types, block_type),
+                'spawner': self._code(self.addresses, record.address),
+                'spawn_epoch': epoch, 'spawn_x': pos[0], 'spawn_y': pos[1], 'spawn_z': pos[2],
+                'replicas': 0, 'holds': 0, 'hold_time': 0.0, 'snaps': 0, 'last_snap_epoch': -1,
+                'x': pos[0], 'y': pos[1], 'z': pos[2], 'removed_epoch': -1,
+            })
+            return
+
+        m = AWAKE_RE.match(payload)
+        if m:
+            key = (record.address, m.group(1))
+            n = self.awakes.get(key, 0)
+            self.awakes[key] = n + 1
+            instances = self.by_type.get(m.group(1), ())
+            if n < len(instances):
+                self.rows[instances[n]]['replicas'] += 1
+            return
+
+        m = REQUEST_RE.search(payload)
+        if m:
+            block_type, address = m.groups()
+            self._close((address, block_type), epoch)
+            spawner = self._code(self.addresses, address)
+            fresh = [i for i in self._free(block_type) if self.rows[i]['snaps'] == 0]
+            # Newest fresh block, the requester's own spawns first
+            instance = max(fresh, key=lambda i: (self.rows[i]['spawner'] == spawner, i), default=None)
+            if instance is not None:
+                self.rows[instance]['holds'] += 1
+            self.holds[(address, block_type)] = {'instance': instance, 'start': epoch}
+            return
+
+        m = SNAP_RE.match(payload)
+        if m:
+            block_type = m.group(1)
+            before = np.array([float(v) for v in m.group(2, 3, 4)])
+            after = [float(v) for v in m.group(5, 6, 7)]
+            hold = self.holds.get((record.address, block_type))
+            instance = hold['instance'] if hold else None
+            if instance is None:
+                free = self._free(block_type)
+                if free:
+                    last = np.array([[self.rows[i][axis] for axis in 'xyz'] for i in free])
+                    instance = free[int(np.argmin(np.linalg.norm(last - before, axis=1)))]
+                    if hold is not None:
+                        hold['instance'] = instance
+                        self.rows[instance]['holds'] += 1
+            if instance is not None:
+                row = self.rows[instance]
+                row['snaps'] += 1
+                row['last_snap_epoch'] = epoch
+                row['x'], row['y'], row['z'] = after
+            self.snaps.append((-1 if instance is None else instance,
+                               self._code(self.addresses, record.address), epoch, *after))
+            return
+
+        m = RELEASE_RE.search(payload)
+        if m:
+            self._close((record.address, m.group(1)), epoch)
+            return
+
+        m = REMOVE_RE.match(payload)
+        if m:
+            block_type = m.group(1)
+            for key in [key for key in self.holds if key[1] == block_type]:
+                self._close(key, epoch)
+            for i in self.by_type.get(block_type, ()):
+                if self.rows[i]['removed_epoch'] < 0:
+                    self.rows[i]['removed_epoch'] = epoch
+
+    def snap_table(self) -> np.ndarray:
+        """Every snap as a ``SNAP_DTYPE`` structured array, in log order."""
+        return np.array(self.snaps, dtype=SNAP_DTYPE)
+
+    def table(self) -> np.ndarray:
+        """Instances as a ``BLOCK_DTYPE`` structured array, in spawn order."""
+        table = np.zeros(len(self.rows), dtype=BLOCK_DTYPE)
+        held = {hold['instance'] for hold in self.holds.values()}
+        for i, row in enumerate(self.rows):
+            for name, value in row.items():
+                table[name][i] = value
+            if row['removed_epoch'] >= 0:
+                table['state'][i] = REMOVED
+            elif i in held:
+                table['state'][i] = HELD
+            elif row['snaps']:
+                table['state'][i] = PLACED
+            else:
+                table['state'][i] = SPAWNED
+        return table
+
+# ----------------------------------------------------------------------------
+# Tables
+
+
+def block_frame(table: np.ndarray, types: List[str], addresses: List[str]) -> pd.DataFrame:
+    """``BLOCK_DTYPE`` table as a DataFrame with names instead of codes."""
+    df = pd.DataFrame(table)
+    df.insert(0, 'instance', np.arange(len(df)))
+    for column, names in (('type', types), ('spawner', addresses), ('state', STATES)):
+        df[column] = np.array(names, dtype=object)[df[column].to_numpy(dtype=np.int64)]
+    return df
+
+
+def load_blocks(log_path: Path, after_wipe: bool = True) -> pd.DataFrame:
+    """Per-instance table of *log_path* from its position cache.
+
+    With *after_wipe*, instances removed by the bulk wipe (spawned before
+    it) are left out.
+    """
+    from position_store import load_positions  # imports this module to build the table
+
+    cols = load_positions(Path(log_path))
+    df = block_frame(np.asarray(cols.blocks), cols.block_types, cols.block_addresses)
+    if after_wipe:
+        df = df[df['state'] != 'removed'].reset_index(drop=True)
+    return df
+
+
+def block_summary(df: pd.DataFrame) -> Dict[str, float]:
+    """Run-level aggregates of a per-instance table."""
+    held = df[df['holds'] > 0]
+    return {
+        'blocks': len(df),
+        'placed': int((df['state'] == 'placed').sum()),
+        'never_touched': int((df['state'] == 'spawned').sum()),
+        'snaps_per_block': df['snaps'].mean() if len(df) else 0.0,
+        'holds_per_block': df['holds'].mean() if len(df) else 0.0,
+        'mean_hold_time': (held['hold_time'].sum() / held['holds'].sum()) if len(held) else 0.0,
+    }
+
+
+def analyze_corpus(results_csv: Path = Path('study-run-results.csv'),
+                   log_dir: Path = Path('session_logs/processed_logs')) -> pd.DataFrame:
+    """Block summary of every run listed in study-run-results.csv."""
+    runs = pd.read_csv(results_csv, encoding='utf-8-sig')
+    rows = []
+    for run_id, variant in zip(runs['Run #'], runs['Variant']):
+        log_path = Path(log_dir) / f"run_{run_id}_processed.txt"
+        if not log_path.exists():
+            print(f"Warning: {log_path} not found, skipping")
+            continue
+        rows.append({'Run #': run_id, 'Variant': variant, **block_summary(load_blocks(log_path))})
+    return pd.DataFrame(rows)
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = sys.argv[1:]
+
+    def option(name, default):
+        return args[args.index(name) + 1] if name in args else default
+
+    run: Optional[str] = option('--run', None)
+    if run is not None:
+        df = load_blocks(Path('session_logs/processed_logs') / f"run_{run}_processed.txt")
+    else:
+        df = analyze_corpus()
+    if df.empty:
+        print("No blocks found")
+        return
+
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if run is None:
+        print("\nBy variant:")
+        print(df.groupby('Variant')[['blocks', 'placed', 'snaps_per_block', 'mean_hold_time']]
+              .mean().round(2).to_string())
+
+    output = option('--output', None)
+    if output is not None:
+        df.to_csv(output, index=False)
+        print(f"\nSaved {len(df)} rows to {output}")
+
+
+if __name__ == "__main__":
+    main()
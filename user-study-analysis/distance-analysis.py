@@ -1,129 +1,335 @@
 import math
-import re
 import sys
+from array import array
 from collections import defaultdict
-from datetime import datetime
+from functools import partial
 from pathlib import Path
 from typing import List, Tuple, Dict, Optional
 
-# ----------------------------------------------------------------------------
-# Regular expressions
-TS_RE   = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
-POS_RE  = re.compile(
-    r"Address \[(?P<participant_id>[^\]]+)\].*?\[PositionLogger\].*?P: \("    # prefix
-    r"(?P<x>-?\d+\.\d+), (?P<y>-?\d+\.\d+), (?P<z>-?\d+\.\d+)\)" # coords
-)
-WIPE_RE = re.compile(r"All instances of")
+import numpy as np
+
+from batch_runner import run_sessions
+from glitch_filter import REPLAY, filtered_trajectory, flag_counts, glitch_flags
+from dyad_tracks import head_tracks
+from posture import HeightProfile, track_profile
+from position_store import LOCKED_TARGET_MARKER, TrackSet, load_positions, spread_within_seconds
+from session_log_parser import POINTS_PER_TICK, ReplayFilter, SessionAccumulator, epoch_seconds, stream_session
+from trajectory import Trajectory, compute_trajectory, measure_trajectory, sequential_mean
+
+# Typed-array columns of the rows the streaming path keeps for the glitch filter
+ROW_TYPES = {'epoch': 'q', 'id': 'b', 'point': 'b', 'participant': 'h', 'replayed': 'B',
+             'x': 'd', 'y': 'd', 'z': 'd'}
 
 # ----------------------------------------------------------------------------
 # Helpers --------------------------------------------------------------------
 
-def parse_timestamp(line: str) -> Optional[datetime]:
-    """Extract a `datetime` from the beginning of *line* or return None."""
-    m = TS_RE.match(line)
-    if not m:
-        return None
-    return datetime.strptime(m.group(1), "%Y-%m-%d %H:%M:%S")
+def bucket_key(epoch: float, hz: float = 1.0) -> float:
+    """Quantise epoch seconds to *hz* bucket (wall‑clock second for hz ≥ 1)."""
+    if hz >= 1.0:
+        return float(math.floor(epoch))
+    step = 1 / hz
+    return math.floor(epoch / step) * step
 
 
-def find_last_wipe_line_number(file_path: Path) -> Optional[int]:
-    """Find the line number of the last 'All instances of' line in the file."""
-    last_wipe_line = None
-    with open(file_path, "r", errors="ignore") as f:
-        for line_num, line in enumerate(f, 1):
-            if WIPE_RE.search(line):
-                last_wipe_line = line_num
-    return last_wipe_line
+def participant_metrics(traj: Trajectory, avg_height: float, duration: float) -> Dict:
+    return {
+        'distance': traj.distance,
+        'duration': duration,
+        'avg_height': avg_height,
+        'sample_count': traj.sample_count
+    }
 
 
-def euclidean(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
-    return math.sqrt(sum((ai - bi) ** 2 for ai, bi in zip(a, b)))
+def track_metrics(traj: Trajectory, avg_height: float) -> Dict:
+    """Metrics of one tracked point (PositionLogger line index within a tick)."""
+    return {
+        'distance': traj.distance,
+        'avg_height': avg_height,
+        'sample_count': traj.sample_count
+    }
 
 
-def bucket_key(ts: datetime, hz: float = 1.0) -> float:
-    """Quantise timestamp to *hz* bucket (wall‑clock second for hz ≥ 1)."""
-    if hz >= 1.0:
-        return ts.replace(microsecond=0).timestamp()
-    step = 1 / hz
-    return math.floor(ts.timestamp() / step) * step
+def filter_metrics(t: np.ndarray, xyz: np.ndarray, flags: np.ndarray, hz: float = 1.0) -> Dict:
+    """Distance with glitches removed plus the number of flagged samples."""
+    spikes, teleports = flag_counts(flags)
+    return {
+        'filtered_distance': filtered_trajectory(t, xyz, flags, hz).distance,
+        'rejected': spikes,
+        'teleports': teleports,
+    }
+
+
+def measure_buckets(buckets: Dict[float, Tuple[float, float, float]]) -> Trajectory:
+    """Trajectory of a bucket → position dict, in time order."""
+    keys = np.fromiter(buckets.keys(), dtype=np.float64, count=len(buckets))
+    order = np.argsort(keys)
+    pts = np.array(list(buckets.values()), dtype=np.float64)
+    return measure_trajectory(keys[order], pts[order])
 
 # ----------------------------------------------------------------------------
 # Core algorithm -------------------------------------------------------------
 
-def process_session_log(file_path: Path, ignore_participants: List[str] = ["Host"], hz: float = 1.0):
-    """Process a single session log file and return metrics for each participant."""
+class SessionMetrics(SessionAccumulator):
+    """Reset-able per-participant accumulator for one session."""
+
+    def __init__(self, ignore_participants: List[str] = ["Host"], hz: float = 1.0):
+        self.ignore_participants = ignore_participants
+        self.hz = hz
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.samples = defaultdict(dict)  # participant_id → bucket → pos
+        self.heights = defaultdict(partial(HeightProfile, crouch=False))  # participant_id → posture profile
+        self.track_samples = defaultdict(dict)  # (participant_id, point) → bucket → pos
+        self.track_heights = defaultdict(HeightProfile)  # (participant_id, point) → posture profile
+        self.head_samples = defaultdict(dict)  # point → bucket → height, over all clients
+        # Glitch filter input, one typed-array entry per kept position line
+        self.rows = {name: array(code) for name, code in ROW_TYPES.items()}
+        self.participant_codes: Dict[str, int] = {}
+        self.replays = ReplayFilter()
+        self.relocalizations = 0
+
+    def add_event(self, record) -> None:
+        if record.payload.startswith(LOCKED_TARGET_MARKER):
+            self.relocalizations += 1
+
+    def add_position(self, record) -> None:
+        epoch = epoch_seconds(record.timestamp)
+        replayed = self.replays.is_replay(epoch)
+        self.head_samples[record.point].setdefault(bucket_key(epoch, self.hz), record.y)
+        self.add_sample(record.address, epoch, record.pos, record.point, replayed)
+        if record.address not in self.ignore_participants:
+            code = self.participant_codes.setdefault(record.address, len(self.participant_codes))
+            for name, value in zip(ROW_TYPES, (epoch, record.id, record.point, code, replayed, *record.pos)):
+                self.rows[name].append(value)
+
+    def add_sample(self, participant_id: str, epoch: float, pos: Tuple[float, float, float],
+                   point: int = 0, replayed: bool = False) -> None:
+        if participant_id in self.ignore_participants:
+            return
+        
+        # Store position sample (first sample in each bucket)
+        b = bucket_key(epoch, self.hz)
+        if b not in self.samples[participant_id]:
+            self.samples[participant_id][b] = pos
+        track = (participant_id, point)
+        if b not in self.track_samples[track]:
+            self.track_samples[track][b] = pos
+            
+        # Posture profiles of the heights (Y coordinate); a replay would run
+        # time backwards through them
+        if replayed:
+            return
+        self.heights[participant_id].add(pos[1], epoch)
+        self.track_heights[track].add(pos[1], epoch)
+
+    def results(self) -> Dict[str, Dict]:
+        """Calculate metrics for each participant."""
+        results = {}
+        start_time, end_time = self.start_time, self.end_time
+        duration = (end_time - start_time).total_seconds() if start_time and end_time else 0.0
+        
+        for participant_id, buckets in self.samples.items():
+            # Calculate distance on the time-sorted buckets
+            traj = measure_buckets(buckets)
+            
+            profile = self.heights[participant_id]
+            results[participant_id] = participant_metrics(traj, profile.mean, duration)
+            results[participant_id]['posture'] = profile.summary()
+            results[participant_id]['tracks'] = {}
+        
+        for (participant_id, point), buckets in sorted(self.track_samples.items()):
+            profile = self.track_heights[(participant_id, point)]
+            results[participant_id]['tracks'][point] = track_metrics(measure_buckets(buckets), profile.mean)
+            results[participant_id]['tracks'][point]['posture'] = profile.summary()
+        
+        self.add_filter_metrics(results)
+        return results
+
+    def head_results(self) -> Dict[int, Dict]:
+        """Posture profile of every tracked head's bucketed track, pooled over all clients."""
+        return {point: track_profile(sorted(buckets), (buckets[b] for b in sorted(buckets))).summary()
+                for point, buckets in sorted(self.head_samples.items())}
+
+    def add_filter_metrics(self, results: Dict[str, Dict]) -> None:
+        """Glitch-filtered distances from the kept rows, as in the cache path."""
+        if not self.rows['epoch']:
+            return
+        rows = {name: np.frombuffer(column, dtype=column.typecode) for name, column in self.rows.items()}
+        ids = rows['id'].astype(np.int64)
+        points = rows['point']
+        participants = rows['participant']
+        t = spread_within_seconds(rows['epoch'], ids)
+        xyz = np.column_stack((rows['x'], rows['y'], rows['z']))
+        replay = rows['replayed'].astype(bool)
+        flags = np.full(len(t), REPLAY, dtype=np.uint8)
+        original = ~replay
+        flags[original] = glitch_flags(t[original], xyz[original], (ids * POINTS_PER_TICK + points)[original])
+        for participant_id, metrics in results.items():
+            mask = participants == self.participant_codes[participant_id]
+            metrics.update(filter_metrics(t[mask], xyz[mask], flags[mask], self.hz))
+            metrics['relocalizations'] = self.relocalizations
+            for point, track in metrics['tracks'].items():
+                track_mask = mask & (points == point)
+                track.update(filter_metrics(t[track_mask], xyz[track_mask], flags[track_mask], self.hz))
+
+
+def process_session_log(file_path: Path, ignore_participants: List[str] = ["Host"], hz: float = 1.0,
+                        stream: bool = False):
+    """Process a single session log file and return metrics for each participant.
+
+    By default the memory-mapped position cache is used. With *stream* the
+    text log is read in one pass instead, discarding everything before each
+    bulk wipe as it goes. This is not constant-memory: the glitch filter
+    needs every track as a whole (centred rolling median, sub-second
+    times), so besides the per-bucket samples each kept position line is
+    buffered as 37 bytes of typed arrays (``ROW_TYPES``), close to the 44
+    bytes per row of the columnar cache. The streaming path only sees
+    whole-second timestamps, so hz > 1 needs the cache's reconstructed
+    sub-second times.
+
+    Every participant (and tracked point) gets both the raw 'distance' and
+    the glitch-filtered 'filtered_distance', with the number of 'rejected'
+    spike samples and 'teleports' (see ``glitch_filter``); 'relocalizations'
+    counts the Vuforia ``Locked target`` lines of the run. 'posture' holds
+    the constant-memory height profile (``posture.HeightProfile``: std and
+    quantiles, plus crouch time and crouch events for tracked points); the
+    cache path takes it from the profiles built during ingestion.
+
+    Crouching is a property of one head, and every client logs all three
+    heads, so crouch time and events are returned per tracked head rather
+    than per participant, from the head's bucketed track pooled over all
+    clients (including ignored ones): (results, start_time, end_time, heads).
+    """
+    if stream:
+        metrics = stream_session(file_path, SessionMetrics(ignore_participants, hz))
+        return metrics.results(), metrics.start_time, metrics.end_time, metrics.head_results()
     
-    # Find the last bulk wipe line number
-    last_wipe_line = find_last_wipe_line_number(file_path)
+    # Memory-mapped position columns; start from after the last wipe
+    cols = load_positions(file_path)
+    rows = cols.after_wipe()
+    start_time, end_time = cols.start_time, cols.end_time
+    duration = (end_time - start_time).total_seconds() if start_time and end_time else 0.0
     
-    samples = defaultdict(dict)  # participant_id → bucket → pos
-    heights = defaultdict(list)  # participant_id → [y_coordinates]
-    start_time = None
-    end_time = None
+    t = np.asarray(cols.t[rows])  # sub-second times, so hz > 1 buckets are meaningful
+    codes = np.asarray(cols.address[rows])
+    xyz = cols.xyz(rows)
+    glitch = np.asarray(cols.glitch[rows])
+    original = (glitch & REPLAY) == 0  # heights skip replayed stretches, like the posture profiles
     
-    with open(file_path, "r", errors="ignore") as f:
-        lines = f.readlines()
+    # Per-participant, per-tracked-point blocks from a single stable sort
+    tracks = TrackSet(cols, rows, group="address")
     
-    # Start from after the last wipe, or from beginning if no wipe found
-    start_line = last_wipe_line if last_wipe_line is not None else 0
+    points = np.asarray(cols.point[rows])
     
-    for line in lines[start_line:]:
-        ts = parse_timestamp(line)
-        if ts is None:
-            continue
-            
-        # Track time range
-        if start_time is None:
-            start_time = ts
-        end_time = ts
-        
-        # Position lines only
-        m = POS_RE.search(line)
-        if not m:
-            continue
-            
-        participant_id = m.group("participant_id")
+    # Participants in order of first appearance
+    present, first_rows = np.unique(codes, return_index=True)
+    results = {}
+    for code in present[np.argsort(first_rows)]:
+        participant_id = cols.addresses[code]
         if participant_id in ignore_participants:
             continue
-            
-        pos = (float(m.group("x")), float(m.group("y")), float(m.group("z")))
-        
-        # Store position sample (first sample in each bucket)
-        b = bucket_key(ts, hz)
-        if b not in samples[participant_id]:
-            samples[participant_id][b] = pos
-            
-        # Track heights for averaging
-        heights[participant_id].append(pos[1])  # Y coordinate
+        mask = codes == code
+        traj = compute_trajectory(t[mask], xyz[mask], hz)
+        results[participant_id] = participant_metrics(traj, sequential_mean(xyz[mask & original, 1]), duration)
+        results[participant_id].update(filter_metrics(t[mask], xyz[mask], glitch[mask], hz))
+        results[participant_id]['relocalizations'] = len(cols.locked_targets)
+        results[participant_id]['posture'] = cols.posture[participant_id]['all']
+        results[participant_id]['tracks'] = {}
+        for point in [p for c, p in tracks.keys() if c == code]:
+            track = tracks.track(code, point)
+            track_mask = mask & (points == point)
+            results[participant_id]['tracks'][point] = track_metrics(
+                compute_trajectory(track.t, track.xyz, hz), sequential_mean(xyz[track_mask & original, 1])
+            )
+            results[participant_id]['tracks'][point].update(
+                filter_metrics(t[track_mask], xyz[track_mask], glitch[track_mask], hz)
+            )
+            results[participant_id]['tracks'][point]['posture'] = cols.posture[participant_id]['points'][str(point)]
     
-    # Calculate metrics for each participant
-    results = {}
-    duration = (end_time - start_time).total_seconds() if start_time and end_time else 0.0
+    heads = {point: track_profile(traj.t, traj.xyz[:, 1]).summary()
+             for point, (traj, _) in head_tracks(file_path, hz).items()}
+    return results, start_time, end_time, heads
+
+
+def session_rows(file_path: Path, stream: bool = False) -> List[Dict]:
+    """One flat row per participant of a session (batch runner worker),
+    followed by one row per tracked head with its posture.
+
+    Which head a participant wears is not recorded, so crouch time and
+    events only appear in the head rows ('head' is the tracked point index,
+    'participant_id' is empty).
+    """
+    results, start_time, end_time, heads = process_session_log(file_path, stream=stream)
+    rows = []
+    for participant_id, metrics in sorted(results.items()):
+        rows.append({
+            'participant_id': participant_id,
+            'distance': metrics['distance'],
+            'duration': metrics['duration'],
+            'avg_height': metrics['avg_height'],
+            'sample_count': metrics['sample_count'],
+            'filtered_distance': metrics['filtered_distance'],
+            'rejected': metrics['rejected'],
+            'teleports': metrics['teleports'],
+            'relocalizations': metrics['relocalizations'],
+            'height_std': metrics['posture']['std'],
+            'height_p50': metrics['posture']['p50'],
+            'start_time': start_time,
+            'end_time': end_time,
+        })
+    for point, posture in heads.items():
+        rows.append({
+            'participant_id': None,
+            'head': point,
+            'avg_height': posture['mean'],
+            'sample_count': posture['count'],
+            'height_std': posture['std'],
+            'height_p50': posture['p50'],
+            'crouch_time': posture['crouch_time'],
+            'crouch_events': posture['crouch_events'],
+            'start_time': start_time,
+            'end_time': end_time,
+        })
+    return rows
+
+
+def run_batch(log_files: List[Path], workers: Optional[int], stream: bool = False,
+              output: Optional[Path] = None) -> None:
+    """Process all sessions on a process pool and print one merged table."""
+    batch = run_sessions(log_files, partial(session_rows, stream=stream), workers=workers)
+    df = batch.frame()
     
-    for participant_id in samples:
-        # Calculate distance
-        pts = sorted(samples[participant_id].items())
-        distance = sum(
-            euclidean(p1, p2) for (_, p1), (_, p2) in zip(pts, pts[1:])
-        ) if len(pts) > 1 else 0.0
-        
-        # Calculate average height
-        avg_height = sum(heights[participant_id]) / len(heights[participant_id]) if heights[participant_id] else 0.0
-        
-        results[participant_id] = {
-            'distance': distance,
-            'duration': duration,
-            'avg_height': avg_height,
-            'sample_count': len(pts)
-        }
+    if df.empty:
+        print("No valid data found")
+    else:
+        print(df.to_string(index=False))
+        if output:
+            df.to_csv(output, index=False)
+            print(f"\nSaved {len(df)} rows to {output}")
     
-    return results, start_time, end_time
-
+    if batch.failures:
+        print(f"\n{len(batch.failures)} of {len(log_files)} sessions failed:")
+        print(batch.report())
 
 # ----------------------------------------------------------------------------
 # Main -----------------------------------------------------------------------
 
+def option_value(name: str) -> Optional[str]:
+    """Value following *name* on the command line, if given."""
+    args = sys.argv[1:]
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return None
+
+
 def main() -> None:
+    # --stream: single pass over the text logs instead of the columnar cache
+    stream = "--stream" in sys.argv[1:]
+    # --workers N: batch mode on a process pool (0 = all cores), --output: CSV of the merged table
+    workers = option_value("--workers")
+    output = option_value("--output")
     processed_logs_dir = Path("./session_logs/processed_logs")
     
     if not processed_logs_dir.exists():
@@ -137,8 +343,13 @@ def main() -> None:
         print(f"Error: No run_*_processed.txt files found in {processed_logs_dir}", file=sys.stderr)
         return
     
+    if workers is not None:
+        run_batch(log_files, int(workers) or None, stream, Path(output) if output else None)
+        return
+    
     # Print header
-    print("Session,ParticipantID,Distance(m),Duration(s),AvgHeight(m),Samples,StartTime,EndTime")
+    print("Session,ParticipantID,Distance(m),Duration(s),AvgHeight(m),Samples,StartTime,EndTime,"
+          "Filtered(m),Rejected,Teleports")
     print("-" * 80)
     
     for log_file in log_files:
@@ -146,7 +357,7 @@ def main() -> None:
         session_id = log_file.stem.split("_")[1]
         
         try:
-            results, start_time, end_time = process_session_log(log_file)
+            results, start_time, end_time, heads = process_session_log(log_file, stream=stream)
             
             if results:
                 print(f"\nSession {session_id}:")
@@ -154,7 +365,15 @@ def main() -> None:
                     print(f"  {participant_id:15} | {metrics['distance']:8.2f} | {metrics['duration']:8.1f} | "
                           f"{metrics['avg_height']:8.2f} | {metrics['sample_count']:7d} | "
                           f"{start_time.strftime('%H:%M:%S') if start_time else 'N/A':8} | "
-                          f"{end_time.strftime('%H:%M:%S') if end_time else 'N/A':8}")
+                          f"{end_time.strftime('%H:%M:%S') if end_time else 'N/A':8} | "
+                          f"{metrics['filtered_distance']:8.2f} | {metrics['rejected']:5d} | {metrics['teleports']:5d}")
+                    for point, track in metrics['tracks'].items():
+                        print(f"    point {point}       | {track['distance']:8.2f} |          | "
+                              f"{track['avg_height']:8.2f} | {track['sample_count']:7d} |          |          | "
+                              f"{track['filtered_distance']:8.2f} | {track['rejected']:5d} | {track['teleports']:5d}")
+                print(f"  Vuforia re-localisations: {next(iter(results.values()))['relocalizations']}")
+                for point, posture in heads.items():
+                    print(f"  head {point}: crouched {posture['crouch_events']}x, {posture['crouch_time']:.0f} s")
             else:
                 print(f"\nSession {session_id}: No valid data found")
                       
@@ -15,6 +15,8 @@ from scipy.stats import pearsonr
 import warnings
 warnings.filterwarnings('ignore')
 
+from lagged_correlation import analyze_corpus
+
 # Set style
 plt.style.use('default')
 sns.set_palette("husl")
@@ -109,6 +111,7 @@ def analyze_leadership_patterns(df):
                 leader = 'P2'
             
             leadership_data.append({
+                'run_id': row['run_id'],
                 'dyad_id': row['participant_id'],
                 'variant': row['collaboration_variant'],
                 'leader': leader,
@@ -389,6 +392,21 @@ def main():
         std_asym = variant_data['movement_asymmetry'].std()
         print(f"{variant}: {mean_asym:.3f} ± {std_asym:.3f}")
     
+    # Temporal leadership: who follows whom in the partners' speed series
+    lag_df = analyze_corpus()
+    if len(lag_df) > 0:
+        lag_df = lag_df.rename(columns={'Run #': 'run_id'}).drop(columns='Variant')
+        leadership_df = leadership_df.merge(lag_df, on='run_id', how='left')
+        
+        print("\n=== TEMPORAL LEADERSHIP (LAGGED SPEED CROSS-CORRELATION) ===\n")
+        lag_summary = leadership_df.groupby(['variant', 'lag_leader']).size().unstack(fill_value=0)
+        # Head A/B cannot be matched to P1/P2, so there is no agreement
+        # with the distance-based leader to check
+        print("Lag-based leader (head A/B) by variant:")
+        print(lag_summary)
+        print("\nMean |peak lag| (s), peak correlation and leader switches by variant:")
+        print(leadership_df.groupby('variant')[['abs_lag_s', 'peak_corr', 'leader_switches']].mean().round(3))
+    
     # Check for confounding factors
     check_confounding_factors(df, dyad_details)
     
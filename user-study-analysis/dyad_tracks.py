@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""dyad_tracks.py
+
+The two partners' head tracks of one run, on a shared clock.
+
+There are two ways to get at "a participant's position" in the logs:
+
+    address streams   every sample logged under the participant's address
+                      after the last wipe, bucketed at ``hz``. This is what
+                      ``distance-analysis.py`` measures and what the
+                      distances in ``study-run-results.csv`` are, so
+                      per-participant totals (path length, height) use it.
+    head tracks       tracked point k of every tick. Each client logs the
+                      same three networked heads; the parser maps every
+                      client's spawn order onto one numbering, so point k
+                      is one physical head in every client's log and the
+                      reports of all clients are pooled. One of the three
+                      is (almost always) stationary, the other two are the
+                      partners' headsets.
+
+The address streams interleave the three heads (the first sample of a
+bucket is usually the stationary one), so the distance *between* two
+address streams is meaningless, and so is comparing their speeds over
+time. Anything relational (proximity, gaze at the partner, who follows
+whom) therefore uses ``moving_heads``/``align_heads``, which pick the two
+moving heads.
+Which of them is P1 is not recorded in the logs; such analyses are
+symmetric in the two partners.
+
+Usage:
+```
+from dyad_tracks import align_heads
+
+heads = align_heads(Path("session_logs/processed_logs/run_0_processed.txt"))
+gap = np.linalg.norm(heads.a - heads.b, axis=1)
+```
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from position_store import load_positions
+from trajectory import Trajectory, first_per_bucket, measure_trajectory, resample_asof, shared_clock
+
+ASOF_TOLERANCE = 2.0  # seconds a sample may lag behind a clock tick
+
+
+class AlignedHeads(NamedTuple):
+    t: np.ndarray       # (n,) shared clock
+    a: np.ndarray       # (n, 3) positions of the first head
+    b: np.ndarray       # (n, 3) positions of the second head
+    rot_a: np.ndarray   # (n, 3) Euler angles (degrees) of the first head
+    rot_b: np.ndarray   # (n, 3) Euler angles (degrees) of the second head
+    points: Tuple[int, int]  # tracked point index of each head
+
+
+HeadTrack = Tuple[Trajectory, np.ndarray]  # bucketed trajectory, (n, 3) rotations
+
+# ----------------------------------------------------------------------------
+# Head tracks
+
+
+def head_tracks(log_path: Path, hz: float = 1.0) -> Dict[int, HeadTrack]:
+    """Per tracked point: bucketed trajectory and the matching rotations,
+    pooled over all logging clients (after the last wipe)."""
+    cols = load_positions(log_path)
+    rows = cols.after_wipe()
+    points = np.asarray(cols.point[rows])
+    t = np.asarray(cols.t[rows])
+    xyz = cols.xyz(rows)
+    rot = cols.rotations(rows)
+
+    tracks = {}
+    for point in np.unique(points):
+        mask = points == point
+        keys, first = first_per_bucket(t[mask], hz)
+        tracks[int(point)] = (measure_trajectory(keys, xyz[mask][first]), rot[mask][first])
+    return tracks
+
+
+def moving_points(tracks: Dict[int, HeadTrack]) -> Tuple[int, ...]:
+    """The two tracked points that move most (median step length).
+
+    The stationary head only jumps when it is re-placed, so its median step
+    is zero, whereas a worn headset drifts on every tick.
+    """
+    activity = {point: float(np.median(traj.segments)) if len(traj.segments) else 0.0
+                for point, (traj, _) in tracks.items()}
+    return tuple(sorted(sorted(activity, key=activity.get, reverse=True)[:2]))
+
+
+def moving_heads(log_path: Path, hz: float = 1.0) -> Optional[Tuple[Tuple[int, int], HeadTrack, HeadTrack]]:
+    """Tracked point indices and ``head_tracks`` entries of the two moving
+    heads (None if there are fewer than two tracked points)."""
+    tracks = head_tracks(log_path, hz)
+    points = moving_points(tracks)
+    if len(points) < 2:
+        return None
+    return points, tracks[points[0]], tracks[points[1]]
+
+
+def align_heads(log_path: Path, hz: float = 1.0,
+                tolerance: float = ASOF_TOLERANCE) -> Optional[AlignedHeads]:
+    """Both partners' heads at every tick both are tracked (None if there
+    are fewer than two tracked points)."""
+    heads = moving_heads(log_path, hz)
+    if heads is None:
+        return None
+    points, (traj_a, rot_a), (traj_b, rot_b) = heads
+    clock = shared_clock(traj_a.t, traj_b.t, hz)
+    pos_a, ok_a = resample_asof(traj_a.t, traj_a.xyz, clock, tolerance)
+    pos_b, ok_b = resample_asof(traj_b.t, traj_b.xyz, clock, tolerance)
+    rot_a, _ = resample_asof(traj_a.t, rot_a, clock)
+    rot_b, _ = resample_asof(traj_b.t, rot_b, clock)
+    valid = ok_a & ok_b
+    return AlignedHeads(clock[valid], pos_a[valid], pos_b[valid], rot_a[valid], rot_b[valid], points)
+
+
+def stack_heads(run_ids: Iterable[int], log_dir: Path = Path('session_logs/processed_logs'),
+                hz: float = 1.0) -> Dict:
+    """``align_heads`` of many runs stacked into single arrays.
+
+    Returns the runs that could be aligned ('runs'), the runs without a log
+    or without two tracked heads ('skipped'), per-run row offsets into the
+    stacked arrays ('offsets', run i is ``offsets[i]:offsets[i + 1]``) and
+    the stacked AlignedHeads fields. Errors reading a log propagate, so a
+    broken run cannot silently drop out of the corpus.
+    """
+    runs, skipped, parts = [], [], []
+    for run_id in run_ids:
+        log_path = Path(log_dir) / f"run_{int(run_id)}_processed.txt"
+        heads = align_heads(log_path, hz) if log_path.exists() else None
+        if heads is None or not len(heads.t):
+            skipped.append(int(run_id))
+            continue
+        runs.append(int(run_id))
+        parts.append(heads)
+
+    lengths = [len(heads.t) for heads in parts]
+    stacked = {'runs': runs, 'skipped': skipped,
+               'offsets': np.concatenate(([0], np.cumsum(lengths))).astype(int)}
+    for field in ('t', 'a', 'b', 'rot_a', 'rot_b'):
+        empty = np.zeros(0) if field == 't' else np.zeros((0, 3))
+        stacked[field] = np.concatenate([getattr(h, field) for h in parts]) if parts else empty
+    return stacked
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""event_store.py
+
+Time-indexed event store for one session log.
+
+Records are grouped by event type into one contiguous, time-sorted block
+per type (a single ``lexsort``), with ``offsets[k]:offsets[k + 1]`` marking
+the block of type ``k``. "Events of type X between t0 and t1" is then two
+binary searches instead of a rescan of the log, and counts over many
+sliding windows are a single vectorised ``searchsorted``.
+
+Event types:
+
+    PositionLogger          [PositionLogger] P: (...) | R: (...)
+    Spawned                 Spawned GridPlank at (...)
+    FishOwnershipManager    [FishOwnershipManager] ...
+    BlockPhysicsController  BlockPhysicsController [GridPlank(Clone)]: ...
+    LockedTarget            Locked target 'VuforiaTracker-aruco1' at position: (...)
+    ButtonTapped            Button tapped to select object: GridPlank
+    SpawnFromButton         SpawnFromButton: Still in cooldown period.
+    Wipe                    All instances of GridPlank have been removed.
+    Other                   everything else
+
+``TimeIndex`` is the underlying sorted-times structure; it also works for
+any other timed sequence, e.g. transcript utterances weighted by word count.
+Windows are half-open, ``t0 <= t < t1``. With ``skip_replays`` the
+stretches that a concatenated log repeats are dropped before indexing
+(``session_log_parser.ReplayFilter``), so they are not counted twice.
+
+Usage:
+```
+from event_store import load_event_store
+
+store = load_event_store(Path("session_logs/processed_logs/run_0_processed.txt"), after_wipe=True)
+spawns = store.between("Spawned", store.start_epoch, store.start_epoch + 60)
+per_minute = store.counts("FishOwnershipManager", starts, starts + 60)
+```
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from session_log_parser import (POSITION_SOURCE, WIPE_MARKER, Record, ReplayFilter, epoch_seconds,
+                                load_session)
+
+EVENT_TYPES = (
+    "PositionLogger",
+    "Spawned",
+    "FishOwnershipManager",
+    "BlockPhysicsController",
+    "LockedTarget",
+    "ButtonTapped",
+    "SpawnFromButton",
+    "Wipe",
+    "Other",
+)
+_TYPE_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+# ----------------------------------------------------------------------------
+# Helpers
+
+
+def event_type(record: Record) -> str:
+    """Event type of a parsed record (one of ``EVENT_TYPES``)."""
+    source = record.source
+    if source == POSITION_SOURCE:
+        return "PositionLogger"
+    if source in ("FishOwnershipManager", "BlockPhysicsController", "SpawnFromButton"):
+        return source
+    payload = record.payload
+    if payload.startswith("Spawned "):
+        return "Spawned"
+    if payload.startswith("Locked target"):
+        return "LockedTarget"
+    if payload.startswith("Button tapped"):
+        return "ButtonTapped"
+    if WIPE_MARKER in payload:
+        return "Wipe"
+    return "Other"
+
+
+class TimeIndex:
+    """Sorted event times with optional per-event weights.
+
+    ``count``/``total`` answer window queries by binary search; passing
+    arrays of window bounds evaluates all windows in one call.
+    """
+
+    def __init__(self, times: Sequence[float], weights: Optional[Sequence[float]] = None):
+        times = np.asarray(times, dtype=np.float64)
+        self.order = np.argsort(times, kind="stable")
+        self.times = times[self.order]
+        if weights is None:
+            self._prefix = None
+        else:
+            weights = np.asarray(weights)[self.order]
+            self._prefix = np.concatenate(([0], np.cumsum(weights)))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def bounds(self, t0, t1):
+        """Index range ``[lo, hi)`` of the events with ``t0 <= t < t1``."""
+        return np.searchsorted(self.times, t0, "left"), np.searchsorted(self.times, t1, "left")
+
+    def window(self, t0: float, t1: float) -> slice:
+        lo, hi = self.bounds(t0, t1)
+        return slice(int(lo), int(hi))
+
+    def count(self, t0, t1):
+        """Number of events per window (scalar or array of windows)."""
+        lo, hi = self.bounds(t0, t1)
+        return hi - lo
+
+    def total(self, t0, t1):
+        """Sum of the weights per window (scalar or array of windows)."""
+        if self._prefix is None:
+            return self.count(t0, t1)
+        lo, hi = self.bounds(t0, t1)
+        return self._prefix[hi] - self._prefix[lo]
+
+# ----------------------------------------------------------------------------
+# Event store
+
+
+class EventStore:
+    """Records of one session, indexed by event type and time."""
+
+    def __init__(self, records: List[Record]):
+        epoch = np.fromiter((epoch_seconds(r.timestamp) for r in records), dtype=np.int64, count=len(records))
+        kinds = np.fromiter((_TYPE_CODES[event_type(r)] for r in records), dtype=np.int8, count=len(records))
+
+        # One contiguous, time-sorted block per type (file order breaks ties)
+        order = np.lexsort((epoch, kinds))
+        self.epoch = epoch[order]
+        self.kinds = kinds[order]
+        self.records = [records[i] for i in order]
+        self.rows = order  # position of each event in the source record list
+        self.offsets = np.searchsorted(self.kinds, np.arange(len(EVENT_TYPES) + 1), "left")
+
+        self.start_epoch: Optional[int] = int(epoch.min()) if len(epoch) else None
+        self.end_epoch: Optional[int] = int(epoch.max()) if len(epoch) else None
+        self._all = TimeIndex(epoch)
+        self._indexes: Dict[str, TimeIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _block(self, kind: str) -> slice:
+        code = _TYPE_CODES[kind]
+        return slice(int(self.offsets[code]), int(self.offsets[code + 1]))
+
+    def index(self, kind: Optional[str] = None) -> TimeIndex:
+        """TimeIndex over one event type (or all events)."""
+        if kind is None:
+            return self._all
+        if kind not in self._indexes:
+            self._indexes[kind] = TimeIndex(self.epoch[self._block(kind)])
+        return self._indexes[kind]
+
+    def type_counts(self) -> Dict[str, int]:
+        return {name: int(self.offsets[i + 1] - self.offsets[i]) for i, name in enumerate(EVENT_TYPES)}
+
+    def times(self, kind: str) -> np.ndarray:
+        """Sorted epoch seconds of all events of *kind* (a view)."""
+        return self.epoch[self._block(kind)]
+
+    def between(self, kind: str, t0: float, t1: float) -> List[Record]:
+        """Records of *kind* with ``t0 <= epoch < t1``, in time order."""
+        block = self._block(kind)
+        window = self.index(kind).window(t0, t1)
+        return self.records[block.start + window.start:block.start + window.stop]
+
+    def count(self, kind: Optional[str], t0, t1):
+        """Number of events of *kind* (all types if None) per window."""
+        return self.index(kind).count(t0, t1)
+
+    def counts(self, kind: Optional[str], starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Vectorised ``count`` over many windows (e.g. a sliding window)."""
+        return np.asarray(self.count(kind, np.asarray(starts), np.asarray(ends)))
+
+    def sliding_counts(self, kind: Optional[str], width: float, step: float) -> np.ndarray:
+        """Event counts in ``[t, t + width)`` for t = start, start + step, ..."""
+        if self.start_epoch is None:
+            return np.zeros(0, dtype=np.int64)
+        starts = np.arange(self.start_epoch, self.end_epoch + 1, step, dtype=np.float64)
+        return self.counts(kind, starts, starts + width)
+
+
+def load_event_store(file_path: Path, after_wipe: bool = False, skip_replays: bool = False) -> EventStore:
+    """Event store of *file_path*, optionally only after the last bulk wipe
+    and/or without the replayed stretches of a concatenated log."""
+    session = load_session(file_path)
+    records = session.after_last_wipe() if after_wipe else session.records
+    if skip_replays:
+        replays = ReplayFilter()
+        records = [r for r in records if not replays.is_replay(epoch_seconds(r.timestamp))]
+    return EventStore(records)
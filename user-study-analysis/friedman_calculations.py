@@ -36,21 +36,10 @@ df['von_mises_stress'] = pd.to_numeric(df['Bridge Evaluation 2: von Mises Stress
 df['displacement'] = pd.to_numeric(df['Bridge evaluation 3: Displacement (max, in mm, smaller better)'], errors='coerce')
 df['bridge_price'] = pd.to_numeric(df['Bridge Price'], errors='coerce')
 
-# Construction efficiency calculation
-def parse_objects(obj_str):
-    if pd.isna(obj_str) or obj_str == 'INVALID':
-        return np.nan
-    try:
-        total = 0
-        parts = obj_str.split(', ')
-        for part in parts:
-            count = int(part.split(' ×')[1])
-            total += count
-        return total
-    except:
-        return np.nan
-
-df['spawned_objects'] = df['Spawned objects'].apply(parse_objects)
+# Construction efficiency calculation (spawn counts from the logs, see spawn_counts.py)
+from spawn_counts import load_spawn_counts
+spawn_totals = load_spawn_counts().set_index('Run #')['total']
+df['spawned_objects'] = df['Run #'].map(spawn_totals)
 df['final_objects'] = pd.to_numeric(df['# objects (final bridge, start block incl.)'], errors='coerce')
 df['construction_efficiency'] = df['final_objects'] / df['spawned_objects']
 
@@ -126,4 +115,26 @@ for metric in ['safety_factor', 'von_mises_stress', 'displacement', 'bridge_pric
     if chi2 is not None:
         print(f"   {metric}: χ² = {chi2:.3f}, p = {p:.3f}")
 
+# 8. Partner proximity by Variant
+from proximity_analysis import join_study_results
+df = join_study_results(df)
+print(f"\n8. Partner proximity by Variant:")
+for metric in ['proximity_mean_distance', 'proximity_personal_fraction', 'proximity_events_per_min']:
+    if metric not in df:
+        continue
+    chi2, p = calculate_friedman_for_metric(df, metric, 'Variant')
+    if chi2 is not None:
+        print(f"   {metric}: χ² = {chi2:.3f}, p = {p:.3f}")
+
+# 9. Ownership contention by Variant
+from ownership_analysis import join_study_results as join_ownership
+df = join_ownership(df)
+print(f"\n9. Ownership contention by Variant:")
+for metric in ['ownership_handoffs', 'ownership_mean_hold_s', 'ownership_contention_rate', 'ownership_requests_per_min']:
+    if metric not in df:
+        continue
+    chi2, p = calculate_friedman_for_metric(df, metric, 'Variant')
+    if chi2 is not None:
+        print(f"   {metric}: χ² = {chi2:.3f}, p = {p:.3f}")
+
 print(f"\nCalculations complete!") 
\ No newline at end of file
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""gaze_analysis.py
+
+Gaze and joint-attention estimates from the PositionLogger head rotations.
+
+Every ``[PositionLogger]`` line carries the head's Unity Euler angles
+``R: (rx, ry, rz)`` in degrees. Unity applies them as roll (z), then pitch
+(x), then yaw (y), so the forward (+z) axis of a head is
+
+    f = (cos rx · sin ry,  -sin rx,  cos rx · cos ry)
+
+(roll does not move it). A head is taken to look at a target when the
+target lies inside its view cone of half-angle ``VIEW_HALF_ANGLE``:
+
+    partner      the other partner's head position
+    build area   the start cubes of the run's scene (``meta/scenes/<env>``,
+                 centred on the scene origin), sampled on a coarse grid; the
+                 area counts as seen if any grid point is in the cone
+
+The partners' heads come from ``dyad_tracks.stack_heads``: all runs are
+stacked into one array and evaluated in a single vectorised pass; per-run
+ratios are segment sums over the stacked flags. Which head is P1 is not
+recorded in the logs, so per-head results are reported as head A / head B
+and the joint measures are symmetric.
+
+Usage:
+```
+python gaze_analysis.py [--hz 1] [--half-angle 30] [--output gaze_summary.csv]
+```
+"""
+
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dyad_tracks import stack_heads
+
+DEFAULT_HZ = 1.0
+VIEW_HALF_ANGLE = 30.0       # degrees
+SCENES_DIR = Path('meta/scenes')
+BUILD_AREA_OBJECT = 'StartCube'
+AREA_SPACING = 0.1           # grid spacing of the sampled build area (m)
+
+# ----------------------------------------------------------------------------
+# Geometry
+
+
+def forward_vectors(rotations: np.ndarray) -> np.ndarray:
+    """Unit forward vectors of (n, 3) Unity Euler angles in degrees."""
+    rx = np.radians(rotations[:, 0])
+    ry = np.radians(rotations[:, 1])
+    cos_x = np.cos(rx)
+    return np.column_stack((cos_x * np.sin(ry), -np.sin(rx), cos_x * np.cos(ry)))
+
+
+def in_view(origin: np.ndarray, forward: np.ndarray, target: np.ndarray,
+            half_angle: float = VIEW_HALF_ANGLE) -> np.ndarray:
+    """Whether each (n, 3) *target* lies in the view cone at *origin*."""
+    to_target = target - origin
+    dist = np.linalg.norm(to_target, axis=1)
+    cos = np.einsum('ij,ij->i', forward, to_target) / np.where(dist > 0, dist, 1)
+    return (dist > 0) & (cos >= np.cos(np.radians(half_angle)))
+
+
+def area_in_view(origin: np.ndarray, forward: np.ndarray, area: np.ndarray,
+                 half_angle: float = VIEW_HALF_ANGLE) -> np.ndarray:
+    """Whether any of the (k, 3) *area* points lies in each view cone.
+
+    *area* may also be (n, k, 3), one point set per sample.
+    """
+    to_area = area - origin[:, None, :]
+    dist = np.linalg.norm(to_area, axis=2)
+    cos = np.einsum('nj,nkj->nk', forward, to_area) / np.where(dist > 0, dist, 1)
+    return ((dist > 0) & (cos >= np.cos(np.radians(half_angle)))).any(axis=1)
+
+# ----------------------------------------------------------------------------
+# Scenes
+
+
+def _obj_objects(path: Path) -> Dict[str, np.ndarray]:
+    """Vertices of every named object ('o' line) of a Wavefront .obj."""
+    objects: Dict[str, List[List[float]]] = {}
+    name = None
+    with open(path) as f:
+        for line in f:
+            if line.startswith('o '):
+                name = line[2:].strip()
+                objects[name] = []
+            elif line.startswith('v ') and name is not None:
+                objects[name].append([float(v) for v in line.split()[1:4]])
+    return {name: np.array(vertices).reshape(-1, 3) for name, vertices in objects.items()}
+
+
+@lru_cache(maxsize=None)
+def build_area_bounds(environment: int, scenes_dir: Path = SCENES_DIR) -> Tuple[np.ndarray, np.ndarray]:
+    """(min, max) corners of the start cubes of scene *environment*."""
+    obj_files = sorted((Path(scenes_dir) / str(environment)).glob('*.obj'))
+    if not obj_files:
+        raise FileNotFoundError(f"no .obj export for scene {environment} in {scenes_dir}")
+    cubes = [v for name, v in _obj_objects(obj_files[0]).items() if BUILD_AREA_OBJECT in name]
+    if not cubes:
+        raise ValueError(f"no {BUILD_AREA_OBJECT} objects in {obj_files[0]}")
+    vertices = np.vstack(cubes)
+    return vertices.min(axis=0), vertices.max(axis=0)
+
+
+def build_area_points(environment: int, spacing: float = AREA_SPACING,
+                      scenes_dir: Path = SCENES_DIR) -> np.ndarray:
+    """(k, 3) grid over the build area's bounding box."""
+    lo, hi = build_area_bounds(environment, Path(scenes_dir))
+    axes = [np.linspace(a, b, max(2, int(np.ceil((b - a) / spacing)) + 1)) for a, b in zip(lo, hi)]
+    return np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+
+# ----------------------------------------------------------------------------
+# Corpus
+
+
+def attention_flags(stacked: Dict, half_angle: float = VIEW_HALF_ANGLE,
+                    scenes_dir: Path = SCENES_DIR) -> Dict[str, np.ndarray]:
+    """Per-tick gaze flags over the whole stacked corpus (``stack_heads``
+    output with an 'environment' entry per run)."""
+    fwd_a = forward_vectors(stacked['rot_a'])
+    fwd_b = forward_vectors(stacked['rot_b'])
+
+    # Every tick gets its run's build area, padded to a common point count
+    # by repeating the last point
+    areas = [build_area_points(env, scenes_dir=scenes_dir) for env in stacked['environment']]
+    k = max((len(a) for a in areas), default=1)
+    lengths = np.diff(stacked['offsets'])
+    padded = np.stack([np.pad(a, ((0, k - len(a)), (0, 0)), mode='edge') for a in areas]) \
+        if areas else np.zeros((0, k, 3))
+    area = np.repeat(padded, lengths, axis=0)
+
+    a_sees_b = in_view(stacked['a'], fwd_a, stacked['b'], half_angle)
+    b_sees_a = in_view(stacked['b'], fwd_b, stacked['a'], half_angle)
+    a_sees_area = area_in_view(stacked['a'], fwd_a, area, half_angle)
+    b_sees_area = area_in_view(stacked['b'], fwd_b, area, half_angle)
+    return {
+        'a_sees_partner': a_sees_b,
+        'b_sees_partner': b_sees_a,
+        'a_sees_area': a_sees_area,
+        'b_sees_area': b_sees_area,
+        'mutual_gaze': a_sees_b & b_sees_a,
+        'joint_area': a_sees_area & b_sees_area,
+        'either_partner': a_sees_b | b_sees_a,
+    }
+
+
+def run_ratios(stacked: Dict, flags: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Fraction of ticks each flag is set, per run ('Run #')."""
+    offsets = stacked['offsets']
+    lengths = np.diff(offsets)
+    df = pd.DataFrame({'Run #': stacked['runs'], 'samples': lengths})
+    if not len(lengths):
+        return df
+    for name, flag in flags.items():
+        df[f'{name}_ratio'] = np.add.reduceat(flag.astype(np.int64), offsets[:-1]) / lengths
+    # Of the ticks where someone looks at the build area, how many are shared
+    either_area = flags['a_sees_area'] | flags['b_sees_area']
+    either_count = np.add.reduceat(either_area.astype(np.int64), offsets[:-1])
+    joint_count = np.add.reduceat(flags['joint_area'].astype(np.int64), offsets[:-1])
+    df['joint_attention_share'] = np.where(either_count > 0, joint_count / np.maximum(either_count, 1), np.nan)
+    return df
+
+
+def analyze_corpus(results_csv: Path = Path('study-run-results.csv'),
+                   log_dir: Path = Path('session_logs/processed_logs'),
+                   hz: float = DEFAULT_HZ, half_angle: float = VIEW_HALF_ANGLE) -> pd.DataFrame:
+    """Joint-attention ratios of every run listed in study-run-results.csv."""
+    runs = pd.read_csv(results_csv, encoding='utf-8-sig')
+    stacked = stack_heads(runs['Run #'], log_dir, hz)
+    if stacked['skipped']:
+        print(f"Skipped runs (no log or fewer than two heads): {stacked['skipped']}")
+    stacked['environment'] = runs.set_index('Run #').loc[stacked['runs'], 'Environment'].astype(int).tolist()
+    ratios = run_ratios(stacked, attention_flags(stacked, half_angle))
+    return runs[['Run #', 'Variant']].merge(ratios, on='Run #')
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = sys.argv[1:]
+
+    def option(name, default):
+        return args[args.index(name) + 1] if name in args else default
+
+    df = analyze_corpus(hz=float(option('--hz', DEFAULT_HZ)),
+                        half_angle=float(option('--half-angle', VIEW_HALF_ANGLE)))
+    if df.empty:
+        print("No runs could be analysed")
+        return
+
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print("\nBy variant:")
+    columns = ['mutual_gaze_ratio', 'either_partner_ratio', 'joint_area_ratio', 'joint_attention_share']
+    print(df.groupby('Variant')[columns].mean().round(3).to_string())
+
+    output = option('--output', None)
+    if output is not None:
+        df.to_csv(output, index=False)
+        print(f"\nSaved {len(df)} runs to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""glitch_filter.py
+
+Tracking-glitch and teleport filter for the PositionLogger streams.
+
+Two kinds of artefacts inflate path lengths:
+
+    spikes      a single sample far off its neighbours (tracking glitch);
+                detected as a deviation of more than ``MEDIAN_TOLERANCE``
+                from the centred rolling median of ``MEDIAN_WINDOW``
+                samples and rejected
+    teleports   a step faster than ``MAX_SPEED`` after which the track
+                stays at the new place, typically Vuforia re-localising
+                on a marker (``Locked target 'VuforiaTracker-aruco*'``);
+                the sample is kept but the step does not count as distance
+
+Filtering has to happen per tracked point of each logging client: a
+participant's address stream interleaves several heads, so its steps are
+not physical movements. ``track_flags`` works on one such track;
+``glitch_flags`` runs it over every track of a session and is called by
+``position_store.ingest``, so the flags are stored as the ``glitch``
+column of the position cache. ``filtered_trajectory`` then measures a
+(bucketed) stream with spikes dropped and teleport steps zeroed.
+
+Several processed logs hold the session more than once, one copy after
+the other (``session_log_parser.ReplayFilter``). Time steps back at such a
+replay, which would look like a teleport, so replayed rows carry the
+``REPLAY`` flag instead: they are never passed to ``track_flags`` and
+``filtered_trajectory`` leaves them out.
+
+Usage:
+```
+from glitch_filter import SPIKE, filtered_trajectory
+
+cols = load_positions(log_path)
+rows = cols.after_wipe()
+traj = filtered_trajectory(cols.t[rows], cols.xyz(rows), cols.glitch[rows])
+```
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from trajectory import Trajectory, bucket_keys, first_per_bucket, measure_trajectory
+
+MAX_SPEED = 2.0          # m/s; faster steps are teleports
+MEDIAN_WINDOW = 5        # samples in the rolling median
+MEDIAN_TOLERANCE = 0.5   # m a sample may deviate from the rolling median
+# Log timestamps have one-second resolution and clients write buffered ticks
+# in bursts, so sub-second gaps are reconstructions and not trusted
+MIN_DT = 1.0             # s; floor for the time between two samples
+
+# Flag bits of the ``glitch`` column
+SPIKE = 1
+TELEPORT = 2
+REPLAY = 4   # row repeats an earlier stretch of a concatenated log
+
+
+def filter_settings() -> Dict[str, float]:
+    """Current thresholds; stored with cached flags so changing them re-ingests."""
+    return {'max_speed': MAX_SPEED, 'median_window': MEDIAN_WINDOW,
+            'median_tolerance': MEDIAN_TOLERANCE, 'min_dt': MIN_DT}
+
+# ----------------------------------------------------------------------------
+# Detection
+
+
+def rolling_median(xyz: np.ndarray, window: int = MEDIAN_WINDOW) -> np.ndarray:
+    """Centred per-axis rolling median of an (n, 3) array (edges repeated)."""
+    xyz = np.asarray(xyz, dtype=np.float64)
+    if window <= 1 or len(xyz) == 0:
+        return xyz.copy()
+    half = window // 2
+    padded = np.pad(xyz, ((half, window - 1 - half), (0, 0)), mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)
+    return np.median(windows, axis=-1)
+
+
+def track_flags(t: np.ndarray, xyz: np.ndarray, max_speed: float = MAX_SPEED,
+                window: int = MEDIAN_WINDOW, tolerance: float = MEDIAN_TOLERANCE) -> np.ndarray:
+    """SPIKE / TELEPORT flags of every sample of one time-ordered track."""
+    t = np.asarray(t, dtype=np.float64)
+    xyz = np.asarray(xyz, dtype=np.float64)
+    flags = np.zeros(len(t), dtype=np.uint8)
+    if len(t) < 2:
+        return flags
+
+    deviation = np.linalg.norm(xyz - rolling_median(xyz, window), axis=1)
+    flags[deviation > tolerance] |= SPIKE
+
+    # Speed of every step between consecutive non-spike samples
+    kept = np.flatnonzero(flags == 0)
+    if len(kept) > 1:
+        step = np.linalg.norm(np.diff(xyz[kept], axis=0), axis=1)
+        dt = np.maximum(np.diff(t[kept]), MIN_DT)
+        flags[kept[1:][step / dt > max_speed]] |= TELEPORT
+    return flags
+
+
+def glitch_flags(t: np.ndarray, xyz: np.ndarray, track: np.ndarray, **kwargs) -> np.ndarray:
+    """``track_flags`` of every track (e.g. Id * points + point) of a session.
+
+    Rows of a track are taken in log order, which is their time order.
+    """
+    track = np.asarray(track)
+    flags = np.zeros(len(track), dtype=np.uint8)
+    for value in np.unique(track):
+        rows = np.flatnonzero(track == value)
+        flags[rows] = track_flags(t[rows], xyz[rows], **kwargs)
+    return flags
+
+# ----------------------------------------------------------------------------
+# Measurement
+
+
+def filtered_trajectory(t: np.ndarray, xyz: np.ndarray, flags: np.ndarray,
+                        hz: float = 1.0) -> Trajectory:
+    """Bucketed trajectory without spike and replayed samples; steps onto a
+    teleport have length 0.
+
+    The stream is bucketed first and the flagged buckets are handled
+    afterwards, so the remaining buckets hold the same samples as the
+    unfiltered trajectory and the filtered distance never exceeds the raw
+    one (dropping a vertex cannot lengthen a path).
+    """
+    flags = np.asarray(flags)
+    original = (flags & REPLAY) == 0
+    t = np.asarray(t, dtype=np.float64)[original]
+    xyz = np.asarray(xyz, dtype=np.float64).reshape(-1, 3)[original]
+    flags = flags[original]
+    keys, first = first_per_bucket(t, hz)
+
+    # A teleport on a bucket's first sample happens on the step into that
+    # bucket; a later one only shows up on the step into the next bucket
+    bucket = np.searchsorted(keys, bucket_keys(t, hz))
+    jumps = np.flatnonzero(flags & TELEPORT)
+    jump_into = bucket[jumps] + (jumps != first[bucket[jumps]])
+    teleport = np.zeros(len(keys) + 1, dtype=bool)
+    teleport[jump_into] = True
+
+    keep = (flags[first] & SPIKE) == 0
+    pts = xyz[first][keep]
+    traj = measure_trajectory(keys[keep], pts)
+    segments = traj.segments.copy()
+    segments[teleport[:len(keys)][keep][1:]] = 0.0
+    return Trajectory(traj.t, traj.xyz, segments)
+
+
+def flag_counts(flags: np.ndarray) -> Tuple[int, int]:
+    """(spikes, teleports) among *flags*."""
+    flags = np.asarray(flags)
+    return int(np.count_nonzero(flags & SPIKE)), int(np.count_nonzero(flags & TELEPORT))
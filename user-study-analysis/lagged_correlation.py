@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""lagged_correlation.py
+
+Lagged cross-correlation of the two partners' speed series and
+leader-follower detection per run.
+
+For every run the tracks of the partners' two moving heads
+(``dyad_tracks.moving_heads``) are bucketed at ``hz``, turned into speed
+series and resampled onto a shared clock. The address streams would not
+do: they interleave all three heads, so their speeds mix the partners.
+The normalised cross-correlation over lags in ``[-max_lag, +max_lag]`` is
+computed with one FFT, i.e. O(n log n) per run instead of O(n · lags).
+
+Which head is P1 is not recorded in the logs, so the heads are called A
+(lower tracked point index) and B. Sign convention: a positive lag k means
+B's speed follows A's by k seconds, so A leads; a negative lag means B
+leads. The same is done on sliding windows to count how often the lead
+switches within a run.
+
+Usage:
+```
+python lagged_correlation.py [--hz 1] [--max-lag 10] [--window 60] [--step 30]
+```
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dyad_tracks import ASOF_TOLERANCE, moving_heads
+from trajectory import resample_asof, shared_clock
+
+DEFAULT_HZ = 1.0
+MAX_LAG_S = 10.0   # largest lead/lag considered (s)
+WINDOW_S = 60.0    # sliding window for leader switches (s)
+STEP_S = 30.0      # sliding window step (s)
+MIN_PEAK_CORR = 0.1  # weaker peaks count as 'Balanced'
+
+# ----------------------------------------------------------------------------
+# Cross-correlation
+
+
+def xcorr_fft(a: np.ndarray, b: np.ndarray, max_lag: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalised cross-correlation r(k) = corr(a[t], b[t + k]) for |k| <= max_lag.
+
+    Both series are z-scored once; every lag is normalised by its overlap
+    length. Returns (lags, r).
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    n = len(a)
+    max_lag = int(min(max_lag, n - 1)) if n else 0
+    lags = np.arange(-max_lag, max_lag + 1)
+    if n < 2 or a.std() == 0 or b.std() == 0:
+        return lags, np.zeros(len(lags))
+
+    za = (a - a.mean()) / a.std()
+    zb = (b - b.mean()) / b.std()
+    nfft = 1 << int(np.ceil(np.log2(2 * n - 1)))
+    cc = np.fft.irfft(np.conj(np.fft.rfft(za, nfft)) * np.fft.rfft(zb, nfft), nfft)
+    # cc[k] = Σ za[t]·zb[t+k]; negative lags wrap around to the end
+    raw = np.concatenate((cc[nfft - max_lag:], cc[:max_lag + 1])) if max_lag else cc[:1]
+    return lags, raw / (n - np.abs(lags))
+
+
+def peak_lag(lags: np.ndarray, r: np.ndarray) -> Tuple[int, float]:
+    """Lag with the highest correlation (the smallest |lag| wins ties)."""
+    if not len(r):
+        return 0, 0.0
+    best = np.flatnonzero(r == r.max())
+    i = best[np.argmin(np.abs(lags[best]))]
+    return int(lags[i]), float(r[i])
+
+
+def leader_from_lag(lag: float, corr: float, min_corr: float = MIN_PEAK_CORR) -> str:
+    if corr < min_corr or lag == 0:
+        return 'Balanced'
+    return 'A' if lag > 0 else 'B'
+
+
+def windowed_leaders(a: np.ndarray, b: np.ndarray, max_lag: int, window: int, step: int,
+                     min_corr: float = MIN_PEAK_CORR) -> List[Dict]:
+    """Peak lag, correlation and leader of every sliding window (in samples)."""
+    windows = []
+    for start in range(0, max(len(a) - window, 0) + 1, step):
+        wa, wb = a[start:start + window], b[start:start + window]
+        if len(wa) < window:
+            break
+        lag, corr = peak_lag(*xcorr_fft(wa, wb, max_lag))
+        windows.append({'start': start, 'lag': lag, 'corr': corr,
+                        'leader': leader_from_lag(lag, corr, min_corr)})
+    return windows
+
+
+def leader_switches(leaders: List[str]) -> int:
+    """Number of A <-> B changes, ignoring 'Balanced' windows in between."""
+    decided = [leader for leader in leaders if leader != 'Balanced']
+    return sum(1 for prev, cur in zip(decided, decided[1:]) if prev != cur)
+
+# ----------------------------------------------------------------------------
+# Speed series
+
+
+def partner_speed_series(log_path: Path, hz: float = DEFAULT_HZ,
+                         tolerance: float = ASOF_TOLERANCE) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Speeds of heads A and B on a shared *hz* clock (after the last wipe)."""
+    heads = moving_heads(log_path, hz)
+    if heads is None:
+        return None
+    trajectories = [traj for traj, _ in heads[1:]]
+    if min(traj.sample_count for traj in trajectories) < 2:
+        return None
+    # Speed of each step, stamped at the end of the step
+    series = [(traj.t[1:], traj.speed()) for traj in trajectories]
+
+    clock = shared_clock(series[0][0], series[1][0], hz)
+    s1, ok1 = resample_asof(*series[0], clock, tolerance)
+    s2, ok2 = resample_asof(*series[1], clock, tolerance)
+    valid = ok1 & ok2
+    return clock[valid], s1[valid], s2[valid]
+
+
+def analyze_run(log_path: Path, hz: float = DEFAULT_HZ, max_lag_s: float = MAX_LAG_S,
+                window_s: float = WINDOW_S, step_s: float = STEP_S) -> Optional[Dict]:
+    """Whole-run peak lag/correlation plus windowed leader switches."""
+    speeds = partner_speed_series(log_path, hz)
+    if speeds is None or len(speeds[0]) < 10:
+        return None
+    _, s1, s2 = speeds
+
+    max_lag = int(round(max_lag_s * hz))
+    lag, corr = peak_lag(*xcorr_fft(s1, s2, max_lag))
+    windows = windowed_leaders(s1, s2, max_lag, int(round(window_s * hz)), max(1, int(round(step_s * hz))))
+    leaders = [w['leader'] for w in windows]
+    return {
+        'samples': len(s1),
+        'peak_lag_s': lag / hz,
+        'abs_lag_s': abs(lag) / hz,
+        'peak_corr': corr,
+        'lag_leader': leader_from_lag(lag, corr),
+        'windows': len(windows),
+        'a_leading_windows': leaders.count('A'),
+        'b_leading_windows': leaders.count('B'),
+        'leader_switches': leader_switches(leaders),
+    }
+
+
+def analyze_corpus(results_csv: Path = Path('study-run-results.csv'),
+                   log_dir: Path = Path('session_logs/processed_logs'), **kwargs) -> pd.DataFrame:
+    """``analyze_run`` for every run listed in study-run-results.csv (keyed by 'Run #').
+
+    Runs without a log or with too short a speed series are reported and
+    get no row; errors reading a log propagate.
+    """
+    runs = pd.read_csv(results_csv, encoding='utf-8-sig')
+    rows, skipped = [], []
+    for _, run in runs.iterrows():
+        log_path = Path(log_dir) / f"run_{int(run['Run #'])}_processed.txt"
+        result = analyze_run(log_path, **kwargs) if log_path.exists() else None
+        if result is None:
+            skipped.append(int(run['Run #']))
+            continue
+        rows.append({'Run #': int(run['Run #']), 'Variant': run['Variant'], **result})
+    if skipped:
+        print(f"Skipped runs (no log or too few samples): {skipped}")
+    return pd.DataFrame(rows)
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = sys.argv[1:]
+
+    def option(name, default):
+        return float(args[args.index(name) + 1]) if name in args else default
+
+    df = analyze_corpus(hz=option('--hz', DEFAULT_HZ), max_lag_s=option('--max-lag', MAX_LAG_S),
+                        window_s=option('--window', WINDOW_S), step_s=option('--step', STEP_S))
+    if df.empty:
+        print("No runs could be analysed")
+        return
+
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print("\nBy variant:")
+    print(df.groupby('Variant')[['abs_lag_s', 'peak_corr', 'leader_switches']].mean().round(3))
+    print("\nLag-based leader (head A/B) by variant:")
+    print(df.groupby(['Variant', 'lag_leader']).size().unstack(fill_value=0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""live_follow.py
+
+Follow a game log while ``NetworkedLogger`` is still writing it and print a
+rolling snapshot of the session metrics once per second.
+
+Every new line is folded into running totals in constant time:
+
+- path length, average height and sample count per participant, using the
+  same first-sample-per-second bucketing as ``distance-analysis.py``,
+- crouch time and crouch episodes per tracked head, from the first sample
+  of each bucket over all clients (``posture.HeightProfile``; which head a
+  participant wears is not recorded, so crouching is not per participant),
+- spawned objects per Grid type (``Spawned GridPlank at ...``),
+- ``[FishOwnershipManager]`` ownership events per logging address and kind.
+
+A bulk wipe ('All instances of ... have been removed') resets the totals,
+just like the offline scripts only count what follows the last wipe. If the
+log is truncated or replaced, following restarts from its beginning.
+
+Usage:
+```
+python live_follow.py path/to/game_log_2025-03-20-10-35-30.txt [--from-end] [--json]
+```
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from posture import HeightProfile
+from session_log_parser import PointNumbering, SessionAccumulator, epoch_seconds, parse_line
+
+SPAWN_RE = re.compile(r"^Spawned (Grid\w+) at ")
+OWNERSHIP_EVENTS = {
+    "Requesting ownership": "requested",
+    "Released ownership": "released",
+    "Already owner of": "already_owner",
+    "Cannot release ownership": "not_owner",
+}
+
+SNAPSHOT_INTERVAL = 1.0  # seconds between published snapshots
+POLL_INTERVAL = 0.2      # seconds to sleep when no new data is available
+
+# ----------------------------------------------------------------------------
+# Running metrics
+
+
+class LiveMetrics(SessionAccumulator):
+    """O(1)-per-line running totals of a session that is still being logged.
+
+    Unlike ``SessionMetrics`` the buckets are never revisited: a sample is
+    only used if it opens a bucket later than the participant's last one,
+    which is the case for a log that is written in time order.
+    """
+
+    def __init__(self, ignore_participants: List[str] = ["Host", "192.168.1.100"]):
+        self.ignore_participants = ignore_participants
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.lines = 0
+        self.last_bucket: Dict[str, int] = {}  # participant_id → last bucket
+        self.last_pos: Dict[str, tuple] = {}   # participant_id → its first sample
+        self.distance = defaultdict(float)
+        self.sample_count = defaultdict(int)
+        self.heights: Dict[str, HeightProfile] = {}  # participant_id → posture profile
+        self.head_buckets: Dict[int, int] = {}  # point → last bucket
+        self.head_heights = defaultdict(HeightProfile)  # point → posture profile over all clients
+        self.spawned = Counter()              # Grid type → count
+        self.ownership = defaultdict(Counter)  # address → kind → count
+
+    def add(self, record) -> None:
+        self.lines += 1
+        super().add(record)
+
+    def add_position(self, record) -> None:
+        bucket = epoch_seconds(record.timestamp)
+        if bucket > self.head_buckets.get(record.point, -math.inf):
+            self.head_buckets[record.point] = bucket
+            self.head_heights[record.point].add(record.y, bucket)
+        participant_id = record.address
+        if participant_id in self.ignore_participants:
+            return
+        if participant_id not in self.heights:
+            self.heights[participant_id] = HeightProfile(crouch=False)
+        self.heights[participant_id].add(record.y, bucket)
+
+        last = self.last_bucket.get(participant_id)
+        if last is not None and bucket <= last:
+            return
+        pos = record.pos
+        if last is not None:
+            prev = self.last_pos[participant_id]
+            self.distance[participant_id] += math.sqrt(
+                (pos[0] - prev[0]) ** 2 + (pos[1] - prev[1]) ** 2 + (pos[2] - prev[2]) ** 2
+            )
+        self.last_bucket[participant_id] = bucket
+        self.last_pos[participant_id] = pos
+        self.sample_count[participant_id] += 1
+
+    def add_event(self, record) -> None:
+        payload = record.payload
+        m = SPAWN_RE.match(payload)
+        if m:
+            self.spawned[m.group(1)] += 1
+            return
+        if record.source != "FishOwnershipManager":
+            return
+        for marker, kind in OWNERSHIP_EVENTS.items():
+            if marker in payload:
+                self.ownership[record.address][kind] += 1
+                break
+
+    def snapshot(self) -> Dict:
+        """Current totals as a plain dict (safe to serialise)."""
+        duration = (
+            (self.end_time - self.start_time).total_seconds()
+            if self.start_time and self.end_time else 0.0
+        )
+        participants = {}
+        for participant_id, profile in self.heights.items():
+            participants[participant_id] = {
+                'distance': self.distance[participant_id],
+                'avg_height': profile.mean,
+                'sample_count': self.sample_count[participant_id],
+            }
+        heads = {
+            point: {
+                'avg_height': profile.mean,
+                'crouch_time': profile.crouch_time,
+                'crouch_events': profile.crouch_events,
+            }
+            for point, profile in sorted(self.head_heights.items())
+        }
+        return {
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'duration': duration,
+            'lines': self.lines,
+            'participants': participants,
+            'heads': heads,
+            'spawned': dict(self.spawned),
+            'spawned_total': sum(self.spawned.values()),
+            'ownership': {address: dict(kinds) for address, kinds in self.ownership.items()},
+        }
+
+# ----------------------------------------------------------------------------
+# Tail follower
+
+
+def follow(log_path: Path, metrics: LiveMetrics, publish: Callable[[Dict], None],
+           from_end: bool = False, interval: float = SNAPSHOT_INTERVAL,
+           poll: float = POLL_INTERVAL, stop: Optional[Callable[[], bool]] = None) -> LiveMetrics:
+    """Tail *log_path*, feeding complete lines into *metrics*.
+
+    *publish* receives ``metrics.snapshot()`` every *interval* seconds. Only
+    the bytes appended since the last read are parsed; a partially written
+    last line is held back until its newline arrives. The file is read in
+    binary mode, so the read position is a true byte offset: a log that
+    shrinks below it (truncated) or whose inode changes (replaced, even by
+    a larger file) is followed again from its beginning.
+    """
+    numbering = PointNumbering()
+    pending = b""
+    f = open(log_path, "rb")
+    inode = os.fstat(f.fileno()).st_ino
+    offset = f.seek(0, 2) if from_end else 0
+    next_publish = time.monotonic() + interval
+    try:
+        while stop is None or not stop():
+            chunk = f.read()
+            if chunk:
+                offset += len(chunk)
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    record = parse_line(line.decode("utf-8", errors="ignore"), numbering)
+                    if record is None:
+                        continue
+                    if record.is_wipe:
+                        metrics.reset()
+                    else:
+                        metrics.add(record)
+            else:
+                try:
+                    stat = os.stat(log_path)
+                except FileNotFoundError:
+                    stat = None  # being replaced; look again after the next poll
+                if stat is not None and (stat.st_ino != inode or stat.st_size < offset):
+                    # Log was truncated or replaced: start over
+                    f.close()
+                    f = open(log_path, "rb")
+                    inode = os.fstat(f.fileno()).st_ino
+                    offset = 0
+                    numbering = PointNumbering()
+                    pending = b""
+                    metrics.reset()
+                    continue
+                time.sleep(poll)
+
+            now = time.monotonic()
+            if now >= next_publish:
+                publish(metrics.snapshot())
+                next_publish = now + interval
+    finally:
+        f.close()
+    return metrics
+
+
+def print_snapshot(snapshot: Dict) -> None:
+    print(f"\n[{snapshot['end_time'] or '-'}] {snapshot['duration']:7.1f} s, "
+          f"{snapshot['lines']} lines, {snapshot['spawned_total']} spawned")
+    for participant_id, metrics in sorted(snapshot['participants'].items()):
+        print(f"  {participant_id:15} | {metrics['distance']:8.2f} m | {metrics['avg_height']:5.2f} m | "
+              f"{metrics['sample_count']:6d}")
+    for point, head in snapshot['heads'].items():
+        print(f"  {f'head {point}':15} |            | {head['avg_height']:5.2f} m | crouched {head['crouch_events']}x, "
+              f"{head['crouch_time']:.0f} s")
+    for address, owned in sorted(snapshot['ownership'].items()):
+        print(f"  {address:15} | ownership " + ", ".join(f"{k} {v}" for k, v in sorted(owned.items())))
+    if snapshot['spawned']:
+        print("  " + ", ".join(f"{k} ×{v}" for k, v in sorted(snapshot['spawned'].items())))
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print("Usage: python live_follow.py <game_log.txt> [--from-end] [--json]", file=sys.stderr)
+        return
+    log_path = Path(args[0])
+    if not log_path.exists():
+        print(f"Error: {log_path} not found", file=sys.stderr)
+        return
+
+    if "--json" in sys.argv[1:]:
+        publish = lambda snapshot: print(json.dumps(snapshot), flush=True)
+    else:
+        publish = print_snapshot
+
+    try:
+        follow(log_path, LiveMetrics(), publish, from_end="--from-end" in sys.argv[1:])
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
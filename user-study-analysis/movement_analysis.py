@@ -9,6 +9,8 @@ from matplotlib.patches import Rectangle
 import warnings
 warnings.filterwarnings('ignore')
 
+from movement_segmentation import PHASES, analyze_corpus as segment_movement
+
 # Set consistent style
 plt.style.use('default')
 plt.rcParams['font.size'] = 10
@@ -234,4 +236,20 @@ print(f"Total movement: {eta_squared_total:.3f}")
 print(f"\n\nCONCLUSION:")
 print(f"The apparent variant effect on movement (p={p_value_total:.3f}) disappears when controlling")
 print(f"for session duration. Movement efficiency shows no significant differences (p={p_value_eff:.3f}).")
-print(f"Movement patterns are primarily driven by session length, not collaboration mode.") 
\ No newline at end of file
+print(f"Movement patterns are primarily driven by session length, not collaboration mode.")
+
+# Movement phases: time-in-phase per run instead of the single efficiency scalar
+print("\n" + "="*60)
+print("MOVEMENT PHASES (STATIONARY / LOCOMOTION / HAND-ACTIVE)")
+print("="*60)
+
+_, phase_summary = segment_movement()
+if not phase_summary.empty:
+    shares = [f"{phase.replace('-', '_')}_share" for phase in PHASES]
+    run_shares = phase_summary.groupby(['Run #', 'Variant'])[shares].mean().reset_index()
+    print("\nShare of tracked time, mean over both partners:")
+    print(run_shares.groupby('Variant')[shares].mean().round(3).to_string())
+    for column in shares:
+        groups = [run_shares[run_shares['Variant'] == v][column].values for v in variants]
+        f_stat, p_value = stats.f_oneway(*groups)
+        print(f"{column} by variant: F({len(variants)-1},{len(run_shares)-len(variants)}) = {f_stat:.3f}, p = {p_value:.3f}")
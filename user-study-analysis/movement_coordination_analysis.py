@@ -9,6 +9,8 @@ from scipy.stats import pearsonr
 import warnings
 warnings.filterwarnings('ignore')
 
+from lagged_correlation import MAX_LAG_S, analyze_corpus
+
 # Set consistent style
 plt.style.use('default')
 plt.rcParams['font.size'] = 10
@@ -114,6 +116,19 @@ leader_patterns = df.groupby(['Variant', 'movement_leader']).size().unstack(fill
 print(f"\nLeadership Patterns by Variant:")
 print(leader_patterns)
 
+# Who follows whom in time: FFT cross-correlation of the partners' speed series
+print(f"\n4b. LAGGED SPEED CROSS-CORRELATION (lags up to ±{MAX_LAG_S:g} s):")
+print("-" * 50)
+lag_df = analyze_corpus()
+if len(lag_df) > 0:
+    df = df.merge(lag_df.drop(columns='Variant'), on='Run #', how='left')
+    # The speed series are head tracks, which cannot be matched to P1/P2,
+    # so only the size of the lead is compared, not its direction
+    print("|Peak lag|, peak correlation and leader switches by Variant:")
+    print(df.groupby('Variant')[['abs_lag_s', 'peak_corr', 'leader_switches']].mean().round(3))
+    print(f"\nRuns with a lag-based leader (head A/B) by Variant:")
+    print(df.groupby(['Variant', 'lag_leader']).size().unstack(fill_value=0))
+
 # 5. COORDINATION CONSISTENCY ACROSS SESSIONS
 print(f"\n5. COORDINATION CONSISTENCY ACROSS SESSIONS:")
 print("-" * 50)
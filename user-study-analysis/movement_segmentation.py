@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""movement_segmentation.py
+
+Segments every tick of each partner into movement phases:
+
+    stationary     head (nearly) still, no block placed nearby
+    locomotion     head moving across the floor
+    hand-active    head still while the partner places a block
+
+Locomotion uses the floor-plane head speed with hysteresis: a partner
+starts walking above ``WALK_ENTER`` m/s and stops only below
+``WALK_EXIT`` m/s. The logs carry no hand tracking, so hand activity is
+taken from the block snaps (``BlockPhysicsController ... Smooth snap``):
+each snap is attributed to the nearer partner if it lies within ``REACH_M``
+of their head on the floor plane, and that partner's ticks within
+``HAND_WINDOW_S`` of the snap count as hand-active unless they are walking.
+
+The partners' heads come from ``dyad_tracks.stack_heads``, so the whole
+corpus is classified in one vectorised pass and phases are reported per
+head (A / B; the logs do not record which head is P1). Every run yields a
+run-length-encoded phase table and time-in-phase metrics.
+
+Usage:
+```
+python movement_segmentation.py [--hz 1] [--phases phases.csv] [--output phase_summary.csv]
+```
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dyad_tracks import stack_heads
+from event_store import load_event_store
+
+DEFAULT_HZ = 1.0
+PHASES = ('stationary', 'locomotion', 'hand-active')
+STATIONARY, LOCOMOTION, HAND_ACTIVE = range(len(PHASES))
+
+WALK_ENTER = 0.4      # m/s floor-plane head speed to start walking
+WALK_EXIT = 0.2       # m/s to stop walking again
+REACH_M = 1.2         # floor-plane distance head -> snapped block (m)
+HAND_WINDOW_S = 2.0   # seconds around a snap counted as hand-active
+RUN_SPACING = 1e7     # seconds between runs on the stacked clock (> any run length)
+
+SNAP_RE = re.compile(r'Smooth snap: \(([-\d.]+), ([-\d.]+), ([-\d.]+)\)')
+
+# ----------------------------------------------------------------------------
+# Classification
+
+
+def floor_speed(t: np.ndarray, xyz: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Floor-plane speed reaching every tick (0 at the first tick of each run)."""
+    speed = np.zeros(len(t))
+    if len(t) < 2:
+        return speed
+    step = np.hypot(np.diff(xyz[:, 0]), np.diff(xyz[:, 2]))
+    speed[1:] = step / np.maximum(np.diff(t), 1e-9)
+    speed[offsets[:-1]] = 0.0
+    return speed
+
+
+def hysteresis(values: np.ndarray, enter: float, exit: float, offsets: np.ndarray) -> np.ndarray:
+    """Boolean state that switches on above *enter* and off below *exit*.
+
+    In between the previous state is held (a forward fill of the last
+    decisive tick); every run in *offsets* starts switched off.
+    """
+    on = values > enter
+    decisive = on | (values < exit)
+    decisive[offsets[:-1]] = True
+    last = np.maximum.accumulate(np.where(decisive, np.arange(len(values)), 0))
+    return on[last]
+
+
+def snap_events(run_ids, log_dir: Path = Path('session_logs/processed_logs')) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(run, epoch, position) of every block snap after the last wipe."""
+    runs, times, positions = [], [], []
+    for run_id in run_ids:
+        store = load_event_store(Path(log_dir) / f"run_{run_id}_processed.txt", after_wipe=True)
+        for record, epoch in zip(store.between('BlockPhysicsController', -np.inf, np.inf),
+                                 store.times('BlockPhysicsController')):
+            m = SNAP_RE.search(record.payload)
+            if m:
+                runs.append(run_id)
+                times.append(epoch)
+                positions.append([float(v) for v in m.groups()])
+    return np.array(runs, dtype=np.int64), np.array(times, dtype=np.float64), np.array(positions).reshape(-1, 3)
+
+
+def hand_activity(stacked: Dict, snap_run: np.ndarray, snap_t: np.ndarray, snap_pos: np.ndarray,
+                  reach: float = REACH_M, window: float = HAND_WINDOW_S) -> Tuple[np.ndarray, np.ndarray]:
+    """Ticks within *window* of a snap attributed to head A / head B."""
+    n = len(stacked['t'])
+    marks = {'a': np.zeros(n + 1, dtype=np.int64), 'b': np.zeros(n + 1, dtype=np.int64)}
+    run_index = {run: i for i, run in enumerate(stacked['runs'])}
+    keep = np.array([run in run_index for run in snap_run.tolist()], dtype=bool)
+    if not keep.any():
+        return np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+    snap_t, snap_pos = snap_t[keep], snap_pos[keep]
+    idx = np.array([run_index[run] for run in snap_run[keep].tolist()])
+    lo_run, hi_run = stacked['offsets'][idx], stacked['offsets'][idx + 1]
+
+    # The stacked clock is sorted within each run only; offsetting every run
+    # by its index makes it globally sorted, so one searchsorted serves all
+    offsets = stacked['offsets']
+    run_of_row = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    run_start = stacked['t'][offsets[:-1]]
+    clock = run_of_row * RUN_SPACING + (stacked['t'] - run_start[run_of_row])
+    snap_clock = idx * RUN_SPACING + (snap_t - run_start[idx])
+
+    # Head positions at the snap: the tick at or just before it, within the run
+    at = np.clip(np.searchsorted(clock, snap_clock, 'right') - 1, lo_run, hi_run - 1)
+    dist_a = np.hypot(*(stacked['a'][at] - snap_pos)[:, [0, 2]].T)
+    dist_b = np.hypot(*(stacked['b'][at] - snap_pos)[:, [0, 2]].T)
+    nearer_a = dist_a <= dist_b
+    within = np.minimum(dist_a, dist_b) <= reach
+
+    # Window [snap - w, snap + w] as +1/-1 marks, resolved by one cumsum
+    start = np.clip(np.searchsorted(clock, snap_clock - window, 'left'), lo_run, hi_run)
+    stop = np.clip(np.searchsorted(clock, snap_clock + window, 'right'), lo_run, hi_run)
+    for head, mask in (('a', within & nearer_a), ('b', within & ~nearer_a)):
+        np.add.at(marks[head], start[mask], 1)
+        np.add.at(marks[head], stop[mask], -1)
+    return np.cumsum(marks['a'])[:n] > 0, np.cumsum(marks['b'])[:n] > 0
+
+
+def classify(stacked: Dict, hand_a: np.ndarray, hand_b: np.ndarray) -> Dict[str, np.ndarray]:
+    """Phase code (index into ``PHASES``) of every tick, per head."""
+    offsets = stacked['offsets']
+    phases = {}
+    for head, hand in (('a', hand_a), ('b', hand_b)):
+        speed = floor_speed(stacked['t'], stacked[head], offsets)
+        walking = hysteresis(speed, WALK_ENTER, WALK_EXIT, offsets)
+        phase = np.full(len(speed), STATIONARY, dtype=np.int8)
+        phase[hand] = HAND_ACTIVE
+        phase[walking] = LOCOMOTION
+        phases[head] = phase
+    return phases
+
+# ----------------------------------------------------------------------------
+# Phase tables
+
+
+def run_length_encode(values: np.ndarray, breaks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start index and length of every run of equal *values*; a new run also
+    starts wherever *breaks* is True."""
+    if not len(values):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    change = np.concatenate(([True], values[1:] != values[:-1])) | breaks
+    starts = np.flatnonzero(change)
+    return starts, np.diff(np.append(starts, len(values)))
+
+
+def phase_table(stacked: Dict, phases: Dict[str, np.ndarray], hz: float = DEFAULT_HZ) -> pd.DataFrame:
+    """One row per phase bout: run, head, phase, start, end and duration (s)."""
+    offsets = stacked['offsets']
+    t = stacked['t']
+    breaks = np.zeros(len(t), dtype=bool)
+    breaks[offsets[:-1]] = True
+    if len(t) > 1:
+        breaks[1:] |= np.diff(t) > 1.5 / hz
+
+    run_of_row = np.repeat(np.array(stacked['runs'], dtype=np.int64), np.diff(offsets))
+    tables = []
+    for head, phase in phases.items():
+        starts, lengths = run_length_encode(phase, breaks)
+        tables.append(pd.DataFrame({
+            'Run #': run_of_row[starts],
+            'head': head.upper(),
+            'phase': np.array(PHASES)[phase[starts]],
+            'start': t[starts],
+            'end': t[starts + lengths - 1] + 1 / hz,
+            'duration': lengths / hz,
+        }))
+    return pd.concat(tables, ignore_index=True).sort_values(['Run #', 'head', 'start'], kind='stable')
+
+
+def phase_summary(table: pd.DataFrame) -> pd.DataFrame:
+    """Time, share, bout count and mean bout length per phase, per run and head."""
+    grouped = table.groupby(['Run #', 'head', 'phase'])['duration']
+    stats = pd.DataFrame({'time': grouped.sum(), 'bouts': grouped.size(), 'mean_bout': grouped.mean()})
+    stats['share'] = stats['time'] / stats.groupby(level=['Run #', 'head'])['time'].transform('sum')
+    wide = stats.unstack('phase').fillna(0)
+    wide.columns = [f"{phase.replace('-', '_')}_{metric}" for metric, phase in wide.columns]
+    return wide.reset_index()
+
+
+def analyze_corpus(results_csv: Path = Path('study-run-results.csv'),
+                   log_dir: Path = Path('session_logs/processed_logs'),
+                   hz: float = DEFAULT_HZ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Phase table and per-run/head summary of every run in study-run-results.csv."""
+    runs = pd.read_csv(results_csv, encoding='utf-8-sig')
+    stacked = stack_heads(runs['Run #'], log_dir, hz)
+    if stacked['skipped']:
+        print(f"Skipped runs (no log or fewer than two heads): {stacked['skipped']}")
+    hand_a, hand_b = hand_activity(stacked, *snap_events(stacked['runs'], log_dir))
+    table = phase_table(stacked, classify(stacked, hand_a, hand_b), hz)
+    summary = runs[['Run #', 'Variant']].merge(phase_summary(table), on='Run #')
+    return table, summary
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = sys.argv[1:]
+
+    def option(name, default):
+        return args[args.index(name) + 1] if name in args else default
+
+    table, summary = analyze_corpus(hz=float(option('--hz', DEFAULT_HZ)))
+    if summary.empty:
+        print("No runs could be analysed")
+        return
+
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print("\nShare of time per phase by variant:")
+    shares = [f"{phase.replace('-', '_')}_share" for phase in PHASES]
+    print(summary.groupby('Variant')[shares].mean().round(3).to_string())
+
+    for name, df in (('--phases', table), ('--output', summary)):
+        path = option(name, None)
+        if path is not None:
+            df.to_csv(path, index=False)
+            print(f"Saved {len(df)} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
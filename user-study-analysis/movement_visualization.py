@@ -15,49 +15,49 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.stats import pearsonr
 import os
-import re
-from datetime import datetime
 import warnings
+from pathlib import Path
 warnings.filterwarnings('ignore')
 
+from dyad_tracks import head_tracks, moving_points
+from session_log_parser import from_epoch
+from trajectory_pyramid import log_pyramids, track_level
+
 def parse_position_log_for_visualization(filepath, max_points=1000):
-    """Parse a processed log file to extract position data for visualization"""
-    positions = {'user_0': [], 'user_2': []}
+    """Parse a processed log file to extract position data for visualization
+
+    Returns the two moving heads as logged by one client, keyed 'head_a' and
+    'head_b' (lower tracked point first; which participant wears which head
+    is not known), plus their point indices under 'points'. Each head is
+    decimated to exactly ``min(n, max_points)`` samples with the
+    shape-preserving RDP ranking of ``trajectory_pyramid``; 'elapsed' is the
+    time since the first sample of either head, so both share one clock.
+    """
+    positions = {'head_a': [], 'head_b': []}
     
     try:
-        with open(filepath, 'r') as f:
-            lines = f.readlines()
-            
-        # Sample lines to avoid overwhelming visualizations
-        step = max(1, len(lines) // max_points)
+        path = Path(filepath)
+        points = moving_points(head_tracks(path))
+        if len(points) < 2:
+            return None
+        pyramids = log_pyramids(path)
         
-        for i, line in enumerate(lines[::step]):
-            if '[PositionLogger]' in line:
-                # Extract user ID
-                if 'Id [0]' in line:
-                    user_id = 'user_0'
-                elif 'Id [2]' in line:
-                    user_id = 'user_2'
-                else:
-                    continue
-                
-                # Extract position data
-                pos_match = re.search(r'P: \(([-\d.]+), ([-\d.]+), ([-\d.]+)\)', line)
-                if pos_match:
-                    x, y, z = map(float, pos_match.groups())
-                    
-                    # Extract timestamp
-                    timestamp_str = line.split(' - ')[0]
-                    try:
-                        timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                    except:
-                        continue
-                    
-                    positions[user_id].append({
-                        'timestamp': timestamp, 
-                        'x': x, 'y': y, 'z': z,
-                        'time_idx': i
-                    })
+        # One client's view of both heads, so both tracks come from the same stream
+        client_id = next((c for c in pyramids.tracks.groups()
+                          if all((c, point) in pyramids.tracks for point in points)), None)
+        if client_id is None:
+            return None
+        
+        heads = [track_level(pyramids, (client_id, point), max_points) for point in points]
+        t0 = min(t[0] for t, _ in heads)
+        for head_id, (t, xyz) in zip(('head_a', 'head_b'), heads):
+            for ti, (x, y, z) in zip(t, xyz):
+                positions[head_id].append({
+                    'timestamp': from_epoch(int(ti)), 
+                    'x': x, 'y': y, 'z': z,
+                    'elapsed': ti - t0
+                })
+        positions['points'] = points
     
     except Exception as e:
         print(f"Error processing {filepath}: {e}")
@@ -102,19 +102,16 @@ def create_movement_pattern_visualizations():
             
         # Parse position data
         positions = parse_position_log_for_visualization(log_file)
-        if not positions or len(positions['user_0']) == 0 or len(positions['user_2']) == 0:
+        if not positions or len(positions['head_a']) == 0 or len(positions['head_b']) == 0:
             continue
         
         # Convert to DataFrames
-        df_0 = pd.DataFrame(positions['user_0'])
-        df_2 = pd.DataFrame(positions['user_2'])
-        
-        # Align by taking minimum length
-        min_len = min(len(df_0), len(df_2))
-        df_0 = df_0.iloc[:min_len].reset_index(drop=True)
-        df_2 = df_2.iloc[:min_len].reset_index(drop=True)
+        df_a = pd.DataFrame(positions['head_a'])
+        df_b = pd.DataFrame(positions['head_b'])
+        label_a = f"Head A (point {positions['points'][0]})"
+        label_b = f"Head B (point {positions['points'][1]})"
         
-        if len(df_0) < 10:
+        if min(len(df_a), len(df_b)) < 10:
             continue
         
         # Get run info
@@ -135,8 +132,8 @@ def create_movement_pattern_visualizations():
             dist_corr = np.nan
         
         # 1. X-Y position plot (bird's eye view)
-        axes[i, 0].scatter(df_0['x'], df_0['z'], alpha=0.6, s=20, label='User 0', c=range(len(df_0)), cmap='Blues')
-        axes[i, 0].scatter(df_2['x'], df_2['z'], alpha=0.6, s=20, label='User 2', c=range(len(df_2)), cmap='Reds')
+        axes[i, 0].scatter(df_a['x'], df_a['z'], alpha=0.6, s=20, label=label_a, c=df_a['elapsed'], cmap='Blues')
+        axes[i, 0].scatter(df_b['x'], df_b['z'], alpha=0.6, s=20, label=label_b, c=df_b['elapsed'], cmap='Reds')
         axes[i, 0].set_xlabel('X Position (m)')
         axes[i, 0].set_ylabel('Z Position (m)')
         axes[i, 0].set_title(f'{example["title"]}\nBird\'s Eye View - {variant}')
@@ -145,32 +142,32 @@ def create_movement_pattern_visualizations():
         axes[i, 0].axis('equal')
         
         # 2. Position over time
-        time_indices = range(len(df_0))
-        axes[i, 1].plot(time_indices, np.sqrt(df_0['x']**2 + df_0['z']**2), 
-                       label=f'User 0 (total: {p1_dist:.1f}m)', alpha=0.7)
-        axes[i, 1].plot(time_indices, np.sqrt(df_2['x']**2 + df_2['z']**2), 
-                       label=f'User 2 (total: {p2_dist:.1f}m)', alpha=0.7)
-        axes[i, 1].set_xlabel('Time Index')
+        axes[i, 1].plot(df_a['elapsed'], np.sqrt(df_a['x']**2 + df_a['z']**2), 
+                       label=label_a, alpha=0.7)
+        axes[i, 1].plot(df_b['elapsed'], np.sqrt(df_b['x']**2 + df_b['z']**2), 
+                       label=label_b, alpha=0.7)
+        axes[i, 1].set_xlabel('Time (s)')
         axes[i, 1].set_ylabel('Distance from Origin (m)')
         axes[i, 1].set_title(f'Position Magnitude Over Time\nMovement Distance Correlation')
-        axes[i, 1].legend()
+        axes[i, 1].legend(loc='lower right')
         axes[i, 1].grid(True, alpha=0.3)
         
         # 3. Movement velocity over time
-        if len(df_0) > 1:
-            vel_0 = np.sqrt(np.diff(df_0['x'])**2 + np.diff(df_0['z'])**2)
-            vel_2 = np.sqrt(np.diff(df_2['x'])**2 + np.diff(df_2['z'])**2)
+        # Decimated samples are unevenly spaced, so steps are divided by their duration
+        if len(df_a) > 1:
+            vel_a = np.sqrt(np.diff(df_a['x'])**2 + np.diff(df_a['z'])**2) / np.maximum(np.diff(df_a['elapsed']), 1.0)
+            vel_b = np.sqrt(np.diff(df_b['x'])**2 + np.diff(df_b['z'])**2) / np.maximum(np.diff(df_b['elapsed']), 1.0)
             
-            axes[i, 2].plot(range(len(vel_0)), vel_0, label='User 0 velocity', alpha=0.7)
-            axes[i, 2].plot(range(len(vel_2)), vel_2, label='User 2 velocity', alpha=0.7)
-            axes[i, 2].set_xlabel('Time Index')
-            axes[i, 2].set_ylabel('Movement Velocity')
+            axes[i, 2].plot(df_a['elapsed'].iloc[1:], vel_a, label=f'{label_a} velocity', alpha=0.7)
+            axes[i, 2].plot(df_b['elapsed'].iloc[1:], vel_b, label=f'{label_b} velocity', alpha=0.7)
+            axes[i, 2].set_xlabel('Time (s)')
+            axes[i, 2].set_ylabel('Movement Velocity (m/s)')
             axes[i, 2].set_title('Movement Patterns Over Time')
             axes[i, 2].legend()
             axes[i, 2].grid(True, alpha=0.3)
         
         # Add correlation info as text
-        axes[i, 1].text(0.02, 0.98, f'Total distances:\nU0: {p1_dist:.1f}m, U2: {p2_dist:.1f}m', 
+        axes[i, 1].text(0.02, 0.98, f'Total distances (study results):\nP1: {p1_dist:.1f}m, P2: {p2_dist:.1f}m', 
                        transform=axes[i, 1].transAxes, verticalalignment='top',
                        bbox=dict(boxstyle="round", facecolor='wheat', alpha=0.8))
     
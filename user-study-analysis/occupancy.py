@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""occupancy.py
+
+Floor-plane occupancy grids for the PositionLogger streams.
+
+An ``OccupancyGrid`` bins positions on the x/z (floor) plane into square
+cells of ``cell_size`` metres over a fixed extent and accumulates the time
+spent in each cell as a float32 array. Samples are added one at a time
+(``add``, O(1) while parsing) or as arrays (``add_many``); grids with the
+same geometry can be summed across participants, sessions and variants.
+
+Grids are stored per session as ``<directory>/session_<id>.npz`` with one
+float32 array per participant plus the grid geometry.
+
+Usage:
+```
+from occupancy import load_session_grids, sum_grids
+
+grids = load_session_grids(Path("occupancy/session_0.npz"))
+total = sum_grids(grids.values())
+plt.imshow(total.counts, extent=total.extent, origin="lower")
+```
+"""
+
+import math
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+CELL_SIZE = 0.25                       # metres
+EXTENT = (-8.0, 8.0, -8.0, 8.0)        # x_min, x_max, z_min, z_max (metres)
+
+# ----------------------------------------------------------------------------
+# Grid
+
+
+class OccupancyGrid:
+    """Dwell time per floor cell; ``counts[row, col]`` is z row, x column."""
+
+    def __init__(self, cell_size: float = CELL_SIZE, extent: Tuple[float, float, float, float] = EXTENT,
+                 counts: Optional[np.ndarray] = None, outside: float = 0.0):
+        self.cell_size = float(cell_size)
+        self.extent = tuple(float(v) for v in extent)
+        x_min, x_max, z_min, z_max = self.extent
+        self.nx = int(round((x_max - x_min) / self.cell_size))
+        self.nz = int(round((z_max - z_min) / self.cell_size))
+        if counts is None:
+            counts = np.zeros((self.nz, self.nx), dtype=np.float32)
+        elif counts.shape != (self.nz, self.nx):
+            raise ValueError(f"counts shape {counts.shape} does not match grid ({self.nz}, {self.nx})")
+        self.counts = counts.astype(np.float32, copy=False)
+        self.outside = float(outside)  # weight of samples beyond the extent
+
+    @property
+    def total(self) -> float:
+        return float(self.counts.sum()) + self.outside
+
+    def add(self, x: float, z: float, weight: float = 1.0) -> None:
+        """Add one sample."""
+        col = math.floor((x - self.extent[0]) / self.cell_size)
+        row = math.floor((z - self.extent[2]) / self.cell_size)
+        if 0 <= col < self.nx and 0 <= row < self.nz:
+            self.counts[row, col] += weight
+        else:
+            self.outside += weight
+
+    def add_many(self, x: np.ndarray, z: np.ndarray, weight: float = 1.0) -> None:
+        """Add arrays of samples in one ``bincount``."""
+        col = np.floor((np.asarray(x, dtype=np.float64) - self.extent[0]) / self.cell_size).astype(np.int64)
+        row = np.floor((np.asarray(z, dtype=np.float64) - self.extent[2]) / self.cell_size).astype(np.int64)
+        inside = (col >= 0) & (col < self.nx) & (row >= 0) & (row < self.nz)
+        flat = np.bincount(row[inside] * self.nx + col[inside], minlength=self.nx * self.nz)
+        self.counts += (flat * weight).reshape(self.nz, self.nx).astype(np.float32)
+        self.outside += float((~inside).sum()) * weight
+
+    def compatible(self, other: "OccupancyGrid") -> bool:
+        return self.cell_size == other.cell_size and self.extent == other.extent
+
+    def __iadd__(self, other: "OccupancyGrid") -> "OccupancyGrid":
+        if not self.compatible(other):
+            raise ValueError("cannot add occupancy grids with different cell size or extent")
+        self.counts += other.counts
+        self.outside += other.outside
+        return self
+
+    def __add__(self, other: "OccupancyGrid") -> "OccupancyGrid":
+        result = self.copy()
+        result += other
+        return result
+
+    def copy(self) -> "OccupancyGrid":
+        return OccupancyGrid(self.cell_size, self.extent, self.counts.copy(), self.outside)
+
+    def normalized(self) -> np.ndarray:
+        """Fraction of the in-extent time spent in each cell."""
+        inside = self.counts.sum()
+        return self.counts / inside if inside else self.counts.copy()
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cell edges along x and z (for ``pcolormesh``)."""
+        x_min, _, z_min, _ = self.extent
+        return (x_min + np.arange(self.nx + 1) * self.cell_size,
+                z_min + np.arange(self.nz + 1) * self.cell_size)
+
+
+def sum_grids(grids: Iterable[OccupancyGrid]) -> OccupancyGrid:
+    """Sum of compatible grids (an empty default grid if there are none)."""
+    total = None
+    for grid in grids:
+        total = grid.copy() if total is None else total + grid
+    return total if total is not None else OccupancyGrid()
+
+# ----------------------------------------------------------------------------
+# Storage
+
+
+def save_session_grids(path: Path, grids: Dict[str, OccupancyGrid]) -> Path:
+    """Write the grids of one session (participant → grid) to an ``.npz``."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    grids = dict(grids)
+    reference = next(iter(grids.values()), OccupancyGrid())
+    np.savez_compressed(
+        path,
+        _geometry=np.array([reference.cell_size, *reference.extent], dtype=np.float64),
+        _participants=np.array(list(grids), dtype=str),
+        _outside=np.array([g.outside for g in grids.values()], dtype=np.float64),
+        **{f"grid_{i}": g.counts for i, g in enumerate(grids.values())},
+    )
+    return path
+
+
+def load_session_grids(path: Path) -> Dict[str, OccupancyGrid]:
+    """Inverse of ``save_session_grids``."""
+    with np.load(path) as data:
+        cell_size, *extent = data["_geometry"].tolist()
+        return {
+            participant: OccupancyGrid(cell_size, extent, data[f"grid_{i}"], outside)
+            for i, (participant, outside) in enumerate(zip(data["_participants"].tolist(), data["_outside"].tolist()))
+        }
+
+
+def sum_by(grids: Dict[Tuple, OccupancyGrid], key) -> Dict:
+    """Sum grids into groups, e.g. ``sum_by(grids, lambda k: variant_of[k[0]])``
+    for ``grids`` keyed by (session, participant)."""
+    groups: Dict = {}
+    for k, grid in grids.items():
+        group = key(k)
+        groups[group] = grid.copy() if group not in groups else groups[group] + grid
+    return groups
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""ownership_analysis.py
+
+Ownership intervals and contention from the ``[FishOwnershipManager]`` lines.
+
+Picking up a block makes the server (Id 0) request ownership for the
+grabbing client; placing it releases ownership back to the server:
+
+    server   [FishOwnershipManager] Requesting ownership for GridPlank_0
+             for Id [2] Address [Host]                  → Host holds it
+    client   [FishOwnershipManager] Trying to release ownership of
+             GridPlank(Clone) back to server
+    server   Giving back to Id [0] Address [...]
+             [FishOwnershipManager] Released ownership of GridPlank_0 back
+             to server                                  → Host's hold ends
+    client   [FishOwnershipManager] Already owner of GridPlank(Clone)
+    client   [FishOwnershipManager] Cannot release ownership. Not the
+             owner of GridPlank(Clone)
+
+Every block of a type is ``GridX_0`` / ``GridX(Clone)`` in these lines, so
+an "object" here is the networked object name, i.e. the block type.
+``OwnershipTracker`` keeps one owner per object: a request while another
+Id holds the object is *contention*; ownership then passes to the
+requester (the previous hold ends as ``taken``). Consecutive holds of an
+object by different Ids count as handoffs. Holds start and end on the
+server's lines only, which are always logged in order. Some processed logs
+replay an earlier stretch of the session after its end (run 4 holds the
+same twelve minutes three times); such replays are skipped
+(``session_log_parser.ReplayFilter``).
+
+``position_store.ingest`` runs the tracker in its single pass over the log
+(resetting it at the wipe like the positions) and caches the intervals as
+``ownership.npy`` (``OWNERSHIP_DTYPE``) plus the line counts in meta.json,
+so the corpus summary needs no log scan.
+
+Usage:
+```
+python ownership_analysis.py [--output ownership_summary.csv]
+```
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from session_log_parser import POSITION_SOURCE, Record, ReplayFilter
+
+END_KINDS = ('open', 'released', 'taken')
+OPEN, RELEASED, TAKEN = range(len(END_KINDS))
+
+REQUEST_RE = re.compile(r'Requesting ownership for (Grid\w+?)_\d+ for Id \[(\d+)\] Address \[([^\]]+)\]')
+RELEASED_RE = re.compile(r'Released ownership of (Grid\w+?)_\d+ back to server')
+ALREADY_RE = re.compile(r'Already owner of (Grid\w+)\(Clone\)')
+NOT_OWNER_RE = re.compile(r'Cannot release ownership\. Not the owner of (Grid\w+)\(Clone\)')
+GIVING_BACK = 'Giving back to Id'
+
+COUNTS = ('requests', 'rerequests', 'already_owner', 'not_owner', 'givebacks')
+
+OWNERSHIP_DTYPE = np.dtype([
+    ('object', 'i1'),        # index into the list of objects
+    ('holder', 'i1'),        # index into the list of holder addresses
+    ('holder_id', 'i1'),     # logging Id of the holder
+    ('start_epoch', '<i8'),
+    ('end_epoch', '<i8'),    # -1 while open
+    ('contested', '?'),      # taken from another Id
+    ('end_kind', 'i1'),      # index into END_KINDS
+])
+
+
+class OwnershipTracker:
+    """Single-pass ownership state machine; feed it every record of a log."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.objects: List[str] = []
+        self.holders: List[str] = []
+        self.rows: List[List] = []           # OWNERSHIP_DTYPE fields
+        self.owner: Dict[str, int] = {}      # object → row of its open hold
+        self.counts: Dict[str, int] = dict.fromkeys(COUNTS, 0)
+        self.replays = ReplayFilter()
+
+    def _code(self, names: List[str], name: str) -> int:
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def _close(self, name: str, epoch: int, kind: int) -> None:
+        row = self.owner.pop(name, None)
+        if row is not None:
+            self.rows[row][4] = epoch
+            self.rows[row][6] = kind
+
+    def add(self, record: Record, epoch: int) -> None:
+        if record.source == POSITION_SOURCE:
+            return
+        payload = record.payload
+        is_ownership = record.source == 'FishOwnershipManager'
+        if not is_ownership and not payload.startswith(GIVING_BACK):
+            return
+        if self.replays.is_replay(epoch):
+            return
+        if not is_ownership:
+            self.counts['givebacks'] += 1
+            return
+
+        m = REQUEST_RE.search(payload)
+        if m:
+            name, holder_id, holder = m.group(1), int(m.group(2)), m.group(3)
+            self.counts['requests'] += 1
+            current = self.owner.get(name)
+            if current is not None and self.holders[self.rows[current][1]] == holder:
+                self.counts['rerequests'] += 1
+                return
+            contested = current is not None
+            self._close(name, epoch, TAKEN)
+            self.owner[name] = len(self.rows)
+            self.rows.append([self._code(self.objects, name), self._code(self.holders, holder),
+                              holder_id, epoch, -1, contested, OPEN])
+            return
+
+        m = RELEASED_RE.search(payload)
+        if m:
+            self._close(m.group(1), epoch, RELEASED)
+            return
+
+        if ALREADY_RE.search(payload):
+            self.counts['already_owner'] += 1
+        elif NOT_OWNER_RE.search(payload):
+            self.counts['not_owner'] += 1
+
+    def table(self) -> np.ndarray:
+        """Holds as an ``OWNERSHIP_DTYPE`` structured array, by start time."""
+        return np.array([tuple(row) for row in self.rows], dtype=OWNERSHIP_DTYPE)
+
+# ----------------------------------------------------------------------------
+# Metrics
+
+
+def handoffs(intervals: np.ndarray) -> int:
+    """Consecutive holds of the same object by different holders."""
+    order = np.lexsort((intervals['start_epoch'], intervals['object']))
+    obj = intervals['object'][order]
+    holder = intervals['holder'][order]
+    return int(np.count_nonzero((obj[1:] == obj[:-1]) & (holder[1:] != holder[:-1])))
+
+
+def run_metrics(intervals: np.ndarray, counts: Dict[str, int],
+                start_epoch: Optional[int], end_epoch: Optional[int]) -> Dict:
+    """Handoffs, hold times and contention of one run."""
+    duration = (end_epoch - start_epoch) if start_epoch is not None else 0
+    end = np.where(intervals['end_epoch'] >= 0, intervals['end_epoch'], end_epoch or 0)
+    held = end - intervals['start_epoch']
+    closed = intervals['end_kind'] != OPEN
+    requests = counts['requests']
+    return {
+        'holds': len(intervals),
+        'handoffs': handoffs(intervals),
+        'mean_hold_s': float(held[closed].mean()) if closed.any() else np.nan,
+        'total_hold_s': float(held.sum()),
+        'contested': int(intervals['contested'].sum()),
+        'contention_rate': intervals['contested'].sum() / requests if requests else np.nan,
+        'requests_per_min': requests / (duration / 60) if duration > 0 else np.nan,
+        **counts,
+    }
+
+
+def load_ownership(log_path: Path) -> Tuple[np.ndarray, Dict[str, int], Optional[int], Optional[int]]:
+    """Cached intervals, line counts and run bounds (after the last wipe)."""
+    from position_store import load_positions  # imports this module to build the table
+
+    cols = load_positions(Path(log_path))
+    return np.asarray(cols.ownership), cols.ownership_counts, cols.start_epoch, cols.end_epoch
+
+
+def analyze_corpus(results_csv: Path = Path('study-run-results.csv'),
+                   log_dir: Path = Path('session_logs/processed_logs')) -> pd.DataFrame:
+    """``run_metrics`` for every run listed in study-run-results.csv (keyed by 'Run #')."""
+    runs = pd.read_csv(results_csv, encoding='utf-8-sig')
+    rows = []
+    for run_id in runs['Run #']:
+        log_path = Path(log_dir) / f"run_{int(run_id)}_processed.txt"
+        if not log_path.exists():
+            continue
+        rows.append({'Run #': int(run_id), **run_metrics(*load_ownership(log_path))})
+    return pd.DataFrame(rows)
+
+
+def join_study_results(results: pd.DataFrame, ownership: Optional[pd.DataFrame] = None,
+                       prefix: str = 'ownership_') -> pd.DataFrame:
+    """*results* (study-run-results.csv) with the ownership metrics added as
+    ``<prefix><column>``; runs without a log get NaN."""
+    if ownership is None:
+        ownership = analyze_corpus()
+    if ownership.empty:
+        return results.copy()
+    ownership = ownership.set_index('Run #').add_prefix(prefix)
+    return results.merge(ownership, left_on='Run #', right_index=True, how='left')
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    output = Path(args[args.index('--output') + 1]) if '--output' in args else None
+
+    df = analyze_corpus()
+    if df.empty:
+        print("No runs could be analysed")
+        return
+
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    joined = join_study_results(pd.read_csv('study-run-results.csv', encoding='utf-8-sig'), df)
+    print("\nBy variant:")
+    columns = ['ownership_handoffs', 'ownership_mean_hold_s', 'ownership_contention_rate',
+               'ownership_requests_per_min']
+    print(joined.groupby('Variant')[columns].mean().round(3).to_string())
+
+    if output is not None:
+        df.to_csv(output, index=False)
+        print(f"\nSaved {len(df)} runs to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,120 +17,138 @@ python participant_analytics.py
 Outputs:
 - Console summary
 - participant_metrics.csv (for analysis)
-- session_data.json (for heatmaps, etc.)
+- trajectories/ (chunked binary trajectories + per-session metrics)
+- occupancy/session_<id>.npz (floor occupancy grids for heatmaps)
 - participant_summary.json (aggregated data)
 """
 
 import json
 import csv
 import math
-import re
+import sys
 from collections import defaultdict
-from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Tuple
 
-# ----------------------------------------------------------------------------
-# Regular expressions (same as distance-analysis.py)
-TS_RE   = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
-POS_RE  = re.compile(
-    r"Address \[(?P<ip>[\d\.]+)\].*?\[PositionLogger\].*?P: \("
-    r"(?P<x>-?\d+\.\d+), (?P<y>-?\d+\.\d+), (?P<z>-?\d+\.\d+)\)"
-)
-WIPE_RE = re.compile(r"All instances of")
+import numpy as np
+
+from batch_runner import run_sessions
+from occupancy import OccupancyGrid, save_session_grids
+from position_store import load_positions
+from session_log_parser import SessionAccumulator, epoch_seconds, stream_session
+from trajectory_store import TrajectoryStore, session_data as stored_session_data, write_trajectories
+from trajectory import compute_trajectory, measure_trajectory, sequential_mean
 
 # ----------------------------------------------------------------------------
 # Helper functions
-def parse_timestamp(line: str) -> Optional[datetime]:
-    """Extract a datetime from the beginning of line or return None."""
-    m = TS_RE.match(line)
-    if not m:
-        return None
-    return datetime.strptime(m.group(1), "%Y-%m-%d %H:%M:%S")
-
-def find_last_wipe_line_number(file_path: Path) -> Optional[int]:
-    """Find the line number of the last 'All instances of' line in the file."""
-    last_wipe_line = None
-    with open(file_path, "r", errors="ignore") as f:
-        for line_num, line in enumerate(f, 1):
-            if WIPE_RE.search(line):
-                last_wipe_line = line_num
-    return last_wipe_line
-
-def euclidean(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
-    return math.sqrt(sum((ai - bi) ** 2 for ai, bi in zip(a, b)))
-
-def bucket_key(ts: datetime, hz: float = 1.0) -> float:
-    """Quantise timestamp to hz bucket."""
+def bucket_key(epoch: float, hz: float = 1.0) -> float:
+    """Quantise epoch seconds to hz bucket."""
     if hz >= 1.0:
-        return ts.replace(microsecond=0).timestamp()
+        return float(math.floor(epoch))
     step = 1 / hz
-    return math.floor(ts.timestamp() / step) * step
+    return math.floor(epoch / step) * step
 
 # ----------------------------------------------------------------------------
 # Core processing functions
 
-def process_session_with_positions(file_path: Path, ignore_ips: List[str] = ["192.168.1.100"], hz: float = 1.0):
-    """Process a session and return both metrics and raw position data."""
-    last_wipe_line = find_last_wipe_line_number(file_path)
-    
-    samples = defaultdict(dict)  # ip → bucket → pos
-    heights = defaultdict(list)  # ip → [y_coordinates] 
-    positions = defaultdict(list)  # ip → [(timestamp, x, y, z)]
-    start_time = None
-    end_time = None
-    
-    with open(file_path, "r", errors="ignore") as f:
-        lines = f.readlines()
-    
-    start_line = last_wipe_line if last_wipe_line is not None else 0
-    
-    for line in lines[start_line:]:
-        ts = parse_timestamp(line)
-        if ts is None:
-            continue
+class SessionPositions(SessionAccumulator):
+    """Reset-able accumulator of per-IP metrics and occupancy grids."""
+
+    def __init__(self, ignore_ips: List[str] = ["192.168.1.100"], hz: float = 1.0):
+        self.ignore_ips = ignore_ips
+        self.hz = hz
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.samples = defaultdict(dict)  # ip → bucket → pos
+        self.height_sum = defaultdict(float)  # ip → Σy
+        self.height_count = defaultdict(int)  # ip → n
+        self.occupancy = defaultdict(OccupancyGrid)  # ip → floor occupancy (s per cell)
+
+    def add_position(self, record) -> None:
+        self.add_sample(record.address, epoch_seconds(record.timestamp), record.pos)
+
+    def add_sample(self, ip: str, epoch: float, pos: Tuple[float, float, float]) -> None:
+        if ip in self.ignore_ips:
+            return
+            
+        # Store bucketed samples for distance calculation
+        b = bucket_key(epoch, self.hz)
+        if b not in self.samples[ip]:
+            self.samples[ip][b] = pos
+            # One bucket sample = 1/hz seconds spent in its floor cell
+            self.occupancy[ip].add(pos[0], pos[2], 1 / self.hz)
             
-        if start_time is None:
-            start_time = ts
-        end_time = ts
+        self.height_sum[ip] += pos[1]
+        self.height_count[ip] += 1
+
+    def results(self) -> Dict[str, Dict]:
+        results = {}
+        start_time, end_time = self.start_time, self.end_time
+        duration = (end_time - start_time).total_seconds() if start_time and end_time else 0.0
         
-        m = POS_RE.search(line)
-        if not m:
-            continue
+        for ip, buckets in self.samples.items():
+            keys = np.fromiter(buckets.keys(), dtype=np.float64, count=len(buckets))
+            order = np.argsort(keys)
+            pts = np.array(list(buckets.values()), dtype=np.float64)
+            traj = measure_trajectory(keys[order], pts[order])
             
-        ip = m.group("ip")
-        if ip in ignore_ips:
-            continue
+            count = self.height_count[ip]
+            avg_height = self.height_sum[ip] / count if count else 0.0
             
-        pos = (float(m.group("x")), float(m.group("y")), float(m.group("z")))
+            results[ip] = {
+                'distance': traj.distance,
+                'duration': duration,
+                'avg_height': avg_height,
+                'sample_count': traj.sample_count,
+                'occupancy': self.occupancy[ip],
+                'trajectory': traj
+            }
         
-        # Store bucketed samples for distance calculation
-        b = bucket_key(ts, hz)
-        if b not in samples[ip]:
-            samples[ip][b] = pos
-            
-        # Store all positions for heatmap/trajectory analysis
-        positions[ip].append((ts.isoformat(), pos[0], pos[1], pos[2]))
-        heights[ip].append(pos[1])
+        return results
+
+def process_session_with_positions(file_path: Path, ignore_ips: List[str] = ["192.168.1.100"], hz: float = 1.0,
+                                   stream: bool = False):
+    """Process a session and return its metrics and floor occupancy grids.
+
+    With *stream* the text log is read in a single pass (state is discarded
+    at every bulk wipe) instead of loading the columnar position cache.
+    """
+    if stream:
+        session = stream_session(file_path, SessionPositions(ignore_ips, hz))
+        return session.results(), session.start_time, session.end_time
     
-    # Calculate metrics
-    results = {}
+    cols = load_positions(file_path)
+    rows = cols.after_wipe()
+    start_time, end_time = cols.start_time, cols.end_time
     duration = (end_time - start_time).total_seconds() if start_time and end_time else 0.0
     
-    for ip in samples:
-        pts = sorted(samples[ip].items())
-        distance = sum(
-            euclidean(p1, p2) for (_, p1), (_, p2) in zip(pts, pts[1:])
-        ) if len(pts) > 1 else 0.0
+    t = np.asarray(cols.t[rows])  # sub-second times, so hz > 1 buckets are meaningful
+    codes = np.asarray(cols.address[rows])
+    xyz = cols.xyz(rows)
+    
+    # IPs in order of first appearance
+    present, first_rows = np.unique(codes, return_index=True)
+    results = {}
+    for code in present[np.argsort(first_rows)]:
+        ip = cols.addresses[code]
+        if ip in ignore_ips:
+            continue
+        mask = codes == code
+        traj = compute_trajectory(t[mask], xyz[mask], hz)
         
-        avg_height = sum(heights[ip]) / len(heights[ip]) if heights[ip] else 0.0
+        # One bucket sample = 1/hz seconds spent in its floor cell
+        occupancy = OccupancyGrid()
+        occupancy.add_many(traj.xyz[:, 0], traj.xyz[:, 2], 1 / hz)
         
         results[ip] = {
-            'distance': distance,
+            'distance': traj.distance,
             'duration': duration,
-            'avg_height': avg_height,
-            'sample_count': len(pts),
-            'positions': positions[ip]
+            'avg_height': sequential_mean(xyz[mask, 1]),
+            'sample_count': traj.sample_count,
+            'occupancy': occupancy,
+            'trajectory': traj
         }
     
     return results, start_time, end_time
@@ -141,6 +159,18 @@ def load_participant_mapping(mapping_file: Path = Path("participant_mapping.json
         raise FileNotFoundError(f"Participant mapping file {mapping_file} not found")
     return json.loads(mapping_file.read_text())
 
+def session_labels(mapping: Dict) -> Dict[int, Dict[str, str]]:
+    """Reverse mapping: session -> IP -> participant label."""
+    session_to_participants = {}
+    for pair in mapping['participant_pairs']:
+        for session_info in pair['sessions']:
+            session_id = session_info['session']
+            session_to_participants[session_id] = {}
+            for participant, ip in session_info.items():
+                if participant != 'session':
+                    session_to_participants[session_id][ip] = participant
+    return session_to_participants
+
 def aggregate_participant_data(session_data: Dict, mapping: Dict) -> Dict:
     """Aggregate session data by participant."""
     participant_totals = defaultdict(lambda: {
@@ -149,18 +179,11 @@ def aggregate_participant_data(session_data: Dict, mapping: Dict) -> Dict:
         'avg_height': [],
         'session_count': 0,
         'sessions': [],
-        'all_positions': []
+        'occupancy': OccupancyGrid()
     })
     
     # Create reverse mapping: session -> participant assignments
-    session_to_participants = {}
-    for pair in mapping['participant_pairs']:
-        for session_info in pair['sessions']:
-            session_id = session_info['session']
-            session_to_participants[session_id] = {}
-            for participant, ip in session_info.items():
-                if participant != 'session':
-                    session_to_participants[session_id][ip] = participant
+    session_to_participants = session_labels(mapping)
     
     # Aggregate data by participant
     for session_id, session_metrics in session_data.items():
@@ -179,7 +202,7 @@ def aggregate_participant_data(session_data: Dict, mapping: Dict) -> Dict:
                         'duration': metrics['duration'],
                         'avg_height': metrics['avg_height']
                     })
-                    participant_totals[participant]['all_positions'].extend(metrics['positions'])
+                    participant_totals[participant]['occupancy'] += metrics['occupancy']
     
     # Calculate final averages
     for participant, data in participant_totals.items():
@@ -208,34 +231,17 @@ def export_participant_csv(participant_data: Dict, output_file: Path = Path("par
                 data['session_count']
             ])
 
-def export_session_json(session_data: Dict, mapping: Dict, output_file: Path = Path("session_data.json")):
-    """Export detailed session data with participant mapping for heatmaps/trajectories."""
+def export_trajectories(session_data: Dict, mapping: Dict, output_dir: Path = Path("trajectories"),
+                        occupancy_dir: Path = Path("occupancy"), hz: float = 1.0):
+    """Export per-session trajectories to a chunked binary store and occupancy grids to one .npz per session."""
+    session_to_participants = session_labels(mapping)
+    write_trajectories(output_dir, session_data, session_to_participants, hz)
     
-    # Add participant labels to session data
-    session_to_participants = {}
-    for pair in mapping['participant_pairs']:
-        for session_info in pair['sessions']:
-            session_id = session_info['session']
-            session_to_participants[session_id] = {}
-            for participant, ip in session_info.items():
-                if participant != 'session':
-                    session_to_participants[session_id][ip] = participant
-    
-    enhanced_data = {}
     for session_id, session_metrics in session_data.items():
-        enhanced_data[session_id] = {}
-        for ip, metrics in session_metrics.items():
-            participant = session_to_participants.get(session_id, {}).get(ip, f"Unknown_{ip}")
-            enhanced_data[session_id][participant] = {
-                'distance': metrics['distance'],
-                'duration': metrics['duration'], 
-                'avg_height': metrics['avg_height'],
-                'positions': metrics['positions'],
-                'ip': ip
-            }
-    
-    with open(output_file, 'w') as f:
-        json.dump(enhanced_data, f, indent=2)
+        save_session_grids(occupancy_dir / f"session_{session_id}.npz", {
+            session_to_participants.get(session_id, {}).get(ip, f"Unknown_{ip}"): metrics['occupancy']
+            for ip, metrics in session_metrics.items()
+        })
 
 def export_participant_summary(participant_data: Dict, output_file: Path = Path("participant_summary.json")):
     """Export participant summary without position data."""
@@ -268,32 +274,44 @@ def main():
         print("Please create participant_mapping.json first")
         return
     
-    # Process all session logs
-    session_logs_dir = Path("./session_logs")
-    if not session_logs_dir.exists():
-        print(f"❌ {session_logs_dir} directory not found")
-        return
-    
-    log_files = sorted(session_logs_dir.glob("run_*.txt"))
-    if not log_files:
-        print(f"❌ No run_*.txt files found in {session_logs_dir}")
-        return
-    
-    print(f"📁 Found {len(log_files)} session log files")
+    args = sys.argv[1:]
+    trajectories_dir = Path("./trajectories")
     
-    # Process each session
-    session_data = {}
-    for log_file in log_files:
-        session_id = int(log_file.stem.split("_")[1])
+    if "--from-trajectories" in args:
+        # Rebuild the participant exports from a previous run's store, no log parsing
         try:
-            results, start_time, end_time = process_session_with_positions(log_file)
+            session_data = stored_session_data(TrajectoryStore(trajectories_dir))
+        except FileNotFoundError:
+            print(f"❌ No trajectory store found in {trajectories_dir}")
+            return
+        print(f"📁 Loaded {len(session_data)} sessions from {trajectories_dir}")
+    else:
+        # Process all session logs
+        session_logs_dir = Path("./session_logs")
+        if not session_logs_dir.exists():
+            print(f"❌ {session_logs_dir} directory not found")
+            return
+        
+        log_files = sorted(session_logs_dir.glob("run_*.txt"))
+        if not log_files:
+            print(f"❌ No run_*.txt files found in {session_logs_dir}")
+            return
+        
+        print(f"📁 Found {len(log_files)} session log files")
+        
+        # Process sessions on a process pool (--workers N, default: all cores)
+        workers = int(args[args.index("--workers") + 1]) if "--workers" in args else None
+        batch = run_sessions(log_files, process_session_with_positions, workers=workers)
+        
+        session_data = {}
+        for session_id, (results, start_time, end_time) in batch.outputs:
             if results:
                 session_data[session_id] = results
                 print(f"✓ Processed session {session_id}")
             else:
                 print(f"⚠️  Session {session_id}: No valid data")
-        except Exception as e:
-            print(f"❌ Error processing session {session_id}: {e}")
+        for failure in batch.failures:
+            print(f"❌ Error processing session {failure.session}: {failure.error}")
     
     # Aggregate by participant
     print(f"\n📊 Aggregating data for {len(session_data)} sessions...")
@@ -312,11 +330,13 @@ def main():
     # Export data
     print(f"\n💾 Exporting data...")
     export_participant_csv(participant_data)
-    export_session_json(session_data, mapping)
+    if "--from-trajectories" not in args:
+        export_trajectories(session_data, mapping, trajectories_dir)
     export_participant_summary(participant_data)
     
     print(f"✓ participant_metrics.csv - Participant summaries for analysis")
-    print(f"✓ session_data.json - Detailed session data for heatmaps/trajectories") 
+    print(f"✓ trajectories/ - Chunked binary trajectories for heatmaps/trajectories")
+    print(f"✓ occupancy/session_<id>.npz - Floor occupancy grids for heatmaps")
     print(f"✓ participant_summary.json - Participant aggregated data")
     print(f"\n🚀 Ready for further analytics!")
 
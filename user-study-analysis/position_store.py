@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""position_store.py
+
+Columnar on-disk cache of the ``[PositionLogger]`` streams in a session log.
+
+``ingest`` converts a log such as ``run_0_processed.txt`` into a directory
+``run_0_processed.positions/`` next to it, holding one ``.npy`` file per
+column plus ``meta.json``:
+
+    epoch    int64    wall-clock epoch seconds of the line
+    t        float64  reconstructed sub-second time (see ``spread_within_seconds``)
+    id       int8     logging client Id
+    point    int8     tracked-point index (``session_log_parser.PointNumbering``)
+    address  int8     index into meta["addresses"]
+    x y z    float32  position (m)
+    rx ry rz float32  Euler rotation (deg)
+    glitch   uint8    SPIKE / TELEPORT flags of ``glitch_filter``, computed
+                      per tracked point of each client during ingest, or
+                      REPLAY for rows that repeat an earlier stretch of a
+                      concatenated log
+
+``meta.json`` lists the times of the Vuforia re-localisations (``Locked
+target ...`` lines) after the last wipe, holds the height profiles
+(``posture.HeightProfile`` summaries) of every address and of each of its
+tracked points, built in the ingest pass after the last wipe (skipping
+replayed stretches), and stores
+the SHA-256 of the source log and the short ticks and point reorderings the
+parser corrected per client Id. The same pass reconstructs the block
+lifecycles (``block_lifecycle.BlockLifecycle``) of the whole log into
+``blocks.npy`` and ``snaps.npy``, with the type and address names in
+meta.json, and the ownership holds after the last wipe
+(``ownership_analysis.OwnershipTracker``) into ``ownership.npy``. When the
+log or a glitch filter threshold changes, the next ``load_positions`` call
+re-ingests it. Columns are opened with ``np.load(mmap_mode="r")``, so
+re-analysing all runs only touches the pages that are actually read
+instead of re-parsing text.
+
+Usage:
+```
+python position_store.py [session_logs]
+```
+"""
+
+import hashlib
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from block_lifecycle import BlockLifecycle
+from glitch_filter import REPLAY, filter_settings, glitch_flags
+from ownership_analysis import OwnershipTracker
+from posture import HeightProfile
+from session_log_parser import (POINTS_PER_TICK, POSITION_SOURCE, PointNumbering, ReplayFilter, epoch_seconds,
+                                from_epoch, iter_records)
+
+CACHE_SUFFIX = ".positions"
+META_FILE = "meta.json"
+BLOCKS_FILE = "blocks.npy"
+SNAPS_FILE = "snaps.npy"
+OWNERSHIP_FILE = "ownership.npy"
+FORMAT_VERSION = 10
+
+# Unity's Vector3.ToString() writes two decimals; float32 round-trips them exactly
+POSITION_DECIMALS = 2
+
+COLUMNS = {
+    "epoch": np.int64,
+    "t": np.float64,
+    "id": np.int8,
+    "point": np.int8,
+    "address": np.int8,
+    "x": np.float32,
+    "y": np.float32,
+    "z": np.float32,
+    "rx": np.float32,
+    "ry": np.float32,
+    "rz": np.float32,
+    "glitch": np.uint8,
+}
+
+LOCKED_TARGET_MARKER = "Locked target"
+
+# ----------------------------------------------------------------------------
+# Helpers
+
+
+def cache_dir(log_path: Path) -> Path:
+    """Cache directory stored next to *log_path*."""
+    log_path = Path(log_path)
+    return log_path.with_name(log_path.stem + CACHE_SUFFIX)
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of the raw bytes of *path*."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=64)
+def _cached_digest(path: str, mtime_ns: int, size: int) -> str:
+    return file_digest(Path(path))
+
+
+def log_digest(log_path: Path) -> str:
+    """``file_digest`` of *log_path*, hashed once per process while it is unchanged."""
+    log_path = Path(log_path).resolve()
+    stat = log_path.stat()
+    return _cached_digest(str(log_path), stat.st_mtime_ns, stat.st_size)
+
+
+def _read_meta(directory: Path) -> Optional[Dict]:
+    meta_file = directory / META_FILE
+    if not meta_file.exists():
+        return None
+    try:
+        return json.loads(meta_file.read_text())
+    except json.JSONDecodeError:
+        return None
+
+
+def is_fresh(log_path: Path, digest: Optional[str] = None) -> bool:
+    """True if the cache of *log_path* exists and matches the log's hash.
+
+    Pass the log's *digest* if it is already known.
+    """
+    meta = _read_meta(cache_dir(log_path))
+    return (
+        meta is not None
+        and meta.get("version") == FORMAT_VERSION
+        and meta.get("glitch_filter") == filter_settings()
+        and meta.get("sha256") == (digest or log_digest(log_path))
+    )
+
+
+def spread_within_seconds(epoch: np.ndarray, stream: np.ndarray) -> np.ndarray:
+    """Sub-second times for one-second-resolution timestamps.
+
+    Within every stream (logging client Id), each run of consecutive lines
+    stamped with the same second s is spread evenly over [s, s + 1): the
+    k-th of n lines gets s + k/n. Times stay inside their logged second and
+    increase monotonically wherever the log itself does.
+    """
+    epoch = np.asarray(epoch, dtype=np.int64)
+    stream = np.asarray(stream)
+    t = epoch.astype(np.float64)
+    for value in np.unique(stream):
+        rows = np.flatnonzero(stream == value)
+        e = epoch[rows]
+        run_starts = np.flatnonzero(np.concatenate(([True], e[1:] != e[:-1])))
+        run_lengths = np.diff(np.append(run_starts, len(e)))
+        run = np.repeat(np.arange(len(run_starts)), run_lengths)
+        k = np.arange(len(e)) - run_starts[run]
+        t[rows] = e + k / run_lengths[run]
+    return t
+
+# ----------------------------------------------------------------------------
+# Ingest
+
+
+def ingest(log_path: Path, force: bool = False, digest: Optional[str] = None) -> Path:
+    """Convert *log_path* into its columnar cache unless a fresh one exists."""
+    log_path = Path(log_path)
+    directory = cache_dir(log_path)
+    digest = digest or log_digest(log_path)
+    if not force and is_fresh(log_path, digest):
+        return directory
+
+    columns: Dict[str, list] = {name: [] for name in COLUMNS}
+    replayed: List[bool] = []  # per position row
+    addresses: List[str] = []
+    address_codes: Dict[str, int] = {}
+    wipe_row = 0
+    start_epoch = None
+    end_epoch = None
+    locked_targets: List[int] = []
+    heights: Dict[str, HeightProfile] = {}                # address → profile
+    track_heights: Dict[Tuple[str, int], HeightProfile] = {}  # (address, point) → profile
+    blocks = BlockLifecycle()  # spans the wipes, which remove the blocks
+    ownership = OwnershipTracker()
+    numbering = PointNumbering()
+    replays = ReplayFilter()
+
+    for record in iter_records(log_path, numbering):
+        epoch = epoch_seconds(record.timestamp)
+        blocks.add(record, epoch)
+        if record.is_wipe:
+            ownership.reset()
+            # Everything up to here predates the last bulk wipe
+            wipe_row = len(columns["epoch"])
+            start_epoch = None
+            end_epoch = None
+            locked_targets = []
+            heights = {}
+            track_heights = {}
+            replays = ReplayFilter()
+            continue
+        if start_epoch is None:
+            start_epoch = epoch
+        end_epoch = epoch
+
+        if record.source != POSITION_SOURCE:
+            if record.payload.startswith(LOCKED_TARGET_MARKER):
+                locked_targets.append(epoch)
+            ownership.add(record, epoch)
+            continue
+
+        code = address_codes.get(record.address)
+        if code is None:
+            code = address_codes[record.address] = len(addresses)
+            addresses.append(record.address)
+        replayed.append(replays.is_replay(epoch))
+
+        # Posture profiles in the same pass, so no height column is re-read;
+        # a replay would run time backwards through them
+        if not replayed[-1]:
+            profile = heights.get(record.address)
+            if profile is None:
+                profile = heights[record.address] = HeightProfile(crouch=False)
+            profile.add(record.y, epoch)
+            profile = track_heights.get((record.address, record.point))
+            if profile is None:
+                profile = track_heights[(record.address, record.point)] = HeightProfile()
+            profile.add(record.y, epoch)
+
+        columns["epoch"].append(epoch)
+        columns["id"].append(record.id)
+        columns["point"].append(record.point)
+        columns["address"].append(code)
+        columns["x"].append(record.x)
+        columns["y"].append(record.y)
+        columns["z"].append(record.z)
+        columns["rx"].append(record.rx)
+        columns["ry"].append(record.ry)
+        columns["rz"].append(record.rz)
+
+    columns["t"] = spread_within_seconds(columns["epoch"], columns["id"])
+    # Glitch flags per tracked point of each client, after the last wipe
+    xyz = np.round(np.column_stack([np.asarray(columns[axis], dtype=np.float32) for axis in "xyz"])
+                   .astype(np.float64), POSITION_DECIMALS).reshape(-1, 3)
+    track = np.asarray(columns["id"], dtype=np.int64) * POINTS_PER_TICK + np.asarray(columns["point"])
+    columns["glitch"] = np.zeros(len(track), dtype=np.uint8)
+    replay = np.asarray(replayed, dtype=bool)
+    original = np.flatnonzero(~replay[wipe_row:]) + wipe_row
+    columns["glitch"][original] = glitch_flags(columns["t"][original], xyz[original], track[original])
+    columns["glitch"][replay] = REPLAY
+
+    directory.mkdir(exist_ok=True)
+    # meta.json is written last, so a half-written cache is never considered fresh
+    (directory / META_FILE).unlink(missing_ok=True)
+    for name, dtype in COLUMNS.items():
+        np.save(directory / f"{name}.npy", np.asarray(columns[name], dtype=dtype))
+    np.save(directory / BLOCKS_FILE, blocks.table())
+    np.save(directory / SNAPS_FILE, blocks.snap_table())
+    np.save(directory / OWNERSHIP_FILE, ownership.table())
+    meta = {
+        "version": FORMAT_VERSION,
+        "source": log_path.name,
+        "sha256": digest,
+        "rows": len(columns["epoch"]),
+        "addresses": addresses,
+        "wipe_row": wipe_row,
+        "start_epoch": start_epoch,
+        "end_epoch": end_epoch,
+        "locked_targets": locked_targets,
+        "short_ticks": {str(k): v for k, v in sorted(numbering.short_ticks.items())},
+        "reordered": {str(k): v for k, v in sorted(numbering.reordered.items())},
+        "posture": {
+            address: {
+                "all": profile.summary(),
+                "points": {str(point): track.summary()
+                           for (a, point), track in sorted(track_heights.items()) if a == address},
+            }
+            for address, profile in heights.items()
+        },
+        "block_types": blocks.types,
+        "block_addresses": blocks.addresses,
+        "ownership_objects": ownership.objects,
+        "ownership_holders": ownership.holders,
+        "ownership_counts": ownership.counts,
+        "glitch_filter": filter_settings(),
+    }
+    (directory / META_FILE).write_text(json.dumps(meta, indent=2))
+    return directory
+
+# ----------------------------------------------------------------------------
+# Loader
+
+
+class PositionColumns:
+    """Memory-mapped position columns of one session log."""
+
+    def __init__(self, directory: Path, meta: Dict):
+        self.directory = directory
+        self.meta = meta
+        self.addresses: List[str] = meta["addresses"]
+        self.wipe_row: int = meta["wipe_row"]
+        self.start_epoch: Optional[int] = meta["start_epoch"]
+        self.end_epoch: Optional[int] = meta["end_epoch"]
+        self.locked_targets: List[int] = meta["locked_targets"]
+        self.short_ticks: Dict[str, int] = meta["short_ticks"]  # client Id → resynchronised ticks
+        self.posture: Dict[str, Dict] = meta["posture"]
+        self.block_types: List[str] = meta["block_types"]
+        self.block_addresses: List[str] = meta["block_addresses"]
+        self.blocks = np.load(directory / BLOCKS_FILE, mmap_mode="r")  # BLOCK_DTYPE
+        self.snaps = np.load(directory / SNAPS_FILE, mmap_mode="r")    # SNAP_DTYPE
+        self.ownership_objects: List[str] = meta["ownership_objects"]
+        self.ownership_holders: List[str] = meta["ownership_holders"]
+        self.ownership_counts: Dict[str, int] = meta["ownership_counts"]
+        self.ownership = np.load(directory / OWNERSHIP_FILE, mmap_mode="r")  # OWNERSHIP_DTYPE
+        for name in COLUMNS:
+            setattr(self, name, np.load(directory / f"{name}.npy", mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    @property
+    def start_time(self):
+        """First timestamp after the last wipe, as a naive datetime."""
+        return from_epoch(self.start_epoch) if self.start_epoch is not None else None
+
+    @property
+    def end_time(self):
+        """Last timestamp of the log, as a naive datetime."""
+        return from_epoch(self.end_epoch) if self.end_epoch is not None else None
+
+    def after_wipe(self) -> slice:
+        """Row slice of the samples following the last bulk wipe."""
+        return slice(self.wipe_row, len(self))
+
+    def address_code(self, address: str) -> Optional[int]:
+        try:
+            return self.addresses.index(address)
+        except ValueError:
+            return None
+
+    def xyz(self, rows=slice(None)) -> np.ndarray:
+        """(n, 3) float64 positions with the logged two-decimal values restored."""
+        pts = np.column_stack((self.x[rows], self.y[rows], self.z[rows])).astype(np.float64)
+        return np.round(pts, POSITION_DECIMALS)
+
+    def rotations(self, rows=slice(None)) -> np.ndarray:
+        """(n, 3) float64 Euler angles with the logged two-decimal values restored."""
+        rot = np.column_stack((self.rx[rows], self.ry[rows], self.rz[rows])).astype(np.float64)
+        return np.round(rot, POSITION_DECIMALS)
+
+
+class Track(NamedTuple):
+    """Samples of one tracked point of one client (or address), in log order."""
+    epoch: np.ndarray  # (n,) int64
+    t: np.ndarray      # (n,) float64 sub-second time
+    xyz: np.ndarray    # (n, 3) float64
+    rot: np.ndarray    # (n, 3) float64 Euler angles
+
+
+class TrackSet:
+    """Position columns regrouped into contiguous per-(group, point) tracks.
+
+    One stable argsort puts every track into a contiguous block, so each
+    track is a set of array views instead of a filtered copy. *group* is the
+    column the tracks are split by: ``"id"`` (logging client) or
+    ``"address"`` (participant code / IP, which may span several Ids).
+    """
+
+    def __init__(self, cols: PositionColumns, rows=slice(None), group: str = "id"):
+        keys = np.asarray(getattr(cols, group)[rows]).astype(np.int64) * POINTS_PER_TICK
+        keys += np.asarray(cols.point[rows])
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        self.group = group
+        self.epoch = np.asarray(cols.epoch[rows])[order]
+        self.t = np.asarray(cols.t[rows])[order]
+        self.xyz = cols.xyz(rows)[order]
+        self.rot = cols.rotations(rows)[order]
+
+        unique, starts = np.unique(sorted_keys, return_index=True)
+        ends = np.append(starts[1:], len(sorted_keys))
+        self._slices: Dict[Tuple[int, int], slice] = {
+            (int(k) // POINTS_PER_TICK, int(k) % POINTS_PER_TICK): slice(int(a), int(b))
+            for k, a, b in zip(unique, starts, ends)
+        }
+
+    def keys(self) -> List[Tuple[int, int]]:
+        """(group value, point) pairs present, sorted."""
+        return list(self._slices)
+
+    def groups(self) -> List[int]:
+        return sorted({g for g, _ in self._slices})
+
+    def __contains__(self, key: Tuple[int, int]) -> bool:
+        return key in self._slices
+
+    def track(self, group_value: int, point: int) -> Track:
+        s = self._slices[(group_value, point)]
+        return Track(self.epoch[s], self.t[s], self.xyz[s], self.rot[s])
+
+
+def load_positions(log_path: Path, digest: Optional[str] = None) -> PositionColumns:
+    """Memory-map the columnar cache of *log_path*, ingesting it if stale."""
+    directory = ingest(log_path, digest=digest)
+    return PositionColumns(directory, _read_meta(directory))
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("./session_logs")
+    log_files = sorted(root.rglob("run_*.txt"))
+    if not log_files:
+        print(f"Error: No run_*.txt files found in {root}", file=sys.stderr)
+        return
+
+    for log_file in log_files:
+        digest = log_digest(log_file)
+        fresh = is_fresh(log_file, digest)
+        cols = load_positions(log_file, digest)
+        state = "cached" if fresh else "ingested"
+        short = sum(cols.short_ticks.values())
+        print(f"{log_file}: {len(cols):7d} samples ({state})" + (f", {short} short ticks" if short else ""))
+
+
+if __name__ == "__main__":
+    main()
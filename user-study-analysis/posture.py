@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""posture.py
+
+Constant-memory head-height (posture) profiles.
+
+A ``HeightProfile`` consumes one height sample at a time and keeps
+
+    mean / std     running sum plus Welford's M2 (the mean is the plain
+                   sum / n, so it equals the old ``avg_height`` exactly)
+    min / max
+    quantiles      P² estimates (Jain & Chlamtac) of ``QUANTILES``
+    crouching      time spent, and number of episodes, with the head more
+                   than ``CROUCH_DROP`` below the participant's standing
+                   height (the running P² estimate of ``STANDING_QUANTILE``)
+
+Heights are relative to the tracking origin, which differs between
+devices and sessions, so crouching is judged against each profile's own
+standing height rather than an absolute threshold. Crouching only means
+something for a single head: a participant's address stream interleaves
+all tracked points (see ``dyad_tracks``), so its profile is built with
+``crouch=False`` and crouching is reported per tracked head instead, from
+the head's bucketed track pooled over all clients (``track_profile``).
+Episodes use hysteresis: a crouch ends only once the head is back within
+``CROUCH_DROP - CROUCH_HYSTERESIS`` of standing height.
+
+Usage:
+```
+from posture import HeightProfile
+
+profile = HeightProfile()
+for epoch, y in samples:
+    profile.add(y, epoch)
+profile.summary()  # {'mean': ..., 'p50': ..., 'crouch_time': ..., 'crouch_events': ...}
+track_profile(traj.t, traj.xyz[:, 1])  # profile of one head's bucketed track
+```
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+QUANTILES = (0.05, 0.5, 0.95)
+STANDING_QUANTILE = 0.9
+CROUCH_DROP = 0.3          # m below standing height that counts as crouching
+CROUCH_HYSTERESIS = 0.1    # m the head must rise again to end a crouch
+MIN_BASELINE_SAMPLES = 30  # samples before the standing height is trusted
+MAX_GAP = 2.0              # s; longer gaps between samples add no time
+
+# ----------------------------------------------------------------------------
+# P² quantile estimator
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile with five markers (P² algorithm)."""
+
+    def __init__(self, p: float):
+        self.p = p
+        self.markers: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float) -> None:
+        q = self.markers
+        if len(q) < 5:
+            q.append(x)
+            if len(q) == 5:
+                q.sort()
+            return
+
+        # Cell k with q[k] <= x < q[k + 1], extending the extremes
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Adjust the three middle markers
+        n = self.positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                parabolic = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] += s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                n[i] += s
+
+    def value(self) -> Optional[float]:
+        q = self.markers
+        if not q:
+            return None
+        if len(q) < 5:
+            ordered = sorted(q)
+            return ordered[min(len(ordered) - 1, int(round(self.p * (len(ordered) - 1))))]
+        return q[2]
+
+# ----------------------------------------------------------------------------
+# Height profile
+
+
+class HeightProfile:
+    """Running height statistics and crouch detection of one stream."""
+
+    def __init__(self, crouch: bool = True):
+        self.detect_crouch = crouch
+        self.count = 0
+        self.total = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.quantiles = {p: P2Quantile(p) for p in QUANTILES}
+        self.standing = P2Quantile(STANDING_QUANTILE)
+        self.crouching = False
+        self.crouch_time = 0.0
+        self.crouch_events = 0
+        self._last_epoch: Optional[float] = None
+
+    def add(self, y: float, epoch: Optional[float] = None) -> None:
+        """Add one height sample, optionally with its time (for crouch time)."""
+        self.count += 1
+        self.total += y
+        delta = y - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (y - self._mean)
+        if y < self.min:
+            self.min = y
+        if y > self.max:
+            self.max = y
+        for estimator in self.quantiles.values():
+            estimator.add(y)
+        self.standing.add(y)
+
+        if not self.detect_crouch:
+            return
+
+        # Time since the previous sample belongs to the state it was in
+        if epoch is not None:
+            if self.crouching and self._last_epoch is not None:
+                gap = epoch - self._last_epoch
+                if 0 < gap <= MAX_GAP:
+                    self.crouch_time += gap
+            self._last_epoch = epoch
+
+        if self.count >= MIN_BASELINE_SAMPLES:
+            drop = self.standing.value() - y
+            if not self.crouching and drop > CROUCH_DROP:
+                self.crouching = True
+                self.crouch_events += 1
+            elif self.crouching and drop < CROUCH_DROP - CROUCH_HYSTERESIS:
+                self.crouching = False
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """Plain-dict statistics (JSON-serialisable)."""
+        summary = {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+        }
+        for p, estimator in self.quantiles.items():
+            value = estimator.value()
+            summary[f'p{int(round(p * 100)):02d}'] = value if value is not None else 0.0
+        if self.detect_crouch:
+            summary['crouch_time'] = self.crouch_time
+            summary['crouch_events'] = self.crouch_events
+        return summary
+
+
+def track_profile(t: Iterable[float], y: Iterable[float]) -> HeightProfile:
+    """Profile of one head's time-ordered track (e.g. ``dyad_tracks.head_tracks``)."""
+    profile = HeightProfile()
+    for epoch, height in zip(t, y):
+        profile.add(float(height), float(epoch))
+    return profile
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""proximity_analysis.py
+
+Inter-personal distance between the two partners of every run.
+
+For each run the partners' heads (``dyad_tracks.align_heads``) are put on a
+shared clock and their floor-plane (x/z) distance is computed as one
+vectorised series. From it:
+
+    zones      time spent in each of Hall's proxemic zones
+               (intimate < 0.45 m, personal < 1.2 m, social < 3.6 m, public)
+    events     approach / retreat episodes: maximal runs in which the
+               smoothed distance keeps shrinking / growing, kept if the
+               distance changes by at least ``MIN_EVENT_M`` overall
+
+The per-run summary is keyed by 'Run #', so it joins onto
+``study-run-results.csv`` (``join_study_results``) and feeds the Friedman
+tests in ``friedman_calculations.py``.
+
+Usage:
+```
+python proximity_analysis.py [--hz 1] [--output proximity_summary.csv]
+```
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from dyad_tracks import align_heads
+
+DEFAULT_HZ = 1.0
+ZONES = ('intimate', 'personal', 'social', 'public')
+ZONE_LIMITS = np.array([0.45, 1.2, 3.6])  # upper bounds (m) of all but the last zone
+SMOOTH_S = 3.0      # moving-average window for event detection (s)
+MIN_EVENT_M = 0.5   # net distance change of an approach / retreat (m)
+
+# ----------------------------------------------------------------------------
+# Series
+
+
+def partner_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Floor-plane distance between two (n, 3) position arrays."""
+    d = np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64)
+    return np.hypot(d[:, 0], d[:, 2])
+
+
+def zone_codes(distance: np.ndarray) -> np.ndarray:
+    """Index into ``ZONES`` of every sample."""
+    return np.searchsorted(ZONE_LIMITS, distance, 'right')
+
+
+def zone_times(distance: np.ndarray, hz: float = DEFAULT_HZ) -> Dict[str, float]:
+    """Seconds spent in each proxemic zone (each sample stands for 1/hz s)."""
+    counts = np.bincount(zone_codes(distance), minlength=len(ZONES))
+    return {zone: float(n) / hz for zone, n in zip(ZONES, counts)}
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Centred moving average; the window shrinks at both ends."""
+    x = np.asarray(x, dtype=np.float64)
+    if window <= 1 or len(x) == 0:
+        return x.copy()
+    prefix = np.concatenate(([0.0], np.cumsum(x)))
+    i = np.arange(len(x))
+    lo = np.maximum(i - window // 2, 0)
+    hi = np.minimum(i + (window - window // 2), len(x))
+    return (prefix[hi] - prefix[lo]) / (hi - lo)
+
+
+def approach_retreat_events(t: np.ndarray, distance: np.ndarray, hz: float = DEFAULT_HZ,
+                            smooth_s: float = SMOOTH_S, min_change: float = MIN_EVENT_M) -> pd.DataFrame:
+    """Approach (distance shrinking) and retreat (growing) episodes.
+
+    Steps across a gap in the clock never join an episode. Returns one row
+    per episode with its kind, start/end time, duration, start/end distance
+    and net change.
+    """
+    columns = ['kind', 'start', 'end', 'duration', 'from_m', 'to_m', 'change_m']
+    t = np.asarray(t, dtype=np.float64)
+    if len(t) < 2:
+        return pd.DataFrame(columns=columns)
+
+    smoothed = rolling_mean(distance, max(1, int(round(smooth_s * hz))))
+    step = np.diff(smoothed)
+    direction = np.sign(step).astype(np.int8)
+    direction[np.diff(t) > 1.5 / hz] = 0
+
+    # Runs of equal direction: step i covers t[i] .. t[i + 1]
+    starts = np.flatnonzero(np.concatenate(([True], direction[1:] != direction[:-1])))
+    ends = np.append(starts[1:], len(step))
+    change = np.add.reduceat(step, starts)
+    keep = (direction[starts] != 0) & (np.abs(change) >= min_change)
+    starts, ends, change = starts[keep], ends[keep], change[keep]
+
+    return pd.DataFrame({
+        'kind': np.where(change < 0, 'approach', 'retreat'),
+        'start': t[starts],
+        'end': t[ends],
+        'duration': t[ends] - t[starts],
+        'from_m': smoothed[starts],
+        'to_m': smoothed[ends],
+        'change_m': change,
+    }, columns=columns)
+
+# ----------------------------------------------------------------------------
+# Runs
+
+
+def summarize_distance(t: np.ndarray, distance: np.ndarray, hz: float = DEFAULT_HZ) -> Dict:
+    """Distance statistics, zone times/fractions and event counts of one run."""
+    duration = len(distance) / hz
+    events = approach_retreat_events(t, distance, hz)
+    summary = {
+        'samples': len(distance),
+        'duration_s': duration,
+        'mean_distance': float(np.mean(distance)),
+        'median_distance': float(np.median(distance)),
+        'min_distance': float(np.min(distance)),
+        'max_distance': float(np.max(distance)),
+    }
+    for zone, seconds in zone_times(distance, hz).items():
+        summary[f'{zone}_s'] = seconds
+        summary[f'{zone}_fraction'] = seconds / duration
+    summary['approaches'] = int((events['kind'] == 'approach').sum())
+    summary['retreats'] = int((events['kind'] == 'retreat').sum())
+    summary['events_per_min'] = (summary['approaches'] + summary['retreats']) / (duration / 60)
+    return summary
+
+
+def analyze_run(log_path: Path, hz: float = DEFAULT_HZ) -> Optional[Dict]:
+    """Proximity summary of one run (None if the heads cannot be aligned)."""
+    heads = align_heads(log_path, hz)
+    if heads is None or len(heads.t) < 2:
+        return None
+    return summarize_distance(heads.t, partner_distance(heads.a, heads.b), hz)
+
+
+def analyze_corpus(results_csv: Path = Path('study-run-results.csv'),
+                   log_dir: Path = Path('session_logs/processed_logs'), **kwargs) -> pd.DataFrame:
+    """``analyze_run`` for every run listed in study-run-results.csv (keyed by 'Run #').
+
+    Runs without a log or without two tracked heads are reported and get
+    no row; errors reading a log propagate.
+    """
+    runs = pd.read_csv(results_csv, encoding='utf-8-sig')
+    rows, skipped = [], []
+    for _, run in runs.iterrows():
+        log_path = Path(log_dir) / f"run_{int(run['Run #'])}_processed.txt"
+        result = analyze_run(log_path, **kwargs) if log_path.exists() else None
+        if result is None:
+            skipped.append(int(run['Run #']))
+            continue
+        rows.append({'Run #': int(run['Run #']), **result})
+    if skipped:
+        print(f"Skipped runs (no log or fewer than two heads): {skipped}")
+    return pd.DataFrame(rows)
+
+
+def join_study_results(results: pd.DataFrame, proximity: Optional[pd.DataFrame] = None,
+                       prefix: str = 'proximity_') -> pd.DataFrame:
+    """*results* (study-run-results.csv) with the proximity summary columns
+    added as ``<prefix><column>``; runs without a log get NaN."""
+    if proximity is None:
+        proximity = analyze_corpus()
+    if proximity.empty:
+        return results.copy()
+    proximity = proximity.set_index('Run #').add_prefix(prefix)
+    return results.merge(proximity, left_on='Run #', right_index=True, how='left')
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    hz = float(args[args.index('--hz') + 1]) if '--hz' in args else DEFAULT_HZ
+    output = Path(args[args.index('--output') + 1]) if '--output' in args else None
+
+    df = analyze_corpus(hz=hz)
+    if df.empty:
+        print("No runs could be analysed")
+        return
+
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    runs = pd.read_csv('study-run-results.csv', encoding='utf-8-sig')
+    joined = join_study_results(runs[['Run #', 'Variant']], df, prefix='')
+    print("\nBy variant:")
+    columns = ['mean_distance'] + [f'{zone}_fraction' for zone in ZONES] + ['events_per_min']
+    print(joined.groupby('Variant')[columns].mean().round(3).to_string())
+
+    if output is not None:
+        df.to_csv(output, index=False)
+        print(f"\nSaved {len(df)} runs to {output}")
+
+
+if __name__ == "__main__":
+    main()
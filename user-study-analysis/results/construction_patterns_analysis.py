@@ -3,26 +3,21 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import defaultdict, Counter
-import re
+import sys
+from pathlib import Path
 
-def parse_spawned_objects(spawned_str):
-    """Parse spawned objects string into dictionary of object types and counts"""
-    if pd.isna(spawned_str) or spawned_str == 'INVALID':
-        return {}
-    
-    pattern = r'(\w+(?:\w+)*)\s*×(\d+)'
-    matches = re.findall(pattern, spawned_str)
-    return {obj_type: int(count) for obj_type, count in matches}
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from spawn_counts import SPAWN_COUNTS_FILE, load_spawn_counts, spawned_dicts
 
 def load_and_process_data():
     """Load and process the study results data"""
     df = pd.read_csv('../study-run-results.csv')
     
-    # Parse spawned objects
-    df['spawned_objects_dict'] = df['Spawned objects'].apply(parse_spawned_objects)
-    
-    # Calculate total spawned objects
-    df['total_spawned'] = df['spawned_objects_dict'].apply(lambda x: sum(x.values()) if x else 0)
+    # Spawned objects per type and in total, counted from the session logs
+    counts = load_spawn_counts(ROOT / SPAWN_COUNTS_FILE)
+    df['spawned_objects_dict'] = df['Run #'].map(spawned_dicts(counts))
+    df['total_spawned'] = df['Run #'].map(counts.set_index('Run #')['total'])
     
     # Convert completion time from "MM:SS" to decimal minutes
     def convert_time_to_minutes(time_str):
@@ -1,21 +1,20 @@
 import pandas as pd
 import numpy as np
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from spawn_counts import SPAWN_COUNTS_FILE, load_spawn_counts, spawned_dicts
 
 def load_processed_data():
     """Load the processed data from the main analysis"""
     df = pd.read_csv('../study-run-results.csv')
     
-    # Parse spawned objects
-    import re
-    def parse_spawned_objects(spawned_str):
-        if pd.isna(spawned_str) or spawned_str == 'INVALID':
-            return {}
-        pattern = r'(\w+(?:\w+)*)\s*×(\d+)'
-        matches = re.findall(pattern, spawned_str)
-        return {obj_type: int(count) for obj_type, count in matches}
-    
-    df['spawned_objects_dict'] = df['Spawned objects'].apply(parse_spawned_objects)
-    df['total_spawned'] = df['spawned_objects_dict'].apply(lambda x: sum(x.values()) if x else 0)
+    # Spawned objects per type and in total, counted from the session logs
+    counts = load_spawn_counts(ROOT / SPAWN_COUNTS_FILE)
+    df['spawned_objects_dict'] = df['Run #'].map(spawned_dicts(counts))
+    df['total_spawned'] = df['Run #'].map(counts.set_index('Run #')['total'])
     
     # Convert time
     def convert_time_to_minutes(time_str):
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""session_log_parser.py
+
+Shared tokenizer for the Unity session logs under ``session_logs/``.
+
+Every log line written by the NetworkedLogger has the shape
+
+    2025-03-20 10:35:30 - Id [2] Address [Host] - <payload>
+
+This module splits such a line once into a typed record (timestamp, Id,
+Address, source tag, payload). ``[PositionLogger]`` lines, which make up the
+vast majority of every log, take a fast path that slices the line with plain
+string operations instead of running a regex and ``strptime``. Timestamps
+are decoded from their fixed-width fields arithmetically (``decode_timestamp``,
+or ``decode_timestamps`` for a whole column at once).
+
+All analysis scripts consume the same parsed records via ``load_session``,
+so a log file is read exactly once per process.
+
+Usage:
+```
+from session_log_parser import load_session
+
+session = load_session(Path("session_logs/processed_logs/run_0_processed.txt"))
+for record in session.positions(after_wipe=True):
+    print(record.id, record.x, record.y, record.z)
+```
+"""
+
+import itertools
+import math
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# ----------------------------------------------------------------------------
+# Regular expressions (slow path for every non-position line)
+LINE_RE = re.compile(
+    r"^(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - "
+    r"Id \[(?P<id>\d+)\] Address \[(?P<address>[^\]]*)\] - (?P<payload>.*)$"
+)
+SOURCE_RE = re.compile(r"^(?:\[(?P<bracketed>\w+)\]|(?P<component>\w+)(?= \[|:))")
+
+POSITION_SOURCE = "PositionLogger"
+POSITION_MARKER = " - [PositionLogger] P: ("
+WIPE_MARKER = "All instances of"
+
+# PositionLogger sits on the networked Head prefab, so every client writes one
+# line per spawned head object on each tick, always in its own spawn order.
+# The line order within a tick therefore identifies the tracked point, once
+# dropped lines and the clients' differing spawn orders are accounted for
+# (see PointNumbering).
+POINTS_PER_TICK = 3
+
+RESYNC_RATIO = 0.5        # a renumbering must at least halve the mismatch ...
+RESYNC_MIN_GAIN = 0.3     # ... and reduce it by this many metres
+MATCH_SMOOTHING = 0.3     # weight of the latest tick in a client's smoothed mismatch
+MATCH_TICKS = 5           # ticks a new client is compared before its point order is fixed
+REFERENCE_TIMEOUT = 3     # seconds of silence after which a client is no reference
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+_TS_LEN = 19
+_ID_PREFIX = " - Id ["
+_ADDRESS_SEP = "] Address ["
+
+# ----------------------------------------------------------------------------
+# Record types
+
+
+class LogRecord(NamedTuple):
+    """One timestamped log line split into header fields and payload."""
+    timestamp: datetime
+    id: int
+    address: str
+    source: str
+    payload: str
+
+    @property
+    def is_wipe(self) -> bool:
+        return WIPE_MARKER in self.payload
+
+
+class PositionRecord(NamedTuple):
+    """One ``[PositionLogger]`` sample: position and Euler rotation.
+
+    *point* is the tracked-point index assigned by ``PointNumbering``.
+    """
+    timestamp: datetime
+    id: int
+    address: str
+    x: float
+    y: float
+    z: float
+    rx: float
+    ry: float
+    rz: float
+    point: int = 0
+
+    source = POSITION_SOURCE
+    is_wipe = False
+
+    @property
+    def pos(self) -> Tuple[float, float, float]:
+        return (self.x, self.y, self.z)
+
+
+Record = Union[LogRecord, PositionRecord]
+
+# ----------------------------------------------------------------------------
+# Line tokenizer
+
+
+@lru_cache(maxsize=256)
+def _epoch_day(date_str: str) -> int:
+    """Days since 1970-01-01 of a ``YYYY-mm-dd`` string (one per log date)."""
+    return date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10])).toordinal() - _EPOCH_ORDINAL
+
+
+def decode_timestamp(ts: str) -> int:
+    """Epoch seconds of a fixed-width ``%Y-%m-%d %H:%M:%S`` string.
+
+    The date part is cached; the time of day is plain integer arithmetic.
+    """
+    if len(ts) < _TS_LEN or ts[4] != "-" or ts[10] != " " or ts[13] != ":" or ts[16] != ":":
+        raise ValueError(f"invalid timestamp: {ts!r}")
+    hour, minute, second = int(ts[11:13]), int(ts[14:16]), int(ts[17:19])
+    if hour > 23 or minute > 59 or second > 59:
+        raise ValueError(f"invalid timestamp: {ts!r}")
+    return _epoch_day(ts[:10]) * 86400 + hour * 3600 + minute * 60 + second
+
+
+def decode_timestamps(timestamps: Sequence[str]) -> np.ndarray:
+    """Vectorised ``decode_timestamp``: int64 epoch seconds of a string column.
+
+    The strings are viewed as a (n, 19) digit matrix; dates are converted
+    with the days-from-civil algorithm, so no per-element Python work is done.
+    """
+    raw = np.asarray(timestamps, dtype=f"S{_TS_LEN}")
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    digits = raw.view(np.uint8).reshape(-1, _TS_LEN).astype(np.int64) - ord("0")
+
+    def field(start, stop):
+        value = np.zeros(len(digits), dtype=np.int64)
+        for i in range(start, stop):
+            value = value * 10 + digits[:, i]
+        return value
+
+    year, month, day = field(0, 4), field(5, 7), field(8, 10)
+    hour, minute, second = field(11, 13), field(14, 16), field(17, 19)
+
+    # days_from_civil (proleptic Gregorian), March-based year
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    yoe = year - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp_str(ts: str) -> datetime:
+    """Parse a ``%Y-%m-%d %H:%M:%S`` string; repeated seconds hit the cache."""
+    return EPOCH + timedelta(seconds=decode_timestamp(ts))
+
+
+def epoch_seconds(ts: datetime) -> int:
+    """Wall-clock epoch seconds of a naive log timestamp (no local-time shift)."""
+    return (ts.toordinal() - _EPOCH_ORDINAL) * 86400 + ts.hour * 3600 + ts.minute * 60 + ts.second
+
+
+def from_epoch(seconds: float) -> datetime:
+    """Inverse of ``epoch_seconds``: naive wall-clock datetime."""
+    return EPOCH + timedelta(seconds=float(seconds))
+
+
+class ReplayFilter:
+    """Recognises stretches that a concatenated log repeats.
+
+    Several processed logs contain the session (or part of it) more than
+    once, one copy after the other. A line stamped before the latest one
+    seen starts such a replay, which lasts until the log moves past that
+    latest time again.
+    """
+
+    def __init__(self):
+        self.latest: Optional[int] = None
+        self.replaying = False
+
+    def is_replay(self, epoch: int) -> bool:
+        if self.latest is None or epoch > self.latest:
+            self.latest = epoch
+            self.replaying = False
+        elif epoch < self.latest:
+            self.replaying = True
+        return self.replaying
+
+
+_ORDERS = list(itertools.permutations(range(POINTS_PER_TICK)))
+_SHIFTS = [tuple((k + shift) % POINTS_PER_TICK for k in range(POINTS_PER_TICK))
+           for shift in range(POINTS_PER_TICK)]
+
+
+class _ClientTicks:
+    """Numbering state of one logging client."""
+
+    def __init__(self, confirmed: bool):
+        self.count = 0                  # position lines numbered so far
+        self.order = _ORDERS[0]         # local slot -> tracked point
+        self.confirmed = confirmed      # order fixed (may act as reference)
+        self.tick: List[Optional[Tuple[float, float, float]]] = [None] * POINTS_PER_TICK
+        self.previous: Optional[List[Tuple[float, float, float]]] = None  # last clean tick
+        self.unclean = 0                # ticks since then
+        self.heads: Dict[int, Tuple[float, float, float]] = {}  # point -> position in last clean tick
+        self.mismatch: Optional[List[float]] = None  # smoothed, per candidate order
+        self.checks = 0
+        self.last_seen = 0
+
+
+def _mismatch(tick: Sequence[Tuple[float, float, float]], heads, order: Sequence[int]) -> float:
+    """Summed distance between the samples of a tick and *heads* under *order*."""
+    return sum(math.dist(pos, heads[order[slot]]) for slot, pos in enumerate(tick))
+
+
+def _clearly_better(candidate: float, current: float) -> bool:
+    return candidate < RESYNC_RATIO * current and current - candidate > RESYNC_MIN_GAIN
+
+
+class PointNumbering:
+    """Tracked-point index of every position line of one file.
+
+    Each client logs one line per networked head on every tick, in the order
+    in which it spawned the heads, so counting a client's lines modulo
+    ``POINTS_PER_TICK`` numbers them. Two checks at the end of every tick
+    keep that count honest:
+
+    - phase: a dropped or repeated line shifts every later number. The tick
+      is compared with the client's last clean tick (one that matched a
+      single shift decisively) under each cyclic shift; if a shift matches
+      clearly better the count is resynchronised and the tick is counted in
+      ``short_ticks``.
+    - order: clients spawn the heads in different orders, so slot k of one
+      client need not be slot k of another. The first client's order
+      defines the points; every later client is compared with the last
+      clean tick of the earliest still-logging client and gets the slot
+      order that matches best (smoothed over ticks, fixed after
+      ``MATCH_TICKS``). Later changes are counted in ``reordered``.
+
+    After both checks point k is the same physical head in every client's
+    log, which ``head_tracks`` and everything built on it relies on.
+    """
+
+    def __init__(self):
+        self.clients: Dict[int, _ClientTicks] = {}
+        self.references: List[int] = []  # confirmed clients, in confirmation order
+        self.short_ticks: Dict[int, int] = {}
+        self.reordered: Dict[int, int] = {}
+
+    def point(self, client_id: int, epoch: int, pos: Tuple[float, float, float]) -> int:
+        """Tracked point of the next line *client_id* logged at *epoch*."""
+        client = self.clients.get(client_id)
+        if client is None:
+            client = self.clients[client_id] = _ClientTicks(confirmed=not self.clients)
+            if client.confirmed:
+                self.references.append(client_id)
+        client.last_seen = epoch
+        slot = client.count % POINTS_PER_TICK
+        client.count += 1
+        client.tick[slot] = pos
+        point = client.order[slot]
+        if slot == POINTS_PER_TICK - 1 and None not in client.tick:
+            self._end_tick(client_id, client, epoch)
+        return point
+
+    def _end_tick(self, client_id: int, client: _ClientTicks, epoch: int) -> None:
+        tick = list(client.tick)
+        clean = client.previous is None
+        if not clean:
+            costs = [_mismatch(tick, client.previous, order) for order in _SHIFTS]
+            shift = min(range(POINTS_PER_TICK), key=costs.__getitem__)
+            if shift and _clearly_better(costs[shift], costs[0]):
+                # tick[k] really was slot k + shift: renumber from there on
+                client.count += shift
+                tick = [tick[(k - shift) % POINTS_PER_TICK] for k in range(POINTS_PER_TICK)]
+                client.tick = list(tick)
+                self.short_ticks[client_id] = self.short_ticks.get(client_id, 0) + 1
+            # A tick that straddles a dropped line matches no shift decisively;
+            # keep comparing with the last clean one until the shift shows
+            runner_up = min(c for i, c in enumerate(costs) if i != shift)
+            clean = costs[shift] < RESYNC_RATIO * runner_up or client.unclean >= MATCH_TICKS
+        if clean:
+            client.previous = tick
+            client.unclean = 0
+            if client.confirmed:
+                client.heads = {client.order[slot]: pos for slot, pos in enumerate(tick)}
+        else:
+            client.unclean += 1
+
+        reference = self._reference(client_id, client, epoch)
+        if reference is None:
+            return
+        costs = [_mismatch(tick, reference.heads, order) for order in _ORDERS]
+        if client.mismatch is None:
+            client.mismatch = costs
+        else:
+            client.mismatch = [(1 - MATCH_SMOOTHING) * m + MATCH_SMOOTHING * c
+                               for m, c in zip(client.mismatch, costs)]
+        client.checks += 1
+        best = min(range(len(_ORDERS)), key=client.mismatch.__getitem__)
+        if not client.confirmed:
+            if client.checks >= MATCH_TICKS:
+                client.order = _ORDERS[best]
+                client.confirmed = True
+                self.references.append(client_id)
+        elif _ORDERS[best] != client.order and _clearly_better(
+                client.mismatch[best], client.mismatch[_ORDERS.index(client.order)]):
+            client.order = _ORDERS[best]
+            self.reordered[client_id] = self.reordered.get(client_id, 0) + 1
+
+    def _reference(self, client_id: int, client: _ClientTicks, epoch: int) -> Optional[_ClientTicks]:
+        """Earliest confirmed client still logging that *client* is matched to.
+
+        A client that finds no other confirmed client still logging keeps
+        its own order and becomes a reference itself.
+        """
+        rank = self.references.index(client_id) if client.confirmed else len(self.references)
+        live = [self.clients[other] for other in self.references[:rank]
+                if self.clients[other].last_seen >= epoch - REFERENCE_TIMEOUT]
+        if not live:
+            if not client.confirmed:
+                client.confirmed = True
+                self.references.append(client_id)
+            return None
+        reference = live[0]
+        return reference if len(reference.heads) == POINTS_PER_TICK else None
+
+
+def _parse_position_line(line: str, numbering: PointNumbering) -> Optional[PositionRecord]:
+    """Fast path for ``[PositionLogger]`` lines: slicing only, no regex."""
+    head, sep, tail = line.partition(POSITION_MARKER)
+    if not sep or not head.startswith(_ID_PREFIX, _TS_LEN) or not head.endswith("]"):
+        return None
+    id_start = _TS_LEN + len(_ID_PREFIX)
+    id_end = head.find(_ADDRESS_SEP, id_start)
+    if id_end < 0:
+        return None
+    values = tail.rstrip().rstrip(")").replace(") | R: (", ", ").split(", ")
+    if len(values) != 6:
+        return None
+    try:
+        x, y, z, rx, ry, rz = map(float, values)
+        client_id = int(head[id_start:id_end])
+        ts = parse_timestamp_str(head[:_TS_LEN])
+    except ValueError:
+        return None
+    point = numbering.point(client_id, epoch_seconds(ts), (x, y, z))
+    return PositionRecord(
+        ts, client_id, head[id_end + len(_ADDRESS_SEP):-1],
+        x, y, z, rx, ry, rz, point,
+    )
+
+
+def source_tag(payload: str) -> str:
+    """Return the emitting component of *payload*, or '' for free-form lines.
+
+    ``[FishOwnershipManager] ...`` -> ``FishOwnershipManager``,
+    ``BlockPhysicsController [GridPlank(Clone)]: ...`` -> ``BlockPhysicsController``,
+    ``SpawnFromButton: ...`` -> ``SpawnFromButton``.
+    """
+    m = SOURCE_RE.match(payload)
+    if not m:
+        return ""
+    return m.group("bracketed") or m.group("component")
+
+
+def parse_line(line: str, numbering: Optional[PointNumbering] = None) -> Optional[Record]:
+    """Tokenize one log line, or return None for blank/continuation lines.
+
+    *numbering* carries the tracked-point numbering across the lines of one
+    file; without it every sample is point 0.
+    """
+    if POSITION_MARKER in line:
+        record = _parse_position_line(line, PointNumbering() if numbering is None else numbering)
+        if record is not None:
+            return record
+    m = LINE_RE.match(line.rstrip("\r\n"))
+    if not m:
+        return None
+    payload = m.group("payload")
+    return LogRecord(
+        parse_timestamp_str(m.group("ts")),
+        int(m.group("id")),
+        m.group("address"),
+        source_tag(payload),
+        payload,
+    )
+
+
+def iter_records(file_path: Path, numbering: Optional[PointNumbering] = None) -> Iterator[Record]:
+    """Stream the parsed records of *file_path* in file order.
+
+    Pass a fresh *numbering* to inspect its short-tick counts afterwards.
+    """
+    numbering = PointNumbering() if numbering is None else numbering
+    with open(file_path, "r", errors="ignore") as f:
+        for line in f:
+            record = parse_line(line, numbering)
+            if record is not None:
+                yield record
+
+# ----------------------------------------------------------------------------
+# Streaming consumers
+
+
+class SessionAccumulator:
+    """Single-pass consumer of a session log, reset at every bulk wipe.
+
+    Subclasses extend ``reset`` and override ``add_position``/``add_event``.
+    After ``stream_session`` only the state following the last
+    'All instances of ... have been removed' line remains, without the log
+    ever being held in memory.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.start_time: Optional[datetime] = None
+        self.end_time: Optional[datetime] = None
+
+    def add(self, record: Record) -> None:
+        if self.start_time is None:
+            self.start_time = record.timestamp
+        self.end_time = record.timestamp
+        if record.source == POSITION_SOURCE:
+            self.add_position(record)
+        else:
+            self.add_event(record)
+
+    def add_position(self, record: PositionRecord) -> None:
+        pass
+
+    def add_event(self, record: LogRecord) -> None:
+        pass
+
+
+def stream_session(file_path: Path, accumulator: SessionAccumulator) -> SessionAccumulator:
+    """Feed *file_path* line by line into *accumulator*, resetting it at wipes."""
+    for record in iter_records(file_path):
+        if record.is_wipe:
+            accumulator.reset()
+        else:
+            accumulator.add(record)
+    return accumulator
+
+# ----------------------------------------------------------------------------
+# Session container
+
+
+class SessionLog:
+    """All records of one session log, parsed in a single pass."""
+
+    def __init__(self, path: Path, records: List[Record]):
+        self.path = path
+        self.records = records
+        self.last_wipe = None  # index of the last bulk wipe record
+        for i, record in enumerate(records):
+            if record.is_wipe:
+                self.last_wipe = i
+
+    def after_last_wipe(self) -> List[Record]:
+        """Records following the last 'All instances of' wipe (all if none)."""
+        if self.last_wipe is None:
+            return self.records
+        return self.records[self.last_wipe + 1:]
+
+    def positions(self, after_wipe: bool = False) -> List[PositionRecord]:
+        records = self.after_last_wipe() if after_wipe else self.records
+        return [r for r in records if r.source == POSITION_SOURCE]
+
+    def events(self, source: Optional[str] = None, after_wipe: bool = False) -> List[LogRecord]:
+        """Non-position records, optionally restricted to one source tag."""
+        records = self.after_last_wipe() if after_wipe else self.records
+        return [
+            r for r in records
+            if r.source != POSITION_SOURCE and (source is None or r.source == source)
+        ]
+
+
+@lru_cache(maxsize=64)
+def _load_session_cached(path: str, mtime_ns: int, size: int) -> SessionLog:
+    return SessionLog(Path(path), list(iter_records(Path(path))))
+
+
+def load_session(file_path: Path) -> SessionLog:
+    """Parse *file_path* once per process; unchanged files are served from memory."""
+    file_path = Path(file_path).resolve()
+    stat = file_path.stat()
+    return _load_session_cached(str(file_path), stat.st_mtime_ns, stat.st_size)
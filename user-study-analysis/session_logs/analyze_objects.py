@@ -3,30 +3,35 @@
 Script to analyze spawned and removed objects from processed session logs.
 """
 
-import os
 import re
+import sys
 from collections import defaultdict
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from session_log_parser import load_session
+
+SPAWN_RE = re.compile(r'Spawned (Grid\w+) at')
+REMOVE_RE = re.compile(r'All instances of (Grid\w+) have been removed')
+
 def analyze_session_log(file_path):
     """Analyze a single session log file for spawned and removed objects."""
     
     spawned_objects = defaultdict(int)
     removed_objects = set()
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            # Look for spawned objects
-            spawn_match = re.search(r'Spawned (Grid\w+) at', line)
-            if spawn_match:
-                object_type = spawn_match.group(1)
-                spawned_objects[object_type] += 1
-            
-            # Look for removed objects
-            remove_match = re.search(r'All instances of (Grid\w+) have been removed', line)
-            if remove_match:
-                object_type = remove_match.group(1)
-                removed_objects.add(object_type)
+    for record in load_session(file_path).events():
+        # Look for spawned objects
+        spawn_match = SPAWN_RE.match(record.payload)
+        if spawn_match:
+            object_type = spawn_match.group(1)
+            spawned_objects[object_type] += 1
+        
+        # Look for removed objects
+        remove_match = REMOVE_RE.match(record.payload)
+        if remove_match:
+            object_type = remove_match.group(1)
+            removed_objects.add(object_type)
     
     return spawned_objects, removed_objects
 
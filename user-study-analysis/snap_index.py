@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""snap_index.py
+
+Grid-keyed spatial hash of the block snaps of a run, for the build order.
+
+Every ``BlockPhysicsController [GridX(Clone)]: Smooth snap: (a) -> (b)``
+line puts a block at b, which the game aligns to a ``CELL_SIZE`` grid. The
+snaps (with the instance each one moved, see ``block_lifecycle``) are
+replayed in time order into dicts keyed by the integer cell of b:
+
+    occupants   cell → instances there now (a block leaves its cell when
+                it is snapped somewhere else)
+    touched     cell → addresses of the clients that snapped into it
+    fill order  cells in the order they were first occupied
+    rebuilds    cell → times it was snapped again after being vacated
+
+so "is this cell occupied at the end", "who touched it" and "was it
+rebuilt" are dict/set lookups, and the cells touched by both partners are
+kept as a set while the snaps are replayed. Only blocks present after the
+last wipe are indexed. The snaps come from the position cache, so indexing
+a run reads no log text.
+
+Usage:
+```
+python snap_index.py [--run 0] [--output snap_summary.csv]
+```
+"""
+
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from block_lifecycle import REMOVED
+from position_store import load_positions
+
+CELL_SIZE = 0.05  # m; the game's snap grid
+
+Cell = Tuple[int, int, int]
+
+
+def cell_of(xyz) -> Cell:
+    """Integer grid cell of a snapped position."""
+    return tuple(int(v) for v in np.round(np.asarray(xyz, dtype=np.float64) / CELL_SIZE))
+
+
+class SnapIndex:
+    """Spatial hash of one run's snaps, replayed in time order."""
+
+    def __init__(self, snaps: np.ndarray, addresses: List[str]):
+        self.occupants: Dict[Cell, Set[int]] = defaultdict(set)
+        self.touched: Dict[Cell, Set[str]] = defaultdict(set)
+        self.first_filled: Dict[Cell, int] = {}   # insertion order = fill order
+        self.rebuilds: Dict[Cell, int] = defaultdict(int)
+        self.shared: Set[Cell] = set()             # touched by more than one address
+        self.snap_count = len(snaps)
+        where: Dict[int, Cell] = {}                # instance → its current cell
+        vacated: Set[Cell] = set()
+
+        order = np.argsort(snaps['epoch'], kind='stable')
+        cells = np.round(np.column_stack((snaps['x'], snaps['y'], snaps['z'])).astype(np.float64)
+                         / CELL_SIZE).astype(np.int64)
+        for row in order:
+            cell = tuple(cells[row].tolist())
+            instance = int(snaps['instance'][row])
+            # Unresolved snaps stand for a block of their own
+            instance = instance if instance >= 0 else -1 - int(row)
+
+            previous = where.get(instance)
+            if previous is not None and previous != cell:
+                self.occupants[previous].discard(instance)
+                if not self.occupants[previous]:
+                    vacated.add(previous)
+            where[instance] = cell
+
+            if cell in vacated:
+                self.rebuilds[cell] += 1
+                vacated.discard(cell)
+            self.occupants[cell].add(instance)
+            self.first_filled.setdefault(cell, int(snaps['epoch'][row]))
+
+            touched = self.touched[cell]
+            touched.add(addresses[snaps['address'][row]])
+            if len(touched) > 1:
+                self.shared.add(cell)
+
+    def is_occupied(self, cell: Cell) -> bool:
+        return bool(self.occupants.get(cell))
+
+    def final_cells(self) -> List[Cell]:
+        """Cells occupied at the end of the run, in fill order."""
+        return [cell for cell in self.first_filled if self.occupants[cell]]
+
+    def fill_order(self) -> List[Cell]:
+        return list(self.first_filled)
+
+    def touched_by(self, cell: Cell) -> Set[str]:
+        return self.touched.get(cell, set())
+
+    def is_shared(self, cell: Cell) -> bool:
+        return cell in self.shared
+
+    def cell_table(self) -> pd.DataFrame:
+        """One row per touched cell in fill order."""
+        cells = self.fill_order()
+        centre = np.array(cells, dtype=np.float64).reshape(-1, 3) * CELL_SIZE
+        return pd.DataFrame({
+            'order': np.arange(len(cells)),
+            'x': centre[:, 0], 'y': centre[:, 1], 'z': centre[:, 2],
+            'first_filled': [self.first_filled[c] for c in cells],
+            'occupied': [self.is_occupied(c) for c in cells],
+            'rebuilds': [self.rebuilds.get(c, 0) for c in cells],
+            'touched_by': [', '.join(sorted(self.touched[c])) for c in cells],
+            'shared': [c in self.shared for c in cells],
+        })
+
+    def summary(self) -> Dict:
+        touched = len(self.first_filled)
+        return {
+            'snaps': self.snap_count,
+            'cells_touched': touched,
+            'final_cells': len(self.final_cells()),
+            'rebuilt_cells': sum(1 for n in self.rebuilds.values() if n),
+            'rebuilds': sum(self.rebuilds.values()),
+            'shared_cells': len(self.shared),
+            'shared_fraction': len(self.shared) / touched if touched else np.nan,
+        }
+
+
+def run_index(log_path: Path) -> SnapIndex:
+    """``SnapIndex`` of the blocks present after the last wipe of *log_path*."""
+    cols = load_positions(Path(log_path))
+    snaps = np.asarray(cols.snaps)
+    alive = np.asarray(cols.blocks)['state'] != REMOVED
+    resolved = snaps['instance'] >= 0
+    keep = np.zeros(len(snaps), dtype=bool)
+    keep[resolved] = alive[snaps['instance'][resolved]]
+    if cols.start_epoch is not None:
+        keep[~resolved] = snaps['epoch'][~resolved] >= cols.start_epoch
+    return SnapIndex(snaps[keep], cols.block_addresses)
+
+
+def analyze_corpus(results_csv: Path = Path('study-run-results.csv'),
+                   log_dir: Path = Path('session_logs/processed_logs')) -> pd.DataFrame:
+    """``SnapIndex.summary`` of every run listed in study-run-results.csv."""
+    runs = pd.read_csv(results_csv, encoding='utf-8-sig')
+    rows = []
+    for run_id, variant in zip(runs['Run #'], runs['Variant']):
+        log_path = Path(log_dir) / f"run_{int(run_id)}_processed.txt"
+        if not log_path.exists():
+            continue
+        rows.append({'Run #': int(run_id), 'Variant': variant, **run_index(log_path).summary()})
+    return pd.DataFrame(rows)
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = sys.argv[1:]
+
+    def option(name, default):
+        return args[args.index(name) + 1] if name in args else default
+
+    run: Optional[str] = option('--run', None)
+    if run is not None:
+        df = run_index(Path('session_logs/processed_logs') / f"run_{run}_processed.txt").cell_table()
+    else:
+        df = analyze_corpus()
+    if df.empty:
+        print("No snaps found")
+        return
+
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if run is None:
+        print("\nBy variant:")
+        print(df.groupby('Variant')[['final_cells', 'rebuilds', 'shared_fraction']].mean().round(3).to_string())
+
+    output = option('--output', None)
+    if output is not None:
+        df.to_csv(output, index=False)
+        print(f"\nSaved {len(df)} rows to {output}")
+
+
+if __name__ == "__main__":
+    main()
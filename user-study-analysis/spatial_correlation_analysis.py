@@ -21,75 +21,26 @@ import seaborn as sns
 from scipy.stats import pearsonr
 import os
 import re
-from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-def parse_position_log(filepath):
-    """Parse a processed log file to extract position data"""
-    positions = {'user_0': [], 'user_2': [], 'timestamps': []}
-    
-    try:
-        with open(filepath, 'r') as f:
-            for line in f:
-                if '[PositionLogger]' in line:
-                    # Extract user ID
-                    if 'Id [0]' in line:
-                        user_id = 'user_0'
-                    elif 'Id [2]' in line:
-                        user_id = 'user_2'
-                    else:
-                        continue
-                    
-                    # Extract position data
-                    pos_match = re.search(r'P: \(([-\d.]+), ([-\d.]+), ([-\d.]+)\)', line)
-                    if pos_match:
-                        x, y, z = map(float, pos_match.groups())
-                        
-                        # Extract timestamp
-                        timestamp_str = line.split(' - ')[0]
-                        try:
-                            timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            continue
-                        
-                        positions[user_id].append({'timestamp': timestamp, 'x': x, 'y': y, 'z': z})
-    
-    except Exception as e:
-        print(f"Error processing {filepath}: {e}")
-        return None
-    
-    return positions
+from dyad_tracks import stack_heads
+
+RESAMPLE_HZ = 1.0     # shared clock rate for the partner head tracks
 
-def calculate_spatial_correlations(positions):
-    """Calculate spatial position correlations between users"""
-    if not positions or len(positions['user_0']) == 0 or len(positions['user_2']) == 0:
+def calculate_spatial_correlations(xyz_0, xyz_2):
+    """Calculate spatial position correlations between the partners' aligned head tracks"""
+    # Need minimum data points
+    if len(xyz_0) < 10 or len(xyz_0) != len(xyz_2):
         return None
     
-    # Convert to DataFrames
-    df_0 = pd.DataFrame(positions['user_0'])
-    df_2 = pd.DataFrame(positions['user_2'])
-    
-    # Align timestamps (match closest timestamps)
     correlations = {}
     
     try:
-        # For simplicity, sample every 10th data point to reduce noise and computation
-        df_0_sampled = df_0.iloc[::10].reset_index(drop=True)
-        df_2_sampled = df_2.iloc[::10].reset_index(drop=True)
-        
-        # Take minimum length to ensure equal sample sizes
-        min_len = min(len(df_0_sampled), len(df_2_sampled))
-        if min_len < 10:  # Need minimum data points
-            return None
-        
-        df_0_sampled = df_0_sampled.iloc[:min_len]
-        df_2_sampled = df_2_sampled.iloc[:min_len]
-        
         # Calculate correlations for each dimension
-        for dim in ['x', 'y', 'z']:
-            if np.var(df_0_sampled[dim]) > 0 and np.var(df_2_sampled[dim]) > 0:
-                corr, p_val = pearsonr(df_0_sampled[dim], df_2_sampled[dim])
+        for axis, dim in enumerate(['x', 'y', 'z']):
+            if np.var(xyz_0[:, axis]) > 0 and np.var(xyz_2[:, axis]) > 0:
+                corr, p_val = pearsonr(xyz_0[:, axis], xyz_2[:, axis])
                 correlations[f'{dim}_correlation'] = corr
                 correlations[f'{dim}_p_value'] = p_val
             else:
@@ -97,8 +48,8 @@ def calculate_spatial_correlations(positions):
                 correlations[f'{dim}_p_value'] = 1
         
         # Calculate overall 3D position correlation (magnitude)
-        pos_0 = np.sqrt(df_0_sampled['x']**2 + df_0_sampled['y']**2 + df_0_sampled['z']**2)
-        pos_2 = np.sqrt(df_2_sampled['x']**2 + df_2_sampled['y']**2 + df_2_sampled['z']**2)
+        pos_0 = np.sqrt((xyz_0 ** 2).sum(axis=1))
+        pos_2 = np.sqrt((xyz_2 ** 2).sum(axis=1))
         
         if np.var(pos_0) > 0 and np.var(pos_2) > 0:
             corr, p_val = pearsonr(pos_0, pos_2)
@@ -109,13 +60,9 @@ def calculate_spatial_correlations(positions):
             correlations['magnitude_p_value'] = 1
         
         # Calculate movement patterns (change in position over time)
-        if len(df_0_sampled) > 1:
-            movement_0 = np.sqrt(np.diff(df_0_sampled['x'])**2 + 
-                               np.diff(df_0_sampled['y'])**2 + 
-                               np.diff(df_0_sampled['z'])**2)
-            movement_2 = np.sqrt(np.diff(df_2_sampled['x'])**2 + 
-                               np.diff(df_2_sampled['y'])**2 + 
-                               np.diff(df_2_sampled['z'])**2)
+        if len(xyz_0) > 1:
+            movement_0 = np.sqrt((np.diff(xyz_0, axis=0) ** 2).sum(axis=1))
+            movement_2 = np.sqrt((np.diff(xyz_2, axis=0) ** 2).sum(axis=1))
             
             if np.var(movement_0) > 0 and np.var(movement_2) > 0:
                 corr, p_val = pearsonr(movement_0, movement_2)
@@ -125,7 +72,7 @@ def calculate_spatial_correlations(positions):
                 correlations['movement_correlation'] = 0
                 correlations['movement_p_value'] = 1
         
-        correlations['data_points'] = min_len
+        correlations['data_points'] = len(xyz_0)
         return correlations
         
     except Exception as e:
@@ -171,50 +118,51 @@ def analyze_all_spatial_correlations():
     if run_mapping is None:
         return None
     
-    # Process all available log files
+    # Collect all available log files
     log_dir = 'session_logs/processed_logs'
     spatial_results = []
     
-    for filename in os.listdir(log_dir):
-        if filename.startswith('run_') and filename.endswith('_processed.txt'):
-            # Extract run number
-            run_match = re.search(r'run_(\d+)_processed\.txt', filename)
-            if not run_match:
-                continue
-                
-            run_num = int(run_match.group(1))
-            filepath = os.path.join(log_dir, filename)
-            
-            print(f"Processing {filename}...")
-            
-            # Parse position data
-            positions = parse_position_log(filepath)
-            if positions is None:
-                continue
-            
-            # Calculate spatial correlations
-            correlations = calculate_spatial_correlations(positions)
-            if correlations is None:
-                continue
-            
-            # Get run metadata
-            run_data = run_mapping[run_mapping['run_id'] == run_num]
-            if len(run_data) == 0:
-                continue
-            
-            run_info = run_data.iloc[0]
-            
-            # Combine results
-            result = {
-                'run_id': run_num,
-                'participant_id': run_info['participant_id'],
-                'collaboration_variant': run_info['collaboration_variant'],
-                'p1_movement_distance': run_info['p1_movement_distance'],
-                'p2_movement_distance': run_info['p2_movement_distance'],
-                **correlations
-            }
-            
-            spatial_results.append(result)
+    run_ids = []
+    for filename in sorted(os.listdir(log_dir)):
+        # Extract run number
+        run_match = re.fullmatch(r'run_(\d+)_processed\.txt', filename)
+        if run_match:
+            run_ids.append(int(run_match.group(1)))
+    run_ids.sort()
+    
+    # Both partners' head tracks of every run on a shared clock, in one batched call
+    print(f"Aligning {len(run_ids)} runs at {RESAMPLE_HZ:g} Hz...")
+    corpus = stack_heads(run_ids, log_dir, RESAMPLE_HZ)
+    if corpus['skipped']:
+        print(f"Skipped runs (fewer than two heads): {corpus['skipped']}")
+    offsets = corpus['offsets']
+    
+    for i, run_num in enumerate(corpus['runs']):
+        rows = slice(offsets[i], offsets[i + 1])
+        
+        # Calculate spatial correlations
+        correlations = calculate_spatial_correlations(corpus['a'][rows], corpus['b'][rows])
+        if correlations is None:
+            continue
+        
+        # Get run metadata
+        run_data = run_mapping[run_mapping['run_id'] == run_num]
+        if len(run_data) == 0:
+            continue
+        
+        run_info = run_data.iloc[0]
+        
+        # Combine results
+        result = {
+            'run_id': run_num,
+            'participant_id': run_info['participant_id'],
+            'collaboration_variant': run_info['collaboration_variant'],
+            'p1_movement_distance': run_info['p1_movement_distance'],
+            'p2_movement_distance': run_info['p2_movement_distance'],
+            **correlations
+        }
+        
+        spatial_results.append(result)
     
     return pd.DataFrame(spatial_results)
 
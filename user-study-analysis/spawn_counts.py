@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""spawn_counts.py
+
+Spawned-object counts per block type, derived from the session logs.
+
+The "Spawned objects" column of study-run-results.csv is a hand-written
+string (``"BigTShape ×6, Cube ×5, ..."``) that every script used to split
+itself. This module counts the ``Spawned GridX at (...)`` lines instead,
+from the per-instance table of the position cache (``block_lifecycle``):
+every spawn of the run, including blocks removed by a wipe, with replayed
+log stretches counted once.
+
+The result is a wide table with one integer column per block type (the
+``Grid`` prefix dropped, as in the CSV) plus ``total`` and ``different``,
+written to ``spawned-objects.csv`` next to study-run-results.csv, so
+scripts load the counts with a plain ``pd.read_csv`` (see
+``load_spawn_counts``). The report lists every run and type where the
+hand-written column disagrees with the logs.
+
+Usage:
+```
+python spawn_counts.py [--output spawned-objects.csv] [--report spawn_disagreements.csv]
+```
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from block_lifecycle import load_blocks
+
+SPAWN_COUNTS_FILE = Path('spawned-objects.csv')
+CSV_COLUMN = 'Spawned objects'
+CSV_ENTRY_RE = re.compile(r'(\w+)\s*×\s*(\d+)')
+
+# ----------------------------------------------------------------------------
+# Counting
+
+
+def log_spawn_counts(log_path: Path) -> Dict[str, int]:
+    """Spawns per block type (without the ``Grid`` prefix) of one log."""
+    types = load_blocks(Path(log_path), after_wipe=False)['type']
+    counts = types.str.replace('Grid', '', regex=False).value_counts()
+    return {name: int(n) for name, n in sorted(counts.items())}
+
+
+def parse_csv_counts(text) -> Dict[str, int]:
+    """The hand-written CSV entry as a dict ({} if missing or INVALID)."""
+    if pd.isna(text) or text == 'INVALID':
+        return {}
+    return {name: int(n) for name, n in CSV_ENTRY_RE.findall(text)}
+
+
+def wide_table(counts: Dict[int, Dict[str, int]]) -> pd.DataFrame:
+    """Run → {type: count} as one int column per type plus ``total`` and ``different``."""
+    df = pd.DataFrame.from_dict(counts, orient='index').fillna(0).astype(np.int64)
+    df = df[sorted(df.columns)].sort_index()
+    df['total'] = df.sum(axis=1)
+    df['different'] = (df.drop(columns='total') > 0).sum(axis=1)
+    df.index.name = 'Run #'
+    return df.reset_index()
+
+
+def spawn_table(results_csv: Path = Path('study-run-results.csv'),
+                log_dir: Path = Path('session_logs/processed_logs')) -> pd.DataFrame:
+    """Log-derived counts of every run listed in study-run-results.csv."""
+    runs = pd.read_csv(results_csv, encoding='utf-8-sig')
+    counts = {}
+    for run_id in runs['Run #']:
+        log_path = Path(log_dir) / f"run_{int(run_id)}_processed.txt"
+        if log_path.exists():
+            counts[int(run_id)] = log_spawn_counts(log_path)
+    return wide_table(counts)
+
+
+def load_spawn_counts(path: Path = SPAWN_COUNTS_FILE) -> pd.DataFrame:
+    """The table written by ``main``: 'Run #' and int columns, no parsing."""
+    return pd.read_csv(path, dtype=np.int64)
+
+
+def spawned_dicts(counts: pd.DataFrame) -> pd.Series:
+    """Run # → {type: count} of the non-zero types, for dict-based scripts."""
+    types = counts.drop(columns=['total', 'different']).set_index('Run #')
+    return types.apply(lambda row: {name: int(n) for name, n in row.items() if n}, axis=1)
+
+# ----------------------------------------------------------------------------
+# Disagreement report
+
+
+def disagreements(table: pd.DataFrame, results: pd.DataFrame) -> pd.DataFrame:
+    """One row per run and type where the CSV column and the logs differ.
+
+    ``factor`` is the CSV/log total of the run; whole factors above 1 point
+    at the CSV having been counted on a log that repeats its session.
+    """
+    logs = table.set_index('Run #')
+    rows = []
+    for run_id, text in zip(results['Run #'], results[CSV_COLUMN]):
+        if int(run_id) not in logs.index:
+            continue
+        log = logs.loc[int(run_id)].drop(['total', 'different'])
+        csv = parse_csv_counts(text)
+        csv_total = sum(csv.values())
+        factor = csv_total / log.sum() if log.sum() else np.nan
+        for name in sorted(set(csv) | set(log[log > 0].index)):
+            expected, found = csv.get(name, 0), int(log.get(name, 0))
+            if expected != found:
+                rows.append({'Run #': int(run_id), 'type': name, 'csv': expected,
+                             'log': found, 'difference': expected - found, 'factor': factor})
+    return pd.DataFrame(rows, columns=['Run #', 'type', 'csv', 'log', 'difference', 'factor'])
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = sys.argv[1:]
+
+    def option(name, default):
+        return args[args.index(name) + 1] if name in args else default
+
+    table = spawn_table()
+    if table.empty:
+        print("No runs could be analysed")
+        return
+
+    output = Path(option('--output', SPAWN_COUNTS_FILE))
+    table.to_csv(output, index=False)
+    print(table.to_string(index=False))
+    print(f"\nSaved {len(table)} runs to {output}")
+
+    report = disagreements(table, pd.read_csv('study-run-results.csv', encoding='utf-8-sig'))
+    if report.empty:
+        print(f"\n'{CSV_COLUMN}' agrees with the logs for every run")
+        return
+    print(f"\n'{CSV_COLUMN}' disagrees with the logs in {report['Run #'].nunique()} runs:")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    report_path = option('--report', None)
+    if report_path is not None:
+        report.to_csv(report_path, index=False)
+        print(f"\nSaved {len(report)} rows to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""spawn_latency.py
+
+Spawn-cooldown and UI latency of the block spawn buttons.
+
+Selecting a block type and spawning it leaves these lines
+(``SelectionManager.cs`` / ``SpawnFromButton.cs``):
+
+    Button tapped to select object: GridPlank      tap
+    Spawned GridPlank at (...) / (...)             spawn
+    SpawnFromButton: Still in cooldown period.     rejected press
+
+Per participant (the address that logged the lines) this measures
+
+    tap → spawn    from a tap to the first spawn of the tapped type by the
+                   same client, before its next tap
+    spawn gap      time between consecutive spawns of the client
+    cooldown wait  from a rejected press to the client's next spawn
+    rejection rate rejected presses / (spawns + rejected presses)
+
+All three event types come from one ``EventStore`` of the log, built with
+``after_wipe`` so tutorial taps and spawns before the last bulk wipe do not count
+and ``skip_replays`` so a log that repeats its session is counted once; the
+per-client matching is a ``searchsorted`` over the sorted times. Log times
+have one-second resolution, so latencies are whole seconds (0 = same
+second).
+
+The "Host" address is the participant whose ID is not logged as an
+address; the other one logs under their ID.
+
+Usage:
+```
+python spawn_latency.py [--output spawn_latency.csv] [--samples spawn_latency_samples.csv]
+```
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from event_store import EventStore, load_event_store
+
+TAP_RE = re.compile(r'^Button tapped to select object: (Grid\w+)')
+SPAWN_RE = re.compile(r'^Spawned (Grid\w+) at')
+COOLDOWN = 'Still in cooldown period'
+
+LATENCY_KINDS = ('tap_to_spawn', 'spawn_gap', 'cooldown_wait')
+
+# ----------------------------------------------------------------------------
+# Event streams
+
+
+class ClientEvents:
+    """Sorted epoch seconds (and block types) of one client's spawn UI events."""
+
+    def __init__(self):
+        self.tap_t: List[int] = []
+        self.tap_type: List[str] = []
+        self.spawn_t: List[int] = []
+        self.spawn_type: List[str] = []
+        self.cooldown_t: List[int] = []
+
+
+def client_events(store: EventStore) -> Dict[str, ClientEvents]:
+    """Address → its taps, spawns and rejected presses, in time order."""
+    clients: Dict[str, ClientEvents] = {}
+
+    def events(kind):
+        return zip(store.between(kind, -np.inf, np.inf), store.times(kind))
+
+    for record, epoch in events('ButtonTapped'):
+        m = TAP_RE.match(record.payload)
+        if m:
+            client = clients.setdefault(record.address, ClientEvents())
+            client.tap_t.append(int(epoch))
+            client.tap_type.append(m.group(1))
+    for record, epoch in events('Spawned'):
+        m = SPAWN_RE.match(record.payload)
+        if m:
+            client = clients.setdefault(record.address, ClientEvents())
+            client.spawn_t.append(int(epoch))
+            client.spawn_type.append(m.group(1))
+    for record, epoch in events('SpawnFromButton'):
+        if COOLDOWN in record.payload:
+            clients.setdefault(record.address, ClientEvents()).cooldown_t.append(int(epoch))
+    return clients
+
+# ----------------------------------------------------------------------------
+# Latencies
+
+
+def tap_to_spawn(tap_t: np.ndarray, tap_type: np.ndarray,
+                 spawn_t: np.ndarray, spawn_type: np.ndarray) -> np.ndarray:
+    """Seconds from each tap to the first spawn of its type before the next
+    tap (taps without such a spawn are left out)."""
+    if len(tap_t) == 0 or len(spawn_t) == 0:
+        return np.zeros(0, dtype=np.int64)
+    next_tap = np.append(tap_t[1:], np.iinfo(np.int64).max)
+    latencies = []
+    for t, block_type, limit in zip(tap_t, tap_type, next_tap):
+        lo, hi = np.searchsorted(spawn_t, [t, limit], 'left')
+        match = np.flatnonzero(spawn_type[lo:hi] == block_type)
+        if len(match):
+            latencies.append(spawn_t[lo + match[0]] - t)
+    return np.asarray(latencies, dtype=np.int64)
+
+
+def cooldown_wait(cooldown_t: np.ndarray, spawn_t: np.ndarray) -> np.ndarray:
+    """Seconds from each rejected press to the next later spawn (if any)."""
+    idx = np.searchsorted(spawn_t, cooldown_t, 'right')
+    found = idx < len(spawn_t)
+    return spawn_t[idx[found]] - cooldown_t[found]
+
+
+def client_latencies(events: ClientEvents) -> Dict[str, np.ndarray]:
+    """``LATENCY_KINDS`` → samples in seconds for one client."""
+    spawn_t = np.asarray(events.spawn_t, dtype=np.int64)
+    return {
+        'tap_to_spawn': tap_to_spawn(np.asarray(events.tap_t, dtype=np.int64), np.asarray(events.tap_type),
+                                     spawn_t, np.asarray(events.spawn_type)),
+        'spawn_gap': np.diff(spawn_t),
+        'cooldown_wait': cooldown_wait(np.asarray(events.cooldown_t, dtype=np.int64), spawn_t),
+    }
+
+
+def participant_of(address: str, p1: str, p2: str, addresses: List[str]) -> str:
+    """Participant ID behind a logging address ("Host" is the unlogged one)."""
+    if address in (p1, p2):
+        return address
+    missing = [p for p in (p1, p2) if p not in addresses]
+    return missing[0] if len(missing) == 1 else address
+
+
+def latency_summary(samples: Dict[str, np.ndarray], events: ClientEvents) -> Dict:
+    """Counts, rejection rate and median/mean of every latency kind."""
+    spawns, rejected = len(events.spawn_t), len(events.cooldown_t)
+    row = {
+        'taps': len(events.tap_t),
+        'spawns': spawns,
+        'rejected': rejected,
+        'rejection_rate': rejected / (spawns + rejected) if spawns + rejected else np.nan,
+    }
+    for kind in LATENCY_KINDS:
+        values = samples[kind]
+        row[f'{kind}_median'] = float(np.median(values)) if len(values) else np.nan
+        row[f'{kind}_mean'] = float(values.mean()) if len(values) else np.nan
+    return row
+
+
+def analyze_run(log_path: Path, p1: str, p2: str) -> Tuple[List[Dict], List[Dict]]:
+    """Per-participant summary rows and the raw latency samples of one run."""
+    clients = client_events(load_event_store(log_path, after_wipe=True, skip_replays=True))
+    rows, samples = [], []
+    for address, events in sorted(clients.items()):
+        participant = participant_of(address, p1, p2, list(clients))
+        latencies = client_latencies(events)
+        rows.append({'participant': participant, 'address': address, **latency_summary(latencies, events)})
+        for kind, values in latencies.items():
+            samples.extend({'participant': participant, 'kind': kind, 'seconds': int(v)} for v in values)
+    return rows, samples
+
+
+def analyze_corpus(results_csv: Path = Path('study-run-results.csv'),
+                   log_dir: Path = Path('session_logs/processed_logs')) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Per-participant summaries and latency samples of every run listed in
+    study-run-results.csv, with 'Run #' and 'Variant'."""
+    runs = pd.read_csv(results_csv, encoding='utf-8-sig')
+    rows, samples = [], []
+    for _, run in runs.iterrows():
+        log_path = Path(log_dir) / f"run_{int(run['Run #'])}_processed.txt"
+        if not log_path.exists():
+            continue
+        key = {'Run #': int(run['Run #']), 'Variant': run['Variant']}
+        run_rows, run_samples = analyze_run(log_path, run['Participant 1 ID'], run['Participant 2 ID'])
+        rows.extend({**key, **row} for row in run_rows)
+        samples.extend({**key, **sample} for sample in run_samples)
+    return pd.DataFrame(rows), pd.DataFrame(samples, columns=['Run #', 'Variant', 'participant', 'kind', 'seconds'])
+
+
+def variant_distributions(samples: pd.DataFrame) -> pd.DataFrame:
+    """Pooled quantiles of every latency kind per variant."""
+    grouped = samples.groupby(['kind', 'Variant'])['seconds']
+    return grouped.describe(percentiles=[0.25, 0.5, 0.75, 0.9])
+
+# ----------------------------------------------------------------------------
+# Main
+
+
+def main() -> None:
+    args = sys.argv[1:]
+
+    def option(name, default):
+        return args[args.index(name) + 1] if name in args else default
+
+    df, samples = analyze_corpus()
+    if df.empty:
+        print("No runs could be analysed")
+        return
+
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print("\nBy variant (per participant):")
+    columns = ['spawns', 'rejected', 'rejection_rate', 'tap_to_spawn_median', 'spawn_gap_median',
+               'cooldown_wait_median']
+    print(df.groupby('Variant')[columns].mean().round(3).to_string())
+    print("\nLatency distributions (s):")
+    print(variant_distributions(samples).round(2).to_string())
+
+    output: Optional[str] = option('--output', None)
+    if output is not None:
+        df.to_csv(output, index=False)
+        print(f"\nSaved {len(df)} participants to {output}")
+    samples_path = option('--samples', None)
+    if samples_path is not None:
+        samples.to_csv(samples_path, index=False)
+        print(f"Saved {len(samples)} samples to {samples_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""trajectory.py
+
+Vectorized trajectory metrics for the PositionLogger streams.
+
+``compute_trajectory`` takes the epoch seconds and (n, 3) positions of one
+stream and does, as NumPy array operations:
+
+- bucketing: the first sample (in log order) of every 1/hz bucket is kept,
+- sorting by bucket time,
+- path length, reproducing the former per-sample ``euclidean()`` sum
+  bit for bit (same per-axis operation order, sequential cumulative sum),
+- per-axis displacement, speed series and jerk (computed on demand).
+
+``shared_clock``/``resample_asof`` put two streams on one clock with a
+backward as-of join (last sample at or before each tick).
+
+Usage:
+```
+from trajectory import compute_trajectory
+
+traj = compute_trajectory(epoch, xyz, hz=1.0)
+print(traj.distance, traj.sample_count)
+```
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class Trajectory(NamedTuple):
+    """Bucketed trajectory of one tracked stream.
+
+    Only the step lengths are computed eagerly; the derived series are
+    evaluated on demand so plain distance queries stay cheap.
+    """
+    t: np.ndarray         # (n,) bucket times, ascending
+    xyz: np.ndarray       # (n, 3) first position of each bucket
+    segments: np.ndarray  # (n-1,) step lengths (m)
+
+    @property
+    def distance(self) -> float:
+        return float(np.cumsum(self.segments)[-1]) if len(self.segments) else 0.0
+
+    @property
+    def sample_count(self) -> int:
+        return len(self.t)
+
+    def cumulative(self) -> np.ndarray:
+        """(n-1,) running path length (m)."""
+        return np.cumsum(self.segments)
+
+    def displacement(self) -> np.ndarray:
+        """(3,) total absolute travel along x, y and z (m)."""
+        if len(self.xyz) < 2:
+            return np.zeros(3)
+        return np.abs(np.diff(self.xyz, axis=0)).sum(axis=0)
+
+    def speed(self) -> np.ndarray:
+        """(n-1,) step length / step duration (m/s)."""
+        return self.segments / np.diff(self.t)
+
+    def jerk(self) -> np.ndarray:
+        """(n,) magnitude of the third time derivative of position (m/s³)."""
+        if len(self.t) < 2:
+            return np.zeros(len(self.t))
+        velocity = np.gradient(self.xyz, self.t, axis=0)
+        acceleration = np.gradient(velocity, self.t, axis=0)
+        return np.linalg.norm(np.gradient(acceleration, self.t, axis=0), axis=1)
+
+
+def bucket_keys(epoch: np.ndarray, hz: float = 1.0) -> np.ndarray:
+    """Quantise epoch seconds to *hz* buckets.
+
+    Above 1 Hz this needs the reconstructed sub-second times (column ``t``
+    of the position cache); whole-second epochs just map to one bucket each.
+    """
+    epoch = np.asarray(epoch, dtype=np.float64)
+    if hz == 1.0:
+        return np.floor(epoch)
+    if hz > 1.0:
+        return np.floor(epoch * hz) / hz
+    step = 1 / hz
+    return np.floor(epoch / step) * step
+
+
+def first_per_bucket(epoch: np.ndarray, hz: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted bucket keys and the row index of the first sample in each."""
+    keys = bucket_keys(epoch, hz)
+    steps = np.diff(keys)
+    if np.all(steps >= 0):
+        # Already in time order (the common case): no sort needed
+        first = np.flatnonzero(np.concatenate(([True], steps > 0)))
+        return keys[first], first
+    keys, first = np.unique(keys, return_index=True)
+    return keys, first
+
+
+def segment_lengths(xyz: np.ndarray) -> np.ndarray:
+    """Euclidean length of every consecutive step of an (n, 3) array."""
+    d = np.diff(xyz, axis=0)
+    return np.sqrt(d[:, 0] ** 2 + d[:, 1] ** 2 + d[:, 2] ** 2)
+
+
+def path_length(xyz: np.ndarray) -> float:
+    """Sequential sum of the step lengths (matches the Python ``sum``)."""
+    if len(xyz) < 2:
+        return 0.0
+    return float(np.cumsum(segment_lengths(xyz))[-1])
+
+
+def sequential_mean(values: np.ndarray) -> float:
+    """Mean from a sequential sum (matches ``sum(values) / len(values)``)."""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if not len(values):
+        return 0.0
+    return float(np.cumsum(values)[-1] / len(values))
+
+
+def compute_trajectory(epoch: np.ndarray, xyz: np.ndarray, hz: float = 1.0) -> Trajectory:
+    """Bucket, sort and measure one stream of (epoch, x, y, z) samples."""
+    xyz = np.asarray(xyz, dtype=np.float64).reshape(-1, 3)
+    t, first = first_per_bucket(epoch, hz)
+    return measure_trajectory(t, xyz[first])
+
+
+def measure_trajectory(t: np.ndarray, pts: np.ndarray) -> Trajectory:
+    """Measure an already bucketed stream given in ascending time order."""
+    t = np.asarray(t, dtype=np.float64)
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 3)
+    return Trajectory(t, pts, segment_lengths(pts))
+
+
+def shared_clock(t_a: np.ndarray, t_b: np.ndarray, hz: float = 1.0) -> np.ndarray:
+    """Ticks at *hz* spanning the time range covered by both streams."""
+    if len(t_a) == 0 or len(t_b) == 0:
+        return np.zeros(0)
+    start = max(np.min(t_a), np.min(t_b))
+    end = min(np.max(t_a), np.max(t_b))
+    if end < start:
+        return np.zeros(0)
+    return start + np.arange(int(np.floor((end - start) * hz)) + 1) / hz
+
+
+def resample_asof(t: np.ndarray, values: np.ndarray, clock: np.ndarray,
+                  tolerance: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Backward as-of join of a stream onto *clock*.
+
+    Returns the last sample at or before every tick and a mask of the ticks
+    that have one no older than *tolerance* seconds.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    values = np.asarray(values)
+    order = np.argsort(t, kind="stable")
+    t, values = t[order], values[order]
+    idx = np.searchsorted(t, clock, "right") - 1
+    valid = idx >= 0
+    idx = np.maximum(idx, 0)
+    if tolerance is not None and len(t):
+        valid &= (clock - t[idx]) <= tolerance
+    if not len(t):
+        return np.zeros((len(clock),) + values.shape[1:]), np.zeros(len(clock), dtype=bool)
+    return values[idx], valid
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""trajectory_pyramid.py
+
+Level-of-detail pyramids of the PositionLogger tracks, for plotting.
+
+Every tracked point of every client (see ``position_store.TrackSet``) is
+ranked once with Ramer–Douglas–Peucker: a point's importance is the
+distance at which RDP would split the path there, capped by the importance
+of the split that contains it, so keeping the k most important points is
+the RDP simplification with k points. The pyramid stores the rows of each
+level (``LEVELS``: every point, a quarter, a sixteenth) as sorted index
+arrays, so corners and turn-arounds survive decimation while straight and
+stationary stretches are thinned out.
+
+Plotting code asks for a point budget per track. ``level`` returns the
+finest stored level that fits, which can be up to a factor 4 below the
+budget; ``top`` (and ``track_level``) uses the full ranking instead and
+returns exactly ``min(n, budget)`` points, without touching the samples
+again. ``log_pyramids`` keeps the pyramids of a log in memory after the
+first request.
+
+Tracks are never merged: a client's tracked points are different heads,
+so interleaving them in time order would zig-zag between them.
+
+Usage:
+```
+from trajectory_pyramid import log_pyramids, track_level
+
+pyramids = log_pyramids(Path("session_logs/processed_logs/run_0_processed.txt"))
+t, xyz = track_level(pyramids, (0, 1), budget=1000)  # client Id 0, tracked point 1
+```
+"""
+
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from glitch_filter import REPLAY
+from position_store import TrackSet, load_positions
+
+LEVELS = (1, 4, 16)  # decimation factors, finest first
+
+# ----------------------------------------------------------------------------
+# Ranking
+
+
+def rdp_importance(xyz: np.ndarray) -> np.ndarray:
+    """RDP importance of every point of an (n, 3) path (endpoints: inf)."""
+    xyz = np.asarray(xyz, dtype=np.float64)
+    n = len(xyz)
+    importance = np.zeros(n)
+    if n == 0:
+        return importance
+    importance[[0, -1]] = np.inf
+
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        lo, hi, cap = stack.pop()
+        if hi - lo < 2:
+            continue
+        inner = xyz[lo + 1:hi]
+        chord = xyz[hi] - xyz[lo]
+        length = np.dot(chord, chord)
+        offset = inner - xyz[lo]
+        if length > 0:
+            # Distance to the chord segment (projection clamped to its ends)
+            along = np.clip(offset @ chord / length, 0.0, 1.0)
+            offset = offset - along[:, None] * chord
+        dist = np.sqrt(np.einsum('ij,ij->i', offset, offset))
+        k = lo + 1 + int(np.argmax(dist))
+        split = min(float(dist[k - lo - 1]), cap)
+        importance[k] = split
+        stack.append((lo, k, split))
+        stack.append((k, hi, split))
+    return importance
+
+
+def level_size(n: int, factor: int) -> int:
+    """Points kept of *n* at decimation *factor* (at least both endpoints)."""
+    return min(n, max(2, math.ceil(n / factor)))
+
+
+class TrajectoryPyramid:
+    """Precomputed RDP levels of one track."""
+
+    def __init__(self, xyz: np.ndarray, levels: Iterable[int] = LEVELS):
+        self.n = len(xyz)
+        self.importance = rdp_importance(xyz)
+        self.rank = np.argsort(-self.importance, kind='stable')
+        self.levels: Dict[int, np.ndarray] = {
+            factor: np.sort(self.rank[:level_size(self.n, factor)]) for factor in sorted(levels)
+        }
+
+    def __len__(self) -> int:
+        return self.n
+
+    def factor(self, budget: int) -> int:
+        """Smallest decimation factor whose level fits *budget* (else the coarsest)."""
+        for factor, rows in self.levels.items():
+            if len(rows) <= budget:
+                return factor
+        return max(self.levels)
+
+    def level(self, budget: int) -> np.ndarray:
+        """Row indices (ascending) of the finest level within *budget* points."""
+        return self.levels[self.factor(budget)]
+
+    def top(self, budget: int) -> np.ndarray:
+        """Row indices (ascending) of the *budget* most important points, i.e.
+        the RDP simplification with exactly that many points (at least both
+        endpoints)."""
+        return np.sort(self.rank[:min(self.n, max(2, budget))])
+
+# ----------------------------------------------------------------------------
+# Logs
+
+
+class LogPyramids(dict):
+    """Pyramids of every (group value, point) track of a log, plus the tracks."""
+
+    def __init__(self, tracks: TrackSet, levels: Iterable[int] = LEVELS):
+        super().__init__()
+        self.tracks = tracks
+        for key in tracks.keys():
+            self[key] = TrajectoryPyramid(tracks.track(*key).xyz, levels)
+
+
+@lru_cache(maxsize=32)
+def log_pyramids(log_path: Path, group: str = 'id') -> LogPyramids:
+    """Pyramids of all tracks of *log_path* after the last wipe, grouped by
+    logging client ('id') or 'address'; built on first use and kept in memory.
+
+    Replayed rows of concatenated logs are left out, so every track runs
+    forward in time once.
+    """
+    cols = load_positions(Path(log_path))
+    rows = np.arange(len(cols))[cols.after_wipe()]
+    rows = rows[(np.asarray(cols.glitch[rows]) & REPLAY) == 0]
+    return LogPyramids(TrackSet(cols, rows, group=group))
+
+
+def track_level(pyramids: LogPyramids, key: Tuple[int, int], budget: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(t, xyz) of the (group value, point) track *key* with ``min(n, budget)``
+    samples kept by RDP importance, in time order."""
+    track = pyramids.tracks.track(*key)
+    rows = pyramids[key].top(budget)
+    return track.t[rows], track.xyz[rows]
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""trajectory_store.py
+
+Binary, chunked export of the per-participant trajectories of all sessions.
+
+A store is a directory holding
+
+    samples.npy   structured array (t float64, x y z float32), one
+                  contiguous chunk per (session, participant)
+    index.json    chunk table: session, participant, ip, first row, row
+                  count, plus the per-session metrics (duration, avg_height)
+
+``TrajectoryStore`` memory-maps ``samples.npy``, so fetching one chunk is a
+slice of the mapped array: nothing else is read and nothing is copied. The
+stored samples are the bucketed trajectory the distances are measured on,
+which makes ``participant_metrics.csv`` and ``participant_summary.json``
+derivable from the store without parsing any log (``session_data``).
+
+Usage:
+```
+from trajectory_store import TrajectoryStore
+
+store = TrajectoryStore(Path("trajectories"))
+chunk = store.chunk(0, "P1")           # zero-copy structured view
+traj = store.trajectory(0, "P1")       # Trajectory with .distance, .speed() ...
+```
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from occupancy import OccupancyGrid
+from trajectory import Trajectory, measure_trajectory
+
+SAMPLES_FILE = "samples.npy"
+INDEX_FILE = "index.json"
+FORMAT_VERSION = 1
+
+# Positions are logged with two decimals; float32 round-trips them exactly
+POSITION_DECIMALS = 2
+
+SAMPLE_DTYPE = np.dtype([("t", "<f8"), ("x", "<f4"), ("y", "<f4"), ("z", "<f4")])
+
+# ----------------------------------------------------------------------------
+# Writer
+
+
+def write_trajectories(directory: Path, session_data: Dict, labels: Dict[int, Dict[str, str]],
+                       hz: float = 1.0) -> Path:
+    """Write ``session_data`` (session → ip → metrics with a 'trajectory') to *directory*.
+
+    *labels* maps session → ip → participant label; unmapped IPs are
+    stored as ``Unknown_<ip>``.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    chunks: List[Dict] = []
+    parts: List[np.ndarray] = []
+    row = 0
+    for session_id in sorted(session_data):
+        for ip, metrics in session_data[session_id].items():
+            traj: Trajectory = metrics['trajectory']
+            part = np.empty(traj.sample_count, dtype=SAMPLE_DTYPE)
+            part["t"] = traj.t
+            part["x"], part["y"], part["z"] = traj.xyz[:, 0], traj.xyz[:, 1], traj.xyz[:, 2]
+            parts.append(part)
+            chunks.append({
+                'session': session_id,
+                'participant': labels.get(session_id, {}).get(ip, f"Unknown_{ip}"),
+                'ip': ip,
+                'start': row,
+                'count': len(part),
+                'duration': metrics['duration'],
+                'avg_height': metrics['avg_height'],
+            })
+            row += len(part)
+
+    # index.json is written last, so a half-written store is never picked up
+    (directory / INDEX_FILE).unlink(missing_ok=True)
+    samples = np.concatenate(parts) if parts else np.empty(0, dtype=SAMPLE_DTYPE)
+    np.save(directory / SAMPLES_FILE, samples)
+    index = {'version': FORMAT_VERSION, 'hz': hz, 'rows': row, 'chunks': chunks}
+    (directory / INDEX_FILE).write_text(json.dumps(index, indent=2))
+    return directory
+
+# ----------------------------------------------------------------------------
+# Reader
+
+
+class TrajectoryStore:
+    """Random access to the chunks of a trajectory store."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        index = json.loads((self.directory / INDEX_FILE).read_text())
+        if index.get('version') != FORMAT_VERSION:
+            raise ValueError(f"unsupported trajectory store version {index.get('version')}")
+        self.hz: float = index['hz']
+        self.chunks: List[Dict] = index['chunks']
+        self.samples = np.load(self.directory / SAMPLES_FILE, mmap_mode="r")
+        self._by_key: Dict[Tuple[int, str], Dict] = {
+            (c['session'], c['participant']): c for c in self.chunks
+        }
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def keys(self) -> List[Tuple[int, str]]:
+        """(session, participant) of every chunk, in storage order."""
+        return list(self._by_key)
+
+    def info(self, session: int, participant: str) -> Dict:
+        return self._by_key[(session, participant)]
+
+    def chunk(self, session: int, participant: str) -> np.ndarray:
+        """Zero-copy structured view of one participant's samples in one session."""
+        c = self._by_key[(session, participant)]
+        return self.samples[c['start']:c['start'] + c['count']]
+
+    def xyz(self, session: int, participant: str) -> np.ndarray:
+        """(n, 3) float64 positions with the logged two-decimal values restored."""
+        chunk = self.chunk(session, participant)
+        pts = np.column_stack((chunk["x"], chunk["y"], chunk["z"])).astype(np.float64)
+        return np.round(pts, POSITION_DECIMALS)
+
+    def trajectory(self, session: int, participant: str) -> Trajectory:
+        return measure_trajectory(np.asarray(self.chunk(session, participant)["t"]),
+                                  self.xyz(session, participant))
+
+
+def session_data(store: TrajectoryStore) -> Dict[int, Dict[str, Dict]]:
+    """Per-session metrics (session → ip → metrics) rebuilt from the store.
+
+    Same shape as the output of ``process_session_with_positions``, so it
+    feeds ``aggregate_participant_data`` directly.
+    """
+    data: Dict[int, Dict[str, Dict]] = {}
+    for c in store.chunks:
+        traj = store.trajectory(c['session'], c['participant'])
+        occupancy = OccupancyGrid()
+        occupancy.add_many(traj.xyz[:, 0], traj.xyz[:, 2], 1 / store.hz)
+        data.setdefault(c['session'], {})[c['ip']] = {
+            'distance': traj.distance,
+            'duration': c['duration'],
+            'avg_height': c['avg_height'],
+            'sample_count': traj.sample_count,
+            'occupancy': occupancy,
+            'trajectory': traj,
+        }
+    return data
@@ -9,6 +9,8 @@ from collections import defaultdict, Counter
 import warnings
 warnings.filterwarnings('ignore')
 
+from event_store import TimeIndex
+
 # Set up plotting style
 plt.style.use('default')
 sns.set_palette("husl")
@@ -185,25 +187,30 @@ class TranscriptAnalyzer:
             if session_duration == 0:
                 continue
             
-            # Divide session into quartiles and count words in each
+            # Index utterance start times per speaker, weighted by word count
+            starts = {'p1': [], 'p2': [], 'host': []}
+            word_counts = {'p1': [], 'p2': [], 'host': []}
+            for utterance in transcript.values():
+                speaker = utterance.get('speaker', 'unknown')
+                if speaker == p1_id or str(speaker) == '0':
+                    role = 'p1'
+                elif speaker == p2_id or str(speaker) == '1':
+                    role = 'p2'
+                elif speaker == 'HOST':
+                    role = 'host'
+                else:
+                    continue
+                starts[role].append(utterance.get('start', 0))
+                word_counts[role].append(len(utterance.get('words', '').split()))
+            indexes = {role: TimeIndex(starts[role], word_counts[role]) for role in starts}
+            
+            # Divide session into quartiles and count words in each (binary search per window)
+            quarter_bounds = [(quarter * session_duration) / 4 for quarter in range(5)]
+            window_start, window_end = np.array(quarter_bounds[:-1]), np.array(quarter_bounds[1:])
+            words = {role: index.total(window_start, window_end) for role, index in indexes.items()}
+            
             for quarter in range(4):
-                quarter_start = (quarter * session_duration) / 4
-                quarter_end = ((quarter + 1) * session_duration) / 4
-                
-                quarter_words = {'p1': 0, 'p2': 0, 'host': 0}
-                
-                for utterance in transcript.values():
-                    start_time = utterance.get('start', 0)
-                    speaker = utterance.get('speaker', 'unknown')
-                    words = len(utterance.get('words', '').split())
-                    
-                    if quarter_start <= start_time < quarter_end:
-                        if speaker == p1_id or str(speaker) == '0':
-                            quarter_words['p1'] += words
-                        elif speaker == p2_id or str(speaker) == '1':
-                            quarter_words['p2'] += words
-                        elif speaker == 'HOST':
-                            quarter_words['host'] += words
+                quarter_words = {role: int(words[role][quarter]) for role in words}
                 
                 temporal_data.append({
                     'run': run_num,